@@ -1,70 +1,44 @@
 import os
+import sys
 import time
-import shutil
 import logging
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 
-def init_driver(download_dir):
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-gpu")
-    # chrome_options.add_argument("--headless")  # Commented out to disable headless mode
-
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--incognito")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--kiosk-printing")
-
-    chrome_options.add_experimental_option("prefs", {
-        "download.default_directory": download_dir,
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "printing.print_preview_sticky_settings.appState": "{\"recentDestinations\":[{\"id\":\"Save as PDF\",\"origin\":\"local\",\"account\":\"\"}],\"selectedDestinationId\":\"Save as PDF\",\"version\":2}"
-    })
-
-    # Enable logging for debugging
-    chrome_options.add_argument("--enable-logging")
-    chrome_options.add_argument("--v=1")
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.driver_pool import DriverPool
+from common.browser_profile import PRINT_BLOCK, lean_driver
+from common.browser_downloads import print_to_pdf
+
+BASE_DOWNLOAD_DIR = os.path.join(os.getcwd(), 'tender_pdfs')
+
+def init_driver():
+    # Tender pages are printed to PDF, so keep stylesheets, fonts and images.
+    # Not headless, with verbose logging for debugging.
+    driver = lean_driver(headless=False, block=PRINT_BLOCK, page_load_strategy="normal",
+                         arguments=["--incognito", "--enable-logging", "--v=1"])
     driver.implicitly_wait(10)
     return driver
 
+# One browser walks the tender list while the other prints tender pages
+driver_pool = DriverPool(init_driver, size=2)
+
 def download_pdf(entry_counter, entry_data):
-    base_download_dir = os.path.join(os.getcwd(), 'tender_pdfs')
-    # entry_folder = os.path.join(base_download_dir, f"tender_{entry_counter}")
+    # entry_folder = os.path.join(BASE_DOWNLOAD_DIR, f"tender_{entry_counter}")
     # os.makedirs(entry_folder, exist_ok=True)
 
-    driver = init_driver(base_download_dir)  # No headless mode enabled here
     try:
-        driver.get(entry_data['link'])
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        print("Page loaded for entry:", entry_counter)
-
-        driver.execute_script("window.print();")
-        time.sleep(5)  # Wait for print dialog to appear
-
-        downloads_folder = os.path.expanduser('~/Downloads')
-        pdf_files = [f for f in os.listdir(downloads_folder) if f.endswith('.pdf')]
-        if pdf_files:
-            latest_pdf = max([os.path.join(downloads_folder, f) for f in pdf_files], key=os.path.getctime)
-            new_pdf_path = os.path.join(base_download_dir, f"tender_{entry_counter}.pdf")
-            shutil.move(latest_pdf, new_pdf_path)
-            print(f"Moved PDF to {new_pdf_path}")
-        else:
-            print(f"PDF for entry {entry_counter} did not download.")
+        with driver_pool.driver() as driver:
+            driver.get(entry_data['link'])
+            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+            print("Page loaded for entry:", entry_counter)
+
+            new_pdf_path = print_to_pdf(driver, os.path.join(BASE_DOWNLOAD_DIR, f"tender_{entry_counter}.pdf"))
+            print(f"Saved PDF to {new_pdf_path}")
     except Exception as e:
         print(f"An error occurred while processing entry {entry_counter}: {e}")
         input("Error occurred. Press Enter to continue debugging...")  # Pause the script for debugging
-    finally:
-        driver.quit()
 
 def get_data(driver):
     global entry_counter
@@ -149,13 +123,14 @@ def get_data(driver):
             break
 
 def main():
-    base_download_dir = os.path.join(os.getcwd(), 'tender_pdfs')
-    driver = init_driver(base_download_dir)  # No headless mode enabled here
+    driver_pool.warm()
+    driver = driver_pool.checkout()
     try:
         driver.get("https://www.adb.org/projects/tenders")
         get_data(driver)
     finally:
-        driver.quit()
+        driver_pool.checkin(driver)
+        driver_pool.close()
 
 if __name__ == "__main__":
     main()
@@ -1,73 +1,48 @@
 import os
+import sys
 import time
-import shutil
-import multiprocessing
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 
-def init_driver(download_dir):
-    chrome_options = Options()
-    chrome_options.add_argument("--disable-gpu")
-    # chrome_options.add_argument("--headless")  # Uncomment for headless mode
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.add_argument("--kiosk-printing")
-
-    chrome_options.add_experimental_option("prefs", {
-        "download.default_directory": download_dir,
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True,
-        "printing.print_preview_sticky_settings.appState": "{\"recentDestinations\":[{\"id\":\"Save as PDF\",\"origin\":\"local\",\"account\":\"\"}],\"selectedDestinationId\":\"Save as PDF\",\"version\":2}"
-    })
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.driver_pool import DriverPool
+from common.browser_profile import PRINT_BLOCK, lean_driver
+from common.browser_downloads import print_to_pdf
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, PDFS_DOWNLOADED, PDF_SECONDS, record_error, serve_metrics
+from common.waits import MeteredWait
+
+BASE_DOWNLOAD_DIR = os.path.join(os.getcwd(), 'tender_pdfs')
+DOWNLOAD_WORKERS = 10
+
+def init_driver():
+    # Tender pages are printed to PDF, so keep stylesheets, fonts and images.
+    # Page.printToPDF needs no print dialog, so the browsers can run headless.
+    driver = lean_driver(headless=True, block=PRINT_BLOCK, page_load_strategy="normal")
     driver.implicitly_wait(10)
     return driver
 
-def wait_for_downloads(download_folder, timeout=60):
-    seconds_passed = 0
-    while seconds_passed < timeout:
-        pdf_files = [f for f in os.listdir(download_folder) if f.endswith('.pdf')]
-        if pdf_files:
-            return pdf_files
-        time.sleep(1)
-        seconds_passed += 1
-    return []
+# One browser walks the tender list plus one per concurrent download
+driver_pool = DriverPool(init_driver, size=DOWNLOAD_WORKERS + 1)
 
 def download_pdf(entry_counter, entry_data):
-    base_download_dir = os.path.join(os.getcwd(), 'tender_pdfs')
-    entry_folder = os.path.join(base_download_dir, f"tender_{entry_counter}")
+    entry_folder = os.path.join(BASE_DOWNLOAD_DIR, f"tender_{entry_counter}")
     os.makedirs(entry_folder, exist_ok=True)
 
-    driver = init_driver(entry_folder)
     try:
-        driver.get(entry_data['link'])
-        WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
-        print("Page loaded for entry:", entry_counter)
-
-        driver.execute_script("window.print();")
-        
-        downloads_folder = os.path.expanduser('~/Downloads')
-        pdf_files = wait_for_downloads(downloads_folder)
-        
-        if pdf_files:
-            latest_pdf = max([os.path.join(downloads_folder, f) for f in pdf_files], key=os.path.getctime)
-            new_pdf_path = os.path.join(entry_folder, f"tender_{entry_counter}.pdf")
-            shutil.move(latest_pdf, new_pdf_path)
-            print(f"Moved PDF to {new_pdf_path}")
-        else:
-            print(f"PDF for entry {entry_counter} did not download.")
+        with driver_pool.driver() as driver, PDF_SECONDS.time(scraper="adb"):
+            driver.get(entry_data['link'])
+            MeteredWait(driver, 20, "tender_body").until(EC.presence_of_element_located((By.TAG_NAME, 'body')))
+            print("Page loaded for entry:", entry_counter)
+
+            # Printed straight to this tender's own file, so parallel workers never pick up each other's PDFs
+            new_pdf_path = print_to_pdf(driver, os.path.join(entry_folder, f"tender_{entry_counter}.pdf"))
+            PDFS_DOWNLOADED.inc(scraper="adb")
+            print(f"Saved PDF to {new_pdf_path}")
     except Exception as e:
         print(f"An error occurred while processing entry {entry_counter}: {e}")
-    finally:
-        driver.quit()
+        record_error("adb", e)
 
 def get_data(driver):
     global entry_counter
@@ -77,10 +52,11 @@ def get_data(driver):
 
     while True:
         try:
-            lists = WebDriverWait(driver, 20).until(
+            page_start_time = time.time()
+            lists = MeteredWait(driver, 20, "tender_list").until(
                 EC.visibility_of_element_located((By.CLASS_NAME, 'list'))
             )
-            items = WebDriverWait(lists, 20).until(
+            items = MeteredWait(lists, 20, "tender_items").until(
                 EC.visibility_of_all_elements_located((By.CSS_SELECTOR, '.item.linked'))
             )
 
@@ -121,9 +97,14 @@ def get_data(driver):
 
                     except Exception as e:
                         print(f"An error occurred while processing an item: {e}")
+                        record_error("adb", e)
+
+            PAGE_SECONDS.observe(time.time() - page_start_time, scraper="adb")
+            PAGES_FETCHED.inc(scraper="adb")
+            CARDS_PARSED.inc(len(entry_data_list), scraper="adb")
 
-            with multiprocessing.Pool(processes=10) as pool:
-                pool.starmap(download_pdf, [(data['id'], data) for data in entry_data_list])
+            with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+                list(executor.map(lambda data: download_pdf(data['id'], data), entry_data_list))
 
             # Retry logic for clicking the next button
             max_retries = 3
@@ -139,6 +120,7 @@ def get_data(driver):
 
                 except Exception as e:
                     print(f"Attempt {attempt + 1} failed: {e}")
+                    record_error("adb", e)
                     time.sleep(1) 
                     if attempt == max_retries - 1:
                         print("Max retries reached. Exiting...")
@@ -146,16 +128,19 @@ def get_data(driver):
 
         except Exception as e:
             print("Error finding list:", e)
+            record_error("adb", e)
             break
 
 def main():
-    base_download_dir = os.path.join(os.getcwd(), 'tender_pdfs')
-    driver = init_driver(base_download_dir)
+    serve_metrics()
+    driver_pool.warm()
+    driver = driver_pool.checkout()
     try:
         driver.get("https://www.adb.org/projects/tenders")
         get_data(driver)
     finally:
-        driver.quit()
+        driver_pool.checkin(driver)
+        driver_pool.close()
 
 if __name__ == "__main__":
     main()
@@ -4,26 +4,23 @@ import base64
 import time
 import csv
 import requests
-from selenium import webdriver
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import Select, WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from paddleocr import PaddleOCR
 from PIL import Image
 from io import BytesIO
 from bs4 import BeautifulSoup
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_profile import CAPTCHA_BLOCK, lean_driver
 
 def initialize_driver():
-    chrome_options = Options()
-    # chrome_options.add_argument("--headless")
-    chrome_options.page_load_strategy = 'eager'
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+    # The captcha is read from a screenshot, so images stay on
+    return lean_driver(headless=False, block=CAPTCHA_BLOCK)
 
 def select_radio_button(driver, radio_button_id):
     radio_button = driver.find_element(By.ID, radio_button_id)
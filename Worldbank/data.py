@@ -1,23 +1,18 @@
 import traceback
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+import os
+import sys
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_profile import lean_driver
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.waits import MeteredWait, page_change
+
 def init_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    chrome_options.page_load_strategy = 'eager'
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+    return lean_driver()
 
 def write_to_file(file, data):
     with open(file, 'a', encoding='utf-8') as f:
@@ -33,10 +28,12 @@ def get_data(driver):
     
     while True:
         try:
-            WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "tbody")))
+            page_start_time = time.time()
+            MeteredWait(driver, 10, "notice_table").until(EC.presence_of_element_located((By.TAG_NAME, "tbody")))
 
             tbody = driver.find_element(By.TAG_NAME, "tbody")
             rows = tbody.find_elements(By.TAG_NAME, "tr")
+            PAGES_FETCHED.inc(scraper="worldbank")
 
             if rows:
                 for row in rows:
@@ -70,26 +67,34 @@ def get_data(driver):
                             write_to_file(file, formatted_data)
                             
                             id_counter += 1
+                            CARDS_PARSED.inc(scraper="worldbank")
                     except Exception as e:
                         print(f"An error occurred while processing a row: {e}")
+                        record_error("worldbank", e)
                         traceback.print_exc()
 
+            # Rows are read through the driver one call at a time, so the page time covers them too
+            PAGE_SECONDS.observe(time.time() - page_start_time, scraper="worldbank")
+
             try:
                 next_button = WebDriverWait(driver, 10).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, "ul.pagination li a i.fa-angle-right"))
                 )
-                driver.execute_script("arguments[0].click();", next_button)
-                time.sleep(20)  # Small delay to ensure the page has time to load
+                # The table body may be replaced wholesale, so watch the whole page until it goes quiet
+                with page_change(driver, ready="tbody tr", timeout=60):
+                    driver.execute_script("arguments[0].click();", next_button)
             except Exception as e:
                 print(f"No more pages or an error occurred: {e}")
                 break  # Exit loop if no more pages
             
         except Exception as e:
             print(f"An error occurred while processing the page: {e}")
+            record_error("worldbank", e)
             traceback.print_exc()
             break
 
 def main():
+    serve_metrics()
     driver = init_driver()
     try:
         driver.get("https://projects.worldbank.org/en/projects-operations/procurement?srce=both")
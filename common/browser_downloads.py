@@ -0,0 +1,188 @@
+import os
+import base64
+import shutil
+import tempfile
+import threading
+
+import trio
+
+from common.cdp import CdpError, browser_ws_url, open_cdp
+from common.metrics import PDFS_DOWNLOADED, PDF_SECONDS, record_error
+
+# Without these Chrome shows PDFs in its viewer, or asks where to save, instead of downloading
+DOWNLOAD_PREFS = {
+    "plugins.always_open_pdf_externally": True,
+    "download.prompt_for_download": False,
+}
+# Storage.getCookies returns more fields than Storage.setCookies accepts
+COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite", "expires", "priority",
+                 "sourceScheme", "sourcePort")
+
+
+def cookie_param(cookie):
+    param = {field: cookie[field] for field in COOKIE_FIELDS if field in cookie}
+    if cookie.get("session"):
+        param.pop("expires", None)
+    return param
+
+
+def print_to_pdf(driver, path, print_background=True):
+    # Renders the loaded page straight to path, with no print dialog or download folder in between
+    result = driver.execute_cdp_cmd("Page.printToPDF", {"printBackground": print_background})
+    part_path = f"{path}.{threading.get_ident()}.part"
+    try:
+        with open(part_path, "wb") as f:
+            f.write(base64.b64decode(result["data"]))
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return path
+
+
+class BrowserDownloader:
+    # For documents only a browser can fetch. Each download runs in a fresh
+    # browser context of the crawl's Chrome, holding a copy of its cookies and
+    # saving into a private directory, so parallel downloads never see each
+    # other's files. Chrome's download events say when the file is complete,
+    # and it is moved into place under the name Chrome suggested.
+
+    def __init__(self, timeout=120, scraper="gem_pdf"):
+        self.timeout = timeout
+        self.scraper = scraper
+        self.ws_url = None
+        self.lock = threading.Lock()
+        self.stats = {"downloaded": 0, "failed": 0, "bytes": 0}
+        self._thread = None
+        self._token = None
+        self._stopped = None
+        self._connection = None
+        self._start_error = None
+
+    def use_browser(self, driver):
+        # Downloads go through this driver's Chrome, with its cookies as they are at each download
+        self.ws_url = browser_ws_url(driver)
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def _ensure_started(self):
+        # The CDP connection lives on a trio loop in its own thread, opened by the first download
+        with self.lock:
+            if self._token is None:
+                if self.ws_url is None:
+                    raise CdpError("no browser to download with, call use_browser first")
+                ready = threading.Event()
+                self._thread = threading.Thread(target=trio.run, args=(self._serve, ready), daemon=True)
+                self._thread.start()
+                ready.wait()
+                if self._token is None:
+                    raise CdpError(f"could not connect to the browser: {self._start_error}")
+            return self._token
+
+    async def _serve(self, ready):
+        try:
+            async with open_cdp(self.ws_url) as connection:
+                self._connection = connection
+                self._stopped = trio.Event()
+                self._token = trio.lowlevel.current_trio_token()
+                ready.set()
+                await self._stopped.wait()
+        except Exception as e:
+            self._start_error = e
+        finally:
+            self._token = None
+            ready.set()
+
+    def download(self, url, folder_name, filename=None):
+        # Returns the saved path, or None when the browser didn't download the file
+        try:
+            token = self._ensure_started()
+            with PDF_SECONDS.time(scraper=self.scraper):
+                path, size = trio.from_thread.run(self._download, url, folder_name, filename, trio_token=token)
+        except Exception as e:
+            print(f"Error downloading {url} through the browser: {e}")
+            record_error(self.scraper, e)
+            self._count("failed")
+            return None
+
+        PDFS_DOWNLOADED.inc(scraper=self.scraper)
+        self._count("downloaded")
+        self._count("bytes", size)
+        return path
+
+    async def _download(self, url, folder_name, filename):
+        connection = self._connection
+        os.makedirs(folder_name, exist_ok=True)
+        # Inside the destination folder, so the finished file is renamed rather than copied into place
+        private_dir = tempfile.mkdtemp(prefix=".download-", dir=folder_name)
+        context_id = await connection.create_context()
+        try:
+            cookies = (await connection.send("Storage.getCookies")).get("cookies", [])
+            if cookies:
+                await connection.send("Storage.setCookies", {
+                    "cookies": [cookie_param(cookie) for cookie in cookies],
+                    "browserContextId": context_id,
+                })
+            # allowAndName saves the file under the download's guid, which the events carry
+            await connection.send("Browser.setDownloadBehavior", {
+                "behavior": "allowAndName",
+                "downloadPath": os.path.abspath(private_dir),
+                "browserContextId": context_id,
+                "eventsEnabled": True,
+            })
+            async with connection.events("Browser.downloadWillBegin", "Browser.downloadProgress") as events:
+                session = await connection.open_tab("about:blank", context_id)
+                navigation = await session.send("Page.navigate", {"url": url})
+                # A download aborts the navigation; anything else means the URL rendered as a page
+                error = navigation.get("errorText")
+                if error is None:
+                    raise CdpError(f"{url} opened as a page instead of downloading")
+                if error != "net::ERR_ABORTED":
+                    raise CdpError(f"{url}: {error}")
+                guid, suggested_name = await self._wait_for_download(events, session.target_id)
+
+            path = os.path.join(folder_name, os.path.basename(filename or suggested_name or guid))
+            os.replace(os.path.join(private_dir, guid), path)
+            return path, os.path.getsize(path)
+        finally:
+            with trio.CancelScope(shield=True):
+                await connection.dispose_context(context_id)
+            shutil.rmtree(private_dir, ignore_errors=True)
+
+    async def _wait_for_download(self, events, frame_id):
+        # The tab's main frame shares its target id, which ties the download to this tab
+        guid = suggested_name = None
+        try:
+            with trio.fail_after(self.timeout):
+                async for method, params, session_id in events:
+                    if method == "Browser.downloadWillBegin":
+                        if params.get("frameId") == frame_id:
+                            guid, suggested_name = params["guid"], params.get("suggestedFilename")
+                    elif guid is not None and params.get("guid") == guid:
+                        if params.get("state") == "completed":
+                            return guid, suggested_name
+                        if params.get("state") == "canceled":
+                            raise CdpError("download was canceled")
+        except trio.TooSlowError:
+            raise CdpError(f"download did not finish within {self.timeout} seconds")
+        raise CdpError("connection to the browser closed")
+
+    def close(self):
+        with self.lock:
+            token, thread = self._token, self._thread
+        if token is not None:
+            try:
+                trio.from_thread.run_sync(self._stopped.set, trio_token=token)
+            except trio.RunFinishedError:
+                pass
+        if thread is not None:
+            thread.join(timeout=10)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
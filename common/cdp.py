@@ -0,0 +1,161 @@
+import itertools
+import json
+import math
+from contextlib import asynccontextmanager
+
+import httpx
+import trio
+from trio_websocket import ConnectionClosed, open_websocket_url
+
+# Full listing pages come back from outerHTML, which trio-websocket's 1 MiB default can't hold
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class CdpError(Exception):
+    pass
+
+
+def browser_ws_url(driver):
+    # Chromedriver starts Chrome with a debugging port; the browser-level
+    # socket lets one connection drive every tab in that Chrome
+    address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+    response = httpx.get(f"http://{address}/json/version", timeout=10)
+    response.raise_for_status()
+    return response.json()["webSocketDebuggerUrl"]
+
+
+class CdpSession:
+    def __init__(self, connection, session_id, target_id):
+        self.connection = connection
+        self.session_id = session_id
+        self.target_id = target_id
+
+    async def send(self, method, params=None, timeout=60):
+        return await self.connection.send(method, params, self.session_id, timeout)
+
+    async def _evaluate(self, expression, timeout):
+        result = await self.send("Runtime.evaluate", {
+            "expression": expression,
+            "returnByValue": True,
+            "awaitPromise": True,
+        }, timeout)
+        if "exceptionDetails" in result:
+            details = result["exceptionDetails"]
+            message = details.get("exception", {}).get("description") or details.get("text")
+            raise CdpError(f"Script failed: {message}")
+        return result["result"].get("value")
+
+    async def execute_script(self, script, *args, timeout=60):
+        # Same contract as Selenium's execute_script, so the scripts in
+        # pagination and common.waits run unchanged in a tab
+        return await self._evaluate(f"(function () {{ {script} }}).apply(null, {json.dumps(list(args))});", timeout)
+
+    async def execute_async_script(self, script, *args, timeout=60):
+        # The script finishes by calling its last argument, as with Selenium
+        return await self._evaluate(
+            f"new Promise(function (done) {{ (function () {{ {script} }}).apply(null, {json.dumps(list(args))}.concat([done])); }});",
+            timeout,
+        )
+
+
+class CdpConnection:
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = []
+        self._closed = False
+
+    async def send(self, method, params=None, session_id=None, timeout=60):
+        if self._closed:
+            raise CdpError(f"{method}: connection to the browser is closed")
+
+        command_id = next(self._ids)
+        message = {"id": command_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+
+        send_channel, receive_channel = trio.open_memory_channel(1)
+        self._pending[command_id] = send_channel
+        try:
+            await self.websocket.send_message(json.dumps(message))
+            with trio.fail_after(timeout):
+                response = await receive_channel.receive()
+        except trio.TooSlowError:
+            raise CdpError(f"{method}: no response within {timeout} seconds")
+        finally:
+            self._pending.pop(command_id, None)
+
+        if "error" in response:
+            raise CdpError(f"{method}: {response['error'].get('message')}")
+        return response.get("result", {})
+
+    @asynccontextmanager
+    async def events(self, *methods):
+        # Yields a channel of (method, params, session_id) for each of these events,
+        # from the browser or any tab, until the block exits
+        send_channel, receive_channel = trio.open_memory_channel(math.inf)
+        listener = (methods, send_channel)
+        self._listeners.append(listener)
+        try:
+            yield receive_channel
+        finally:
+            self._listeners.remove(listener)
+
+    async def _read_responses(self):
+        # Command responses go to their sender, events to whoever listens for them
+        try:
+            while True:
+                message = json.loads(await self.websocket.get_message())
+                if "id" not in message:
+                    for methods, channel in list(self._listeners):
+                        if message.get("method") in methods:
+                            channel.send_nowait((message["method"], message.get("params", {}), message.get("sessionId")))
+                    continue
+                channel = self._pending.get(message.get("id"))
+                if channel is not None:
+                    channel.send_nowait(message)
+        except ConnectionClosed:
+            self._closed = True
+            for channel in list(self._pending.values()):
+                channel.send_nowait({"error": {"message": "connection to the browser closed"}})
+            for methods, channel in list(self._listeners):
+                channel.close()
+
+    async def create_context(self):
+        # A separate cookie jar, so each tab keeps its own session and CSRF token
+        result = await self.send("Target.createBrowserContext", {"disposeOnDetach": True})
+        return result["browserContextId"]
+
+    async def dispose_context(self, context_id):
+        # Closes its tabs and drops its cookies and download settings
+        try:
+            await self.send("Target.disposeBrowserContext", {"browserContextId": context_id}, timeout=10)
+        except CdpError as e:
+            print(f"Error disposing browser context: {e}")
+
+    async def open_tab(self, url="about:blank", context_id=None):
+        params = {"url": url}
+        if context_id:
+            params["browserContextId"] = context_id
+        target_id = (await self.send("Target.createTarget", params))["targetId"]
+        attached = await self.send("Target.attachToTarget", {"targetId": target_id, "flatten": True})
+        return CdpSession(self, attached["sessionId"], target_id)
+
+    async def close_tab(self, session):
+        try:
+            await self.send("Target.closeTarget", {"targetId": session.target_id}, timeout=10)
+        except CdpError as e:
+            print(f"Error closing tab: {e}")
+
+
+@asynccontextmanager
+async def open_cdp(ws_url):
+    async with trio.open_nursery() as nursery:
+        async with open_websocket_url(ws_url, max_message_size=MAX_MESSAGE_SIZE) as websocket:
+            connection = CdpConnection(websocket)
+            nursery.start_soon(connection._read_responses)
+            try:
+                yield connection
+            finally:
+                nursery.cancel_scope.cancel()
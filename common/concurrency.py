@@ -0,0 +1,125 @@
+import time
+import multiprocessing
+from contextlib import contextmanager
+
+from common.metrics import CONCURRENCY_ACTIVE, CONCURRENCY_LIMIT
+
+
+class AdaptiveLimiter:
+    # AIMD limit on concurrent page requests, shared by worker threads or
+    # processes. Every window of finished requests the limit grows by one if
+    # the portal looked healthy and is cut by `decrease` if latency climbed
+    # well above the best seen, too many requests failed or pages came back
+    # empty. Workers past the limit wait in request() until a slot frees up.
+
+    def __init__(self, min_limit=1, max_limit=10, initial=None, window=None, decrease=0.5,
+                 latency_tolerance=2.0, latency_target=None, max_error_rate=0.2, max_empty_rate=0.3,
+                 name="workers"):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.latency_target = latency_target
+        self.max_error_rate = max_error_rate
+        self.max_empty_rate = max_empty_rate
+        self.name = name
+
+        initial = initial if initial is not None else max(min_limit, max_limit // 2)
+        self._condition = multiprocessing.Condition()
+        self._limit = multiprocessing.Value('d', float(initial), lock=False)
+        self._active = multiprocessing.Value('i', 0, lock=False)
+        self._samples = multiprocessing.Value('i', 0, lock=False)
+        self._errors = multiprocessing.Value('i', 0, lock=False)
+        self._empties = multiprocessing.Value('i', 0, lock=False)
+        self._latency_sum = multiprocessing.Value('d', 0.0, lock=False)
+        self._baseline = multiprocessing.Value('d', 0.0, lock=False)
+        self._epoch = multiprocessing.Value('i', 0, lock=False)
+        CONCURRENCY_LIMIT.set_function(lambda: self.limit, limiter=name)
+        CONCURRENCY_ACTIVE.set_function(lambda: self.active, limiter=name)
+
+    @property
+    def limit(self):
+        return int(self._limit.value)
+
+    @property
+    def active(self):
+        return self._active.value
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                "limit": int(self._limit.value),
+                "active": self._active.value,
+                "baseline_latency": self._baseline.value,
+            }
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._active.value < int(self._limit.value), timeout):
+                raise TimeoutError(f"No {self.name} slot became free within {timeout} seconds")
+            self._active.value += 1
+            return self._epoch.value
+
+    def release(self, latency, error=False, empty=False, epoch=None):
+        with self._condition:
+            self._active.value -= 1
+            self._condition.notify_all()
+            # Requests started before the last adjustment describe the old limit, so they don't count
+            if epoch is not None and epoch != self._epoch.value:
+                return
+
+            self._samples.value += 1
+            self._latency_sum.value += latency
+            self._errors.value += int(error)
+            self._empties.value += int(empty)
+
+            window = self.window or max(2 * int(self._limit.value), 4)
+            if self._samples.value >= window:
+                self._adjust()
+
+    def _adjust(self):
+        samples = self._samples.value
+        average_latency = self._latency_sum.value / samples
+        error_rate = self._errors.value / samples
+        empty_rate = self._empties.value / samples
+
+        # The baseline follows the best window seen but is allowed to creep up,
+        # so a portal that is slow for everyone doesn't pin the limit at the floor
+        baseline = self._baseline.value
+        baseline = average_latency if baseline == 0 else min(average_latency, baseline * 1.1)
+        self._baseline.value = baseline
+        target = self.latency_target or baseline * self.latency_tolerance
+
+        old_limit = self._limit.value
+        if error_rate > self.max_error_rate or empty_rate > self.max_empty_rate or average_latency > target:
+            new_limit = max(float(self.min_limit), old_limit * self.decrease)
+        else:
+            new_limit = min(float(self.max_limit), old_limit + 1)
+        self._limit.value = new_limit
+
+        if int(new_limit) != int(old_limit):
+            print(f"Concurrent {self.name}: {int(old_limit)} -> {int(new_limit)} "
+                  f"(latency {average_latency:.2f}s, target {target:.2f}s, "
+                  f"errors {error_rate:.0%}, empty pages {empty_rate:.0%})")
+
+        self._epoch.value += 1
+        self._samples.value = 0
+        self._errors.value = 0
+        self._empties.value = 0
+        self._latency_sum.value = 0.0
+
+    @contextmanager
+    def request(self, timeout=None):
+        # Yields a dict the caller can flag with "error" or "empty"; an
+        # exception escaping the block also counts as an error
+        epoch = self.acquire(timeout)
+        outcome = {"error": False, "empty": False}
+        start_time = time.time()
+        try:
+            yield outcome
+        except BaseException:
+            outcome["error"] = True
+            raise
+        finally:
+            self.release(time.time() - start_time, outcome["error"], outcome["empty"], epoch)
@@ -0,0 +1,144 @@
+import os
+import re
+import time
+import threading
+from urllib.parse import unquote, urlparse
+
+import httpx
+
+from common.metrics import PDFS_DOWNLOADED, PDF_SECONDS, record_error
+
+PDF_MAGIC = b"%PDF-"
+MAX_PDF_BYTES = 200 * 2**20
+CHUNK_SIZE = 64 * 1024
+FILENAME_RE = re.compile(r"""filename\*?=(?:UTF-8'')?["']?([^"';]+)""", re.IGNORECASE)
+
+
+def filename_from_response(response, url):
+    # The name Chrome would have saved it under: Content-Disposition, else the last path segment
+    match = FILENAME_RE.search(response.headers.get("content-disposition", ""))
+    name = unquote(match.group(1)) if match else urlparse(url).path.rstrip("/").split("/")[-1]
+    name = os.path.basename(name.strip()) or "document"
+    return name if name.lower().endswith(".pdf") else name + ".pdf"
+
+
+class DocumentDownloader:
+    # Fetches documents over one pooled HTTP client carrying the crawl
+    # browser's cookies, instead of a Chrome page load per document. Each file
+    # streams to a .part beside its destination and is renamed into place only
+    # once it is a complete PDF. At most `workers` downloads run at once,
+    # whichever threads call download().
+
+    def __init__(self, workers=8, timeout=60, retries=3, max_bytes=MAX_PDF_BYTES, scraper="gem_pdf"):
+        self.retries = retries
+        self.max_bytes = max_bytes
+        self.scraper = scraper
+        self.slots = threading.BoundedSemaphore(workers)
+        self.lock = threading.Lock()
+        self.stats = {"downloaded": 0, "existing": 0, "failed": 0, "bytes": 0}
+        self.session = None
+        self.client = httpx.Client(
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+            headers={"User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0 Safari/537.36"},
+        )
+
+    def use_browser_session(self, driver):
+        # Document links belong to the listing session, so send what the browser sends.
+        # Downloads are running meanwhile: httpx copies the client's cookies and headers
+        # for each request, so swap in new ones, and only when the session changed.
+        cookies = sorted((cookie["name"], cookie["value"], cookie.get("domain", ""), cookie.get("path", "/"))
+                         for cookie in driver.get_cookies())
+        session = (cookies, driver.execute_script("return navigator.userAgent;"))
+        with self.lock:
+            if session == self.session:
+                return
+            jar = httpx.Cookies()
+            for name, value, domain, path in cookies:
+                jar.set(name, value, domain=domain, path=path)
+            headers = httpx.Headers(self.client.headers)
+            headers["User-Agent"] = session[1]
+            self.client.cookies = jar
+            self.client.headers = headers
+            self.session = session
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def download(self, url, folder_name, filename=None):
+        # Returns the saved path, or None when no valid PDF could be fetched
+        last_error = None
+        with self.slots:
+            for attempt in range(self.retries):
+                try:
+                    with PDF_SECONDS.time(scraper=self.scraper):
+                        return self._fetch(url, folder_name, filename)
+                except ValueError as e:
+                    # Not a PDF or too large: fetching it again won't change that
+                    last_error = e
+                    break
+                except httpx.HTTPStatusError as e:
+                    last_error = e
+                    if e.response.status_code < 500 and e.response.status_code != 429:
+                        break
+                except (httpx.HTTPError, OSError) as e:
+                    last_error = e
+                print(f"Attempt {attempt + 1} to download {url} failed: {last_error}")
+                if attempt + 1 < self.retries:
+                    time.sleep(2 ** attempt)
+
+        print(f"Error downloading {url}: {last_error}")
+        record_error(self.scraper, last_error)
+        self._count("failed")
+        return None
+
+    def _fetch(self, url, folder_name, filename):
+        with self.client.stream("GET", url) as response:
+            response.raise_for_status()
+            path = os.path.join(folder_name, filename or filename_from_response(response, url))
+            if os.path.exists(path):
+                self._count("existing")
+                return path
+
+            os.makedirs(folder_name, exist_ok=True)
+            part_path = f"{path}.{threading.get_ident()}.part"
+            # Content-Length is the compressed size when the body is encoded
+            expected = None if response.headers.get("content-encoding") else response.headers.get("content-length")
+            head = b""
+            size = 0
+            try:
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_bytes(CHUNK_SIZE):
+                        if len(head) < len(PDF_MAGIC):
+                            head = (head + chunk)[:len(PDF_MAGIC)]
+                            if len(head) == len(PDF_MAGIC) and head != PDF_MAGIC:
+                                raise ValueError(f"not a PDF, starts with {head!r} ({response.headers.get('content-type')})")
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise ValueError(f"larger than {self.max_bytes} bytes")
+                        f.write(chunk)
+                if head != PDF_MAGIC:
+                    raise ValueError(f"not a PDF, only {size} bytes")
+                if expected is not None and size != int(expected):
+                    raise OSError(f"connection closed after {size} of {expected} bytes")
+                os.replace(part_path, path)
+            except BaseException:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+
+        PDFS_DOWNLOADED.inc(scraper=self.scraper)
+        self._count("downloaded")
+        self._count("bytes", size)
+        return path
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,133 @@
+import queue
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+
+def chromedriver_path():
+    # ChromeDriverManager().install() does a version lookup every call, so do it once per process
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            _chromedriver_path = ChromeDriverManager().install()
+    return _chromedriver_path
+
+
+class DriverPool:
+    def __init__(self, factory, size=4, max_uses=50):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _launch(self):
+        driver = self.factory()
+        with self._lock:
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting driver: {e}")
+
+    def _healthy(self, driver):
+        try:
+            driver.execute_script("return 1;")
+            return bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _reset(self, driver):
+        # Close stray tabs and leave the page blank so the next borrower starts clean
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.get("about:blank")
+
+    def warm(self):
+        # Pre-launch every driver in parallel so the first borrowers don't pay browser startup
+        missing = self.size - self._idle.qsize()
+        if missing <= 0:
+            return
+        with ThreadPoolExecutor(max_workers=missing) as executor:
+            for driver in executor.map(lambda _: self._launch(), range(missing)):
+                self._idle.put(driver)
+
+    def checkout(self, timeout=None):
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No driver became available within {timeout} seconds")
+
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._launch()
+
+                if self._healthy(driver):
+                    return driver
+                print("Discarding unhealthy driver from the pool")
+                self._discard(driver)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def checkin(self, driver, broken=False):
+        try:
+            with self._lock:
+                uses = self._uses.get(id(driver), 0) + 1
+                self._uses[id(driver)] = uses
+
+            if broken or self._closed or uses >= self.max_uses:
+                self._discard(driver)
+                return
+
+            try:
+                self._reset(driver)
+            except Exception as e:
+                print(f"Error resetting driver, discarding it: {e}")
+                self._discard(driver)
+                return
+
+            self._idle.put(driver)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.checkout(timeout)
+        broken = False
+        try:
+            yield driver
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.checkin(driver, broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
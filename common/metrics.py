@@ -0,0 +1,223 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Seconds, spanning a fast XHR up to the two-minute page waits the crawlers allow
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+METRICS_PORT_ENV = "SCRAPER_METRICS_PORT"
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        escaped.append(f'{name}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, (), value) for key, value in sorted(self.values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.functions = {}
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def set_function(self, function, **labels):
+        # Read at scrape time, for values another object already tracks
+        key = self._key(labels)
+        with self.lock:
+            self.functions[key] = function
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+            functions = dict(self.functions)
+        for key, function in functions.items():
+            try:
+                values[key] = function()
+            except Exception as e:
+                print(f"Error reading gauge {self.name}: {e}")
+        return [(self.name, key, (), value) for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                series = self.values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+                    break
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start_time, **labels)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, series in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series["counts"]):
+                    cumulative += count
+                    samples.append((self.name + "_bucket", key, (("le", _format_value(bound)),), cumulative))
+                samples.append((self.name + "_sum", key, (), series["sum"]))
+                samples.append((self.name + "_count", key, (), series["count"]))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            existing = self.metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self.metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+PAGES_FETCHED = REGISTRY.counter("scraper_pages_fetched_total", "Listing pages fetched", ["scraper"])
+PAGE_SECONDS = REGISTRY.histogram("scraper_page_seconds", "Time to fetch and parse one listing page", ["scraper"])
+CARDS_PARSED = REGISTRY.counter("scraper_cards_parsed_total", "Bid or tender entries parsed from listings", ["scraper"])
+PDFS_DOWNLOADED = REGISTRY.counter("scraper_pdfs_downloaded_total", "Documents saved to disk", ["scraper"])
+PDF_SECONDS = REGISTRY.histogram("scraper_pdf_seconds", "Time to fetch or print one document", ["scraper"])
+BYTES_WRITTEN = REGISTRY.counter("scraper_bytes_written_total", "Bytes written to crawl output", ["sink"])
+WAIT_SECONDS = REGISTRY.histogram("scraper_wait_seconds", "Time spent blocked in browser waits", ["wait"])
+DRIVER_STARTUPS = REGISTRY.counter("scraper_driver_startups_total", "Chrome instances launched")
+DRIVER_STARTUP_SECONDS = REGISTRY.histogram("scraper_driver_startup_seconds", "Time to launch Chrome and chromedriver")
+CONCURRENCY_LIMIT = REGISTRY.gauge("scraper_concurrency_limit", "Concurrent requests the adaptive limiter allows", ["limiter"])
+CONCURRENCY_ACTIVE = REGISTRY.gauge("scraper_concurrency_active", "Requests currently holding a limiter slot", ["limiter"])
+SEARCH_CACHE = REGISTRY.counter("scraper_search_cache_total", "Keyword search result cache lookups by outcome", ["result"])
+ERRORS = REGISTRY.counter("scraper_errors_total", "Errors by scraper and exception type", ["scraper", "type"])
+
+
+def record_error(scraper, error):
+    ERRORS.inc(scraper=scraper, type=type(error).__name__)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_metrics(port=None, offset=0, host="127.0.0.1", registry=REGISTRY):
+    # Each process serves its own counters, so worker processes listen on
+    # port + offset. Without a port, or SCRAPER_METRICS_PORT, nothing is served.
+    if port is None:
+        port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    # Processes started from here inherit the port and only pass their offset
+    os.environ[METRICS_PORT_ENV] = str(port)
+
+    handler = type("Handler", (MetricsHandler,), {"registry": registry})
+    try:
+        server = ThreadingHTTPServer((host, int(port) + offset), handler)
+    except OSError as e:
+        print(f"Could not serve metrics on port {int(port) + offset}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
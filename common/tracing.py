@@ -0,0 +1,148 @@
+import os
+import glob
+import json
+import time
+import atexit
+import threading
+import functools
+from contextlib import nullcontext
+
+TRACE_ENV = "SCRAPER_TRACE"
+TRACE_DIR = "traces"
+
+# None while tracing is off, so span() costs one global lookup and returns a shared no-op
+_events = None
+_path = None
+_owner_pid = None
+_NO_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        # Complete ("X") events in microseconds; perf_counter is the system
+        # monotonic clock, so spans from worker processes line up on one timeline
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": self.start / 1000,
+            "dur": (end - self.start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_native_id(),
+        }
+        if self.args or exc_type is not None:
+            event["args"] = dict(self.args)
+            if exc_type is not None:
+                event["args"]["error"] = exc_type.__name__
+        events = _events
+        if events is not None:
+            events.append(event)
+        return False
+
+
+def span(name, **args):
+    if _events is None:
+        return _NO_SPAN
+    return _Span(name, args)
+
+
+def traced(name=None):
+    def decorator(function):
+        span_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _events is None:
+                return function(*args, **kwargs)
+            with _Span(span_name, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_tracing(path=None):
+    # Turned on by --trace or SCRAPER_TRACE; "1" picks a timestamped file under traces/
+    global _events, _path, _owner_pid
+    if path is None:
+        path = os.environ.get(TRACE_ENV)
+    if not path:
+        return None
+    if path in ("1", "true", "yes"):
+        path = os.path.join(TRACE_DIR, f"trace-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    # Processes started from here inherit the path and add their spans to it
+    os.environ[TRACE_ENV] = path
+    _events = []
+    _path = path
+    _owner_pid = os.getpid()
+    atexit.register(finish_tracing)
+    return path
+
+
+def flush_tracing():
+    # Worker processes skip atexit, so they hand their spans to the parent
+    # in a part file that finish_tracing merges
+    if _events is None or os.getpid() == _owner_pid:
+        return
+    pid = os.getpid()
+    own_events = [event for event in _events if event["pid"] == pid]
+    if not own_events:
+        return
+    with open(f"{_path}.{pid}.part", "w", encoding="utf-8") as f:
+        json.dump(own_events, f)
+    _events.clear()
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))]
+
+
+def summarize(events):
+    durations = {}
+    for event in events:
+        durations.setdefault(event["name"], []).append(event["dur"] / 1000)
+
+    print(f"{'span':<36} {'count':>7} {'total s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, values in sorted(durations.items(), key=lambda item: sum(item[1]), reverse=True):
+        print(f"{name:<36} {len(values):>7} {sum(values) / 1000:>9.2f} {percentile(values, 0.5):>9.1f} "
+              f"{percentile(values, 0.9):>9.1f} {percentile(values, 0.99):>9.1f} {max(values):>9.1f}")
+
+
+def finish_tracing():
+    global _events
+    if _events is None:
+        return
+    if os.getpid() != _owner_pid:
+        flush_tracing()
+        return
+
+    events = [event for event in _events if event["pid"] == _owner_pid]
+    for part in glob.glob(glob.escape(_path) + ".*.part"):
+        try:
+            with open(part, encoding="utf-8") as f:
+                events.extend(json.load(f))
+            os.remove(part)
+        except (OSError, ValueError) as e:
+            print(f"Error reading trace part {part}: {e}")
+    _events = None
+
+    if not events:
+        return
+    temp_path = _path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    os.replace(temp_path, _path)
+    print(f"Wrote {len(events)} spans to {_path} (open in ui.perfetto.dev or chrome://tracing)")
+    summarize(events)
@@ -0,0 +1,141 @@
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import JavascriptException, TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from common.metrics import WAIT_SECONDS
+
+# Watches the results container and remembers when it last changed, so the
+# wait can return as soon as the new page is rendered and has gone quiet
+ARM_SCRIPT = """
+var target = (arguments[0] && document.querySelector(arguments[0])) || document.body;
+if (window.__pageChangeObserver) { window.__pageChangeObserver.disconnect(); }
+var state = {armedAt: performance.now(), firstMutation: null, lastMutation: null, mutations: 0};
+var observer = new MutationObserver(function (mutations) {
+    var now = performance.now();
+    if (state.firstMutation === null) { state.firstMutation = now; }
+    state.lastMutation = now;
+    state.mutations += mutations.length;
+});
+observer.observe(target, {childList: true, subtree: true, characterData: true});
+window.__pageChange = state;
+window.__pageChangeObserver = observer;
+"""
+
+WAIT_SCRIPT = """
+var ready = arguments[0], settleMs = arguments[1], noChangeMs = arguments[2], timeoutMs = arguments[3];
+var done = arguments[arguments.length - 1];
+var state = window.__pageChange;
+if (!state) { done({armed: false}); return; }
+
+function finish(changed) {
+    if (window.__pageChangeObserver) { window.__pageChangeObserver.disconnect(); }
+    var now = performance.now();
+    done({
+        armed: true,
+        changed: changed,
+        elapsed: (now - state.armedAt) / 1000,
+        first_mutation: state.firstMutation === null ? null : (state.firstMutation - state.armedAt) / 1000,
+        mutations: state.mutations
+    });
+}
+
+(function poll() {
+    var now = performance.now();
+    var waited = now - state.armedAt;
+    if (state.firstMutation === null) {
+        if (waited >= noChangeMs) { finish(false); return; }
+    } else if (now - state.lastMutation >= settleMs && (!ready || document.querySelector(ready))) {
+        finish(true);
+        return;
+    }
+    if (waited >= timeoutMs) { finish(false); return; }
+    setTimeout(poll, 25);
+})();
+"""
+
+
+class MeteredWait(WebDriverWait):
+    # WebDriverWait that reports how long every until() blocked, by wait name
+    def __init__(self, driver, timeout, name="webdriver", **kwargs):
+        super().__init__(driver, timeout, **kwargs)
+        self.name = name
+
+    def until(self, method, message=""):
+        start_time = time.perf_counter()
+        try:
+            return super().until(method, message)
+        finally:
+            WAIT_SECONDS.observe(time.perf_counter() - start_time, wait=self.name)
+
+
+def arm_page_change(driver, container=None):
+    driver.execute_script(ARM_SCRIPT, container)
+
+
+def document_replaced(driver):
+    # ARM_SCRIPT leaves its state on the window, so a window without it holds a new document
+    try:
+        return not driver.execute_script("return !!window.__pageChange;")
+    except WebDriverException:
+        return False
+
+
+def wait_for_page_change(driver, ready=None, timeout=60, no_change_timeout=10, settle=0.15):
+    # Returns timing for the transition; raises TimeoutException if nothing
+    # changed within no_change_timeout or the page never settled
+    start_time = time.time()
+    try:
+        return _wait_for_page_change(driver, ready, timeout, no_change_timeout, settle, start_time)
+    finally:
+        WAIT_SECONDS.observe(time.time() - start_time, wait="page_change")
+
+
+def _wait_for_page_change(driver, ready, timeout, no_change_timeout, settle, start_time):
+    # The driver is shared, so its script timeout goes back once the wait is over
+    previous_script_timeout = driver.timeouts.script
+    driver.set_script_timeout(timeout + 5)
+    script_error = None
+    try:
+        result = driver.execute_async_script(WAIT_SCRIPT, ready, settle * 1000, no_change_timeout * 1000, timeout * 1000)
+    except (JavascriptException, TimeoutException, WebDriverException) as e:
+        result, script_error = None, e
+    finally:
+        driver.set_script_timeout(previous_script_timeout)
+
+    if script_error is not None and not document_replaced(driver):
+        # The script failed or timed out on the same page; the old cards are
+        # still there, so this must not pass for a page change
+        raise TimeoutException(f"Waiting for the page change failed: {script_error.msg}")
+
+    if result is None or not result.get("armed"):
+        # The click navigated to a new document, which dropped the observer
+        # along with the old page, so fall back to waiting for the new one
+        remaining = max(timeout - (time.time() - start_time), 1)
+        WebDriverWait(driver, remaining).until(
+            lambda d: d.execute_script("return document.readyState") != "loading"
+            and (not ready or d.execute_script("return !!document.querySelector(arguments[0]);", ready))
+        )
+        return {"changed": True, "navigated": True, "elapsed": time.time() - start_time,
+                "first_mutation": None, "mutations": 0}
+
+    if not result["changed"]:
+        if result["first_mutation"] is None:
+            raise TimeoutException(f"Page did not change within {no_change_timeout} seconds")
+        raise TimeoutException(f"Page kept changing or {ready} never appeared within {timeout} seconds")
+
+    result["navigated"] = False
+    return result
+
+
+@contextmanager
+def page_change(driver, container=None, ready=None, timeout=60, no_change_timeout=10, settle=0.15):
+    # Arm before the click and wait after it:
+    #     with page_change(driver, "#bidCard", ".card") as change:
+    #         next_button.click()
+    # change then holds the timing of the transition
+    arm_page_change(driver, container)
+    change = {}
+    yield change
+    change.update(wait_for_page_change(driver, ready, timeout, no_change_timeout, settle))
@@ -8,29 +8,28 @@ import pdfkit
 import shutil
 from PIL import Image
 from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_profile import PRINT_BLOCK, lean_driver
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.waits import MeteredWait
 
 def init_driver():
-    chrome_options = Options()
-    chrome_options.add_experimental_option("prefs", {
+    prefs = {
         "printing.print_preview_sticky_settings.appState": '{"recentDestinations":[{"id":"Save as PDF","origin":"local","account":""}],"selectedDestinationId":"Save as PDF","version":2}',
         "savefile.default_directory": os.path.join(os.getcwd(), "downloaded_pdfs"),  # Set the download directory
         "plugins.always_open_pdf_externally": True,  # Prevent Chrome from opening PDFs in the browser
         "download.default_directory": os.path.join(os.getcwd(), "downloaded_pdfs"),  # Ensure downloads go here
         "download.prompt_for_download": False,  # Don't prompt for download
         "download.directory_upgrade": True  # Allow changing download directory
-    })
-    chrome_options.add_argument("--kiosk-printing")  # Enable kiosk printing mode
-    # chrome_options.add_argument("--headless")  # Uncomment if you want to run in headless mode
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+    }
+    # Pages are printed and the captcha is read from a screenshot, so only media and trackers are blocked
+    return lean_driver(headless=False, block=PRINT_BLOCK, prefs=prefs, page_load_strategy="normal",
+                       arguments=["--kiosk-printing"])  # Enable kiosk printing mode
 
 
 def capture_captcha_image(driver, captcha_img_id, screenshot_path):
@@ -87,18 +86,22 @@ def get_home(driver):
 def scrape_tenders(driver, org_url,save_dir):
     tender_data = []
     while True:
+        page_start_time = time.time()
         driver.get(org_url)
         
-        WebDriverWait(driver, 10).until(
+        MeteredWait(driver, 10, "tender_table").until(
             EC.presence_of_element_located((By.ID, 'table'))
         )
         
         html = driver.page_source
         soup = BeautifulSoup(html, 'html.parser')
         tender_table = soup.find('table', {'id': 'table'})
+        PAGE_SECONDS.observe(time.time() - page_start_time, scraper="epro")
+        PAGES_FETCHED.inc(scraper="epro")
         
         if tender_table:
             rows = tender_table.find_all('tr')
+            CARDS_PARSED.inc(max(len(rows) - 1, 0), scraper="epro")
             for row in rows[1:]:
                 tds = row.find_all('td')
                 if len(tds) >= 6:
@@ -138,6 +141,7 @@ def scrape_tenders(driver, org_url,save_dir):
                 break  
         except Exception as e:
             print(f"Exception while navigating to the next page: {e}")
+            record_error("epro", e)
             break  
     
     return tender_data
@@ -209,10 +213,12 @@ def process_state(driver, base_url,dir, max_retries=3):
             time.sleep(4)  # Allow time for data processing
             return data # Exit the function if successful
         except Exception as e:
+            record_error("epro", e)
             attempt += 1
             time.sleep(3)
 
 def main():
+    serve_metrics()
     driver = init_driver()
     save_dir = os.path.join(os.getcwd(), "downloaded_pdfs")  # Specify download directory
     os.makedirs(save_dir, exist_ok=True)
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import argparse
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from card_parser import BASE_URL
+from common.driver_pool import chromedriver_path
+from common.browser_profile import DEFAULT_BLOCK, lean_driver
+
+# Bytes over the wire for the document and every subresource the page pulled in
+TRANSFER_SCRIPT = """
+var entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+var bytes = 0;
+entries.forEach(function (entry) { bytes += entry.transferSize || 0; });
+return [bytes, entries.length];
+"""
+
+
+def default_driver():
+    # The options every init_driver used before the lean profile
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.page_load_strategy = 'eager'
+    return webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+
+
+def time_loads(driver, url, loads):
+    results = []
+    for _ in range(loads):
+        # Clear the cache so every load pays full transfer, like a fresh worker
+        driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        start_time = time.perf_counter()
+        driver.get(url)
+        WebDriverWait(driver, 120).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".card")))
+        card_time = time.perf_counter() - start_time
+        transferred, requests = driver.execute_script(TRANSFER_SCRIPT)
+        results.append((card_time, transferred, requests))
+    return results
+
+
+def summarize(name, results):
+    card_times = sorted(result[0] for result in results)
+    median_time = card_times[len(card_times) // 2]
+    mean_bytes = sum(result[1] for result in results) / len(results)
+    mean_requests = sum(result[2] for result in results) / len(results)
+    print(f"{name:>8} {median_time:>14.2f} {mean_bytes / 1024:>14.0f} {mean_requests:>10.0f}")
+    return median_time, mean_bytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time to .card and bytes transferred: default vs lean browser profile")
+    parser.add_argument("--url", default=BASE_URL + "/all-bids")
+    parser.add_argument("--loads", type=int, default=5)
+    parser.add_argument("--block", nargs="+", default=list(DEFAULT_BLOCK))
+    args = parser.parse_args()
+
+    profiles = [
+        ("default", default_driver),
+        ("lean", lambda: lean_driver(block=args.block)),
+    ]
+    print(f"{'profile':>8} {'median .card s':>14} {'KiB/load':>14} {'requests':>10}")
+    summaries = {}
+    for name, factory in profiles:
+        driver = factory()
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            summaries[name] = summarize(name, time_loads(driver, args.url, args.loads))
+        finally:
+            driver.quit()
+
+    default_time, default_bytes = summaries["default"]
+    lean_time, lean_bytes = summaries["lean"]
+    print(f"lean profile: {default_time / lean_time:.2f}x faster to .card, "
+          f"{100 * (1 - lean_bytes / default_bytes):.0f}% fewer bytes")
@@ -0,0 +1,114 @@
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_parser import parse_listing
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "html")
+FIXTURES = ["bid_container.html", "after_search_container.html"]
+
+
+def webdriver_extract(driver):
+    # The per-card extraction every GeM scraper used before card_parser
+    from selenium.webdriver.common.by import By
+
+    results = []
+    for card in driver.find_elements(By.CSS_SELECTOR, ".card"):
+        item_detail_elements = card.find_elements(By.CSS_SELECTOR, "div.col-md-4 a[data-content]")
+        item_details = [element.get_attribute("data-content").strip() for element in item_detail_elements]
+        bid_elements = card.find_elements(By.CSS_SELECTOR, ".bid_no_hover")
+        if not bid_elements:
+            continue
+
+        bid_no_element = bid_elements[0]
+        ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
+        results.append({
+            "bid_no": bid_no_element.text.strip(),
+            "bid_link": bid_no_element.get_attribute("href"),
+            "ra_no": ra_no_element.text.strip() if ra_no_element else None,
+            "ra_link": ra_no_element.get_attribute("href") if ra_no_element else None,
+            "items": item_details,
+            "quantity": card.find_element(By.CSS_SELECTOR, "div.col-md-4 div:nth-of-type(2)").text.split(":", 1)[-1].strip(),
+            "department": ", ".join(card.find_element(By.CSS_SELECTOR, "div.col-md-5 div:nth-of-type(2)").text.strip().split("\n")),
+            "start_date": card.find_element(By.CSS_SELECTOR, "div.col-md-3 .start_date").text.strip(),
+            "end_date": card.find_element(By.CSS_SELECTOR, "div.col-md-3 .end_date").text.strip(),
+            "text": card.text.strip(),
+        })
+    return results
+
+
+def count_commands(driver):
+    # Every WebDriver round-trip goes through driver.execute, so wrap it to count them
+    counter = {"commands": 0}
+    original_execute = driver.execute
+
+    def execute(*args, **kwargs):
+        counter["commands"] += 1
+        return original_execute(*args, **kwargs)
+
+    driver.execute = execute
+    return counter
+
+
+def time_it(func, iterations):
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    elapsed_time = time.perf_counter() - start_time
+    return result, elapsed_time / iterations
+
+
+def bench_offline(iterations):
+    for fixture in FIXTURES:
+        with open(os.path.join(FIXTURE_DIR, fixture), encoding="utf-8") as f:
+            page_source = f.read()
+
+        listing, per_page = time_it(lambda: parse_listing(page_source), iterations)
+        print(f"{fixture}: {len(listing['cards'])} cards, lxml parse {per_page * 1000:.3f} ms/page")
+
+
+def bench_browser(iterations):
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    service = Service(ChromeDriverManager().install())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+
+    try:
+        counter = count_commands(driver)
+        for fixture in FIXTURES:
+            driver.get("file://" + os.path.join(FIXTURE_DIR, fixture))
+
+            counter["commands"] = 0
+            before, before_per_page = time_it(lambda: webdriver_extract(driver), iterations)
+            before_commands = counter["commands"] // iterations
+
+            counter["commands"] = 0
+            after, after_per_page = time_it(lambda: parse_listing(driver.page_source, "file://"), iterations)
+            after_commands = counter["commands"] // iterations
+
+            print(f"{fixture}: {len(before)} cards")
+            print(f"  before (WebDriver per card): {before_per_page * 1000:.2f} ms/page, {before_commands} round-trips")
+            print(f"  after  (page_source + lxml): {after_per_page * 1000:.2f} ms/page, {after_commands} round-trips")
+            if after_per_page:
+                print(f"  speedup: {before_per_page / after_per_page:.1f}x")
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-page card extraction cost, WebDriver vs card_parser")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--offline", action="store_true", help="Only time the lxml parser, without a browser")
+    args = parser.parse_args()
+
+    bench_offline(args.iterations * 50)
+    if not args.offline:
+        bench_browser(args.iterations)
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from listing_client import ListingClient
+from standin_server import StandinLatency, start_server
+from common.concurrency import AdaptiveLimiter
+
+
+def crawl(base_url, pages, workers, limiter):
+    # Each worker walks an interleaved slice of the pages through its own session
+    limits = []
+    stop_sampling = threading.Event()
+
+    def sample_limit():
+        while not stop_sampling.wait(0.1):
+            limits.append(limiter.limit)
+
+    def worker(offset):
+        with ListingClient(base_url) as client:
+            for page_num in range(offset + 1, pages + 1, workers):
+                with limiter.request() as outcome:
+                    outcome["empty"] = not client.fetch_page(page_num)["cards"]
+
+    sampler = threading.Thread(target=sample_limit, daemon=True)
+    sampler.start()
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(worker, range(workers)))
+    elapsed_time = time.perf_counter() - start_time
+    stop_sampling.set()
+
+    average_limit = sum(limits) / len(limits) if limits else limiter.limit
+    return elapsed_time, average_limit
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixed vs adaptive concurrency against a stand-in that slows down under load")
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base seconds per listing response")
+    parser.add_argument("--capacity", type=int, default=4, help="Concurrent requests served before slowing down")
+    parser.add_argument("--overload", type=float, default=0.15, help="Extra seconds per request beyond capacity")
+    args = parser.parse_args()
+
+    server, base_url = start_server(pages=args.pages, latency=StandinLatency(args.latency, args.capacity, args.overload))
+    try:
+        modes = [
+            ("fixed", AdaptiveLimiter(args.workers, args.workers, initial=args.workers)),
+            ("adaptive", AdaptiveLimiter(1, args.workers)),
+        ]
+        print(f"{'mode':>10} {'seconds':>9} {'pages/s':>9} {'mean limit':>11}")
+        for mode, limiter in modes:
+            elapsed_time, average_limit = crawl(base_url, args.pages, args.workers, limiter)
+            print(f"{mode:>10} {elapsed_time:>9.2f} {args.pages / elapsed_time:>9.1f} {average_limit:>11.1f}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,235 @@
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from standin_server import StandinFailures, StandinLatency, start_server
+from bench_multitab import child_pids
+from common.metrics import METRICS_PORT_ENV
+from common.tracing import TRACE_ENV
+
+# Every crawler prints the bid number of each card it keeps; counting the
+# distinct ones works the same whatever else a mode writes
+BID_NO_RE = re.compile(r"^\s*Bid No\.?:\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_BYTES = os.sysconf("SC_PAGE_SIZE")
+MODES = ("scrap", "multithread", "multiprocess", "multiprocess-http", "multitab", "searching", "searching-http",
+         "searching-threads")
+
+
+def mode_command(mode, base_url, pages, workers, keyword):
+    python = sys.executable
+    listing_url = base_url + "/all-bids"
+    commands = {
+        "scrap": [python, os.path.join(GEM_DIR, "scrap.py"), "--base-url", base_url],
+        "multithread": [python, os.path.join(GEM_DIR, "multithread.py"), "--base-url", listing_url,
+                        "--threads", str(workers), "--pages", str(pages)],
+        "multiprocess": [python, os.path.join(GEM_DIR, "multiprocess.py"), "--engine", "selenium", "--base-url", base_url,
+                         "--pages", str(pages), "--workers", str(workers), "--output", "scraped_data.jsonl"],
+        "multiprocess-http": [python, os.path.join(GEM_DIR, "multiprocess.py"), "--engine", "http", "--base-url", base_url,
+                              "--pages", str(pages), "--workers", str(workers), "--output", "scraped_data.jsonl"],
+        "multitab": [python, os.path.join(GEM_DIR, "multitab.py"), "--base-url", base_url, "--pages", str(pages),
+                     "--tabs", str(workers), "--output", "scraped_data.jsonl"],
+        "searching": [python, os.path.join(GEM_DIR, "searching.py"), "--url", listing_url, "--keyword", keyword,
+                      "--output", "search.txt"],
+        "searching-http": [python, os.path.join(GEM_DIR, "searching.py"), "--engine", "http", "--workers", str(workers),
+                           "--url", listing_url, "--keyword", keyword, "--output", "search.txt"],
+        "searching-threads": [python, os.path.join(GEM_DIR, "keyword_search", "searching_multithreading.py"),
+                              "--url", listing_url, "--keyword", keyword, "--output", "search.txt"],
+    }
+    return commands[mode]
+
+
+def sample_tree(pid, cpu_ticks):
+    # Summed RSS of the crawl and everything it started (Chrome, chromedriver,
+    # worker processes). CPU is remembered per pid so processes that exit
+    # before the crawl does still count.
+    rss = 0
+    for child in child_pids(pid):
+        try:
+            with open(f"/proc/{child}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        # Fields after the command name start at stat field 3: utime is 14, stime 15, rss 24
+        cpu_ticks[child] = int(fields[11]) + int(fields[12])
+        rss += int(fields[21]) * PAGE_BYTES
+    return rss
+
+
+def kill_tree(process):
+    pids = child_pids(process.pid)
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+def run_mode(mode, command, server, timeout, interval=0.2, keep=False):
+    workdir = tempfile.mkdtemp(prefix=f"bench-{mode}-")
+    log_path = os.path.join(workdir, "stdout.log")
+    env = dict(os.environ)
+    # Serving metrics or tracing would only add to what is being measured
+    env.pop(METRICS_PORT_ENV, None)
+    env.pop(TRACE_ENV, None)
+
+    served_before = server.stats.snapshot()
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu_ticks = {}
+    peak_rss = 0
+    status = "ok"
+
+    start_time = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        process = subprocess.Popen(command, cwd=workdir, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                   env=env, start_new_session=True)
+        while True:
+            peak_rss = max(peak_rss, sample_tree(process.pid, cpu_ticks))
+            try:
+                process.wait(timeout=interval)
+                break
+            except subprocess.TimeoutExpired:
+                if time.perf_counter() - start_time > timeout:
+                    kill_tree(process)
+                    process.wait()
+                    status = "timeout"
+                    break
+    elapsed = time.perf_counter() - start_time
+
+    usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    rusage_cpu = (usage_after.ru_utime + usage_after.ru_stime) - (usage_before.ru_utime + usage_before.ru_stime)
+    cpu_seconds = max(sum(cpu_ticks.values()) / CLOCK_TICKS, rusage_cpu)
+
+    served_after = server.stats.snapshot()
+    served = {name: served_after[name] - served_before[name] for name in served_after}
+
+    with open(log_path, encoding="utf-8", errors="replace") as f:
+        log_text = f.read()
+    cards = len(set(match.upper() for match in BID_NO_RE.findall(log_text)))
+    if status == "ok" and process.returncode != 0:
+        status = "failed"
+
+    result = {
+        "mode": mode,
+        "status": status,
+        "returncode": process.returncode,
+        "elapsed_s": round(elapsed, 3),
+        "pages": served["pages_served"],
+        "cards": cards,
+        "pages_per_s": round(served["pages_served"] / elapsed, 3),
+        "cards_per_s": round(cards / elapsed, 3),
+        "peak_rss_mb": round(peak_rss / 2**20, 1),
+        "cpu_s": round(cpu_seconds, 3),
+        "cpu_percent": round(100 * cpu_seconds / elapsed, 1),
+        "listing_loads": served["listing_loads"],
+        "injected_failures": served["failures"],
+    }
+    if status != "ok":
+        result["log_tail"] = log_text[-2000:]
+
+    if keep:
+        result["workdir"] = workdir
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=GEM_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, tolerance):
+    # A mode regresses when its throughput drops by more than the tolerance
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result["mode"]: result for result in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\n{'mode':<20} {'pages/s':>9} {'baseline':>9} {'change':>8}")
+    for result in results:
+        previous = baseline.get(result["mode"])
+        if previous is None or result["status"] != "ok" or previous["status"] != "ok" or not previous["pages_per_s"]:
+            continue
+        change = result["pages_per_s"] / previous["pages_per_s"] - 1
+        print(f"{result['mode']:<20} {result['pages_per_s']:>9.2f} {previous['pages_per_s']:>9.2f} {change:>+8.1%}")
+        if change < -tolerance:
+            regressions.append(result["mode"])
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run each crawl mode against a local bidplus stand-in and record throughput and resource use")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--pages", type=int, default=30, help="Listing pages the stand-in serves")
+    parser.add_argument("--workers", type=int, default=4, help="Threads, processes or tabs for the parallel modes")
+    parser.add_argument("--keyword", default="defence", help="Search keyword for the searching modes")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every listing response")
+    parser.add_argument("--capacity", type=int, help="Concurrent requests served before responses slow down")
+    parser.add_argument("--overload", type=float, default=0.1)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of listing requests that answer 503")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds before a mode is killed")
+    parser.add_argument("--output", default=f"bench_crawl-{datetime.now():%Y%m%d-%H%M%S}.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare pages/s against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed pages/s drop against --baseline")
+    parser.add_argument("--keep", action="store_true", help="Keep each mode's working directory and log")
+    args = parser.parse_args()
+
+    latency = StandinLatency(args.latency, args.capacity, args.overload)
+    failures = StandinFailures(args.fail_rate, args.seed)
+    server, base_url = start_server(pages=args.pages, latency=latency, failures=failures)
+
+    results = []
+    try:
+        for mode in args.modes:
+            print(f"Running {mode}...")
+            command = mode_command(mode, base_url, args.pages, args.workers, args.keyword)
+            result = run_mode(mode, command, server, args.timeout, keep=args.keep)
+            results.append(result)
+            if result["status"] != "ok":
+                print(f"{mode} {result['status']} (exit code {result['returncode']})")
+    finally:
+        server.shutdown()
+
+    print(f"\n{'mode':<20} {'status':>8} {'seconds':>8} {'pages/s':>8} {'cards/s':>8} {'cards':>6} {'peak MiB':>9} {'CPU %':>7}")
+    for result in results:
+        print(f"{result['mode']:<20} {result['status']:>8} {result['elapsed_s']:>8.1f} {result['pages_per_s']:>8.2f} "
+              f"{result['cards_per_s']:>8.1f} {result['cards']:>6} {result['peak_rss_mb']:>9.0f} {result['cpu_percent']:>7.0f}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "settings": {name: value for name, value in vars(args).items() if name not in ("output", "baseline", "keep")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print(f"pages/s dropped more than {args.tolerance:.0%} for: {', '.join(regressions)}")
+            sys.exit(1)
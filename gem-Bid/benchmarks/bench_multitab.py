@@ -0,0 +1,95 @@
+import os
+import sys
+import argparse
+import trio
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from card_parser import BASE_URL
+from common.browser_profile import lean_driver
+from common.cdp import browser_ws_url, open_cdp
+from multitab import TAB_ARGUMENTS, open_listing_tab
+
+
+def child_pids(pid):
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can hold spaces, so split after its closing paren
+                parent = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(parent, []).append(int(entry))
+
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def tree_pss(driver):
+    # Proportional set size splits shared pages between the Chrome processes
+    # that map them, so the sum doesn't count the browser binary once per renderer
+    total = 0
+    for pid in child_pids(driver.service.process.pid):
+        try:
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return total
+
+
+def measure_drivers(url, pages):
+    drivers = []
+    try:
+        for _ in range(pages):
+            driver = lean_driver()
+            drivers.append(driver)
+            driver.get(url + "/all-bids")
+            WebDriverWait(driver, 120).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".card")))
+        return sum(tree_pss(driver) for driver in drivers)
+    finally:
+        for driver in drivers:
+            driver.quit()
+
+
+def measure_tabs(url, pages, isolate):
+    driver = lean_driver(arguments=TAB_ARGUMENTS)
+
+    async def open_tabs():
+        async with open_cdp(browser_ws_url(driver)) as connection:
+            for _ in range(pages):
+                await open_listing_tab(connection, url, isolate)
+            return tree_pss(driver)
+
+    try:
+        return trio.run(open_tabs)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory per loaded listing page: one Chrome per page vs one tab per page")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--isolate", action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args()
+
+    drivers_bytes = measure_drivers(args.url, args.pages)
+    tabs_bytes = measure_tabs(args.url, args.pages, args.isolate)
+
+    print(f"{'engine':>8} {'total MiB':>10} {'MiB/page':>10}")
+    for name, total in (("drivers", drivers_bytes), ("tabs", tabs_bytes)):
+        print(f"{name:>8} {total / 2**20:>10.0f} {total / 2**20 / args.pages:>10.1f}")
+    print(f"tabs use {drivers_bytes / tabs_bytes:.1f}x less memory per concurrent page")
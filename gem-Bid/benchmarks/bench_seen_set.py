@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from seen_set import SharedSeenSet
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def make_ids(count, offset=0):
+    return [(f"GEM/2024/B/{number}", "") for number in range(offset, offset + count)]
+
+
+def sample_ops(size, operations):
+    # Half the lookups hit existing ids, half are new bids, like a live crawl
+    hits = [(f"GEM/2024/B/{random.randrange(size)}", "") for _ in range(operations // 2)]
+    misses = make_ids(operations - len(hits), offset=size)
+    ops = hits + misses
+    random.shuffle(ops)
+    return ops
+
+
+def bench_manager_list(size, operations):
+    # The original multiprocess.py hot path: a linear scan over IPC under a Manager lock
+    with multiprocessing.Manager() as manager:
+        processed_bids = manager.list(make_ids(size))
+        lock = manager.Lock()
+        ops = sample_ops(size, operations)
+
+        start_time = time.perf_counter()
+        for unique_bid_id in ops:
+            with lock:
+                if unique_bid_id in processed_bids:
+                    continue
+                processed_bids.append(unique_bid_id)
+        return (time.perf_counter() - start_time) / len(ops)
+
+
+def bench_shared_seen_set(size, operations):
+    processed_bids = SharedSeenSet(capacity=size + operations)
+    processed_bids.update(make_ids(size))
+    ops = sample_ops(size, operations)
+
+    start_time = time.perf_counter()
+    for unique_bid_id in ops:
+        processed_bids.add(unique_bid_id)
+    return (time.perf_counter() - start_time) / len(ops)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check-and-insert cost: Manager list vs SharedSeenSet")
+    parser.add_argument("--operations", type=int, default=2000, help="Timed operations per size for SharedSeenSet")
+    parser.add_argument("--list-operations", type=int, default=200, help="Timed operations per size for the Manager list")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'ids':>10} {'Manager list (us/op)':>22} {'SharedSeenSet (us/op)':>22} {'speedup':>9}")
+    for size in args.sizes:
+        list_cost = bench_manager_list(size, args.list_operations)
+        set_cost = bench_shared_seen_set(size, args.operations)
+        print(f"{size:>10} {list_cost * 1e6:>22.1f} {set_cost * 1e6:>22.1f} {list_cost / set_cost:>8.0f}x")
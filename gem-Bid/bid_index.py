@@ -0,0 +1,210 @@
+import re
+import json
+import time
+import sqlite3
+import argparse
+
+INDEX_PATH = "bid_index.db"
+SEARCH_MODES = ("contains", "exact")
+# Columns a query is matched against, like the portal's search box
+INDEXED_FIELDS = ("bid_no", "ra_no", "items", "department", "ministry")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def ministry_of(department):
+    # Cards list the ministry first, then the department: "Ministry of Defence, Department of Military Affairs"
+    if not department:
+        return ""
+    return department.split(",")[0].strip()
+
+
+def match_expression(query, mode="contains"):
+    # Contains: every word must start a word somewhere in the card, in any order.
+    # Exact: the words must appear together in this order within one field.
+    words = WORD_RE.findall(query)
+    if not words:
+        return None
+    if mode == "exact":
+        return '"' + " ".join(words) + '"'
+    return " AND ".join(f'"{word}"*' for word in words)
+
+
+class BidIndex:
+    # SQLite FTS5 over the crawled cards; the bids table keeps the fields and
+    # triggers keep the full-text table in step with every insert or update
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        # WAL lets searches run while a crawl keeps writing
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS bids (
+                row INTEGER PRIMARY KEY,
+                bid_no TEXT NOT NULL,
+                ra_no TEXT NOT NULL DEFAULT '',
+                bid_link TEXT,
+                ra_link TEXT,
+                items TEXT,
+                quantity TEXT,
+                department TEXT,
+                ministry TEXT,
+                start_date TEXT,
+                end_date TEXT,
+                indexed_at REAL,
+                UNIQUE (bid_no, ra_no)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS bids_fts USING fts5(
+                {", ".join(INDEXED_FIELDS)}, content='bids', content_rowid='row'
+            );
+            CREATE TRIGGER IF NOT EXISTS bids_ai AFTER INSERT ON bids BEGIN
+                INSERT INTO bids_fts (rowid, {", ".join(INDEXED_FIELDS)})
+                VALUES (new.row, {", ".join("new." + field for field in INDEXED_FIELDS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS bids_ad AFTER DELETE ON bids BEGIN
+                INSERT INTO bids_fts (bids_fts, rowid, {", ".join(INDEXED_FIELDS)})
+                VALUES ('delete', old.row, {", ".join("old." + field for field in INDEXED_FIELDS)});
+            END;
+            CREATE TRIGGER IF NOT EXISTS bids_au AFTER UPDATE ON bids BEGIN
+                INSERT INTO bids_fts (bids_fts, rowid, {", ".join(INDEXED_FIELDS)})
+                VALUES ('delete', old.row, {", ".join("old." + field for field in INDEXED_FIELDS)});
+                INSERT INTO bids_fts (rowid, {", ".join(INDEXED_FIELDS)})
+                VALUES (new.row, {", ".join("new." + field for field in INDEXED_FIELDS)});
+            END;
+        """)
+        self.connection.commit()
+
+    def add(self, cards):
+        # Cards or BidRecord dicts; a bid seen again is updated in place
+        now = time.time()
+        self.connection.executemany(
+            "INSERT INTO bids (bid_no, ra_no, bid_link, ra_link, items, quantity, department, ministry, start_date, end_date, indexed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (bid_no, ra_no) DO UPDATE SET bid_link = excluded.bid_link, ra_link = excluded.ra_link, "
+            "items = excluded.items, quantity = excluded.quantity, department = excluded.department, "
+            "ministry = excluded.ministry, start_date = excluded.start_date, end_date = excluded.end_date, "
+            "indexed_at = excluded.indexed_at",
+            [
+                (card["bid_no"], card.get("ra_no") or "", card.get("bid_link"), card.get("ra_link"),
+                 ", ".join(card.get("items") or []), card.get("quantity"), card.get("department"),
+                 ministry_of(card.get("department")), card.get("start_date"), card.get("end_date"), now)
+                for card in cards if card.get("bid_no")
+            ],
+        )
+
+    def commit(self):
+        self.connection.commit()
+
+    def last_row(self):
+        return self.connection.execute("SELECT COALESCE(MAX(row), 0) FROM bids").fetchone()[0]
+
+    def delete_after(self, row):
+        self.connection.execute("DELETE FROM bids WHERE row > ?", (row,))
+        self.connection.commit()
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM bids").fetchone()[0]
+
+    def search(self, query, mode="contains", limit=None):
+        expression = match_expression(query, mode)
+        if expression is None:
+            return []
+        # Newest first: FTS5 walks rowids in order and stops at the limit, where
+        # ranking by bm25 would score every match of a common word first
+        sql = ("SELECT bids.* FROM bids_fts JOIN bids ON bids.row = bids_fts.rowid "
+               "WHERE bids_fts MATCH ? ORDER BY bids_fts.rowid DESC")
+        params = [expression]
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def count_matches(self, query, mode="contains"):
+        expression = match_expression(query, mode)
+        if expression is None:
+            return 0
+        return self.connection.execute("SELECT COUNT(*) FROM bids_fts WHERE bids_fts MATCH ?", (expression,)).fetchone()[0]
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+def format_card(card, number):
+    # Same fields and layout BidCardExtractor writes for a keyword search
+    lines = [
+        f"Id: {number}:",
+        "-" * 100,
+        f"  BID NO: {card['bid_no']}",
+        f"  BID NO Link: {card['bid_link']}",
+    ]
+    if card["ra_no"]:
+        lines.append(f"  RA No.: {card['ra_no']}")
+        lines.append(f"  RA No. Link: {card['ra_link']}")
+    lines += [
+        f"  Items: {card['items']}",
+        f"  Quantity: {card['quantity']}",
+        f"  Department Name and Address: {card['department']}",
+        f"  Start Date: {card['start_date']}",
+        f"  End Date: {card['end_date']}",
+        "-" * 100,
+    ]
+    return "\n".join(lines)
+
+
+def import_records(index, path, batch_size=500):
+    # Crawl output in the jsonl or sqlite sink formats
+    added = 0
+    if path.endswith((".db", ".sqlite")):
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        rows = ({**dict(row), "items": json.loads(row["items"] or "[]")} for row in connection.execute("SELECT * FROM bids"))
+    else:
+        connection = None
+        rows = (json.loads(line) for line in open(path, encoding="utf-8") if line.strip())
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            index.add(batch)
+            added += len(batch)
+            batch = []
+    index.add(batch)
+    added += len(batch)
+    index.commit()
+    if connection is not None:
+        connection.close()
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search crawled GeM bids locally instead of through the portal")
+    parser.add_argument("query", nargs="?", help="Keyword to search items, department, ministry and bid numbers for")
+    parser.add_argument("--index", default=INDEX_PATH, help="Index database, filled by crawls run with --format index")
+    parser.add_argument("--exact", action="store_true", help="Exact Search: the words must appear together, in order")
+    parser.add_argument("--limit", type=int, help="Most results to print")
+    parser.add_argument("--import", dest="imports", action="append", default=[], metavar="OUTPUT",
+                        help="Add earlier crawl output (.jsonl or sqlite .db) to the index first; repeatable")
+    args = parser.parse_args()
+    if not args.query and not args.imports:
+        parser.error("Give a query, --import, or both")
+
+    index = BidIndex(args.index)
+    try:
+        for path in args.imports:
+            print(f"Indexed {import_records(index, path)} records from {path}; {index.count()} bids in {args.index}")
+
+        if args.query:
+            mode = "exact" if args.exact else "contains"
+            start_time = time.perf_counter()
+            results = index.search(args.query, mode, args.limit)
+            total_records = index.count_matches(args.query, mode) if args.limit else len(results)
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            print(f"Total Records: {total_records}")
+            for number, card in enumerate(results, start=1):
+                print(format_card(card, number))
+            print(f"Searched {index.count()} bids in {elapsed_ms:.1f} ms")
+    finally:
+        index.close()
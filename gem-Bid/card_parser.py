@@ -0,0 +1,244 @@
+import re
+from urllib.parse import urljoin
+
+from lxml import html as lxml_html
+
+BASE_URL = "https://bidplus.gem.gov.in"
+
+CARD_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' card ')]"
+BID_LINK_XPATH = ".//a[contains(concat(' ', normalize-space(@class), ' '), ' bid_no_hover ')]"
+RECORD_SUMMARY_RE = re.compile(r'Showing (\d+) - (\d+) records of (\d+) records')
+
+# parse_listing done in the page itself: one execute_script returns every card,
+# the record summary and the pager state, instead of a round trip per element
+# or the whole page source. Field for field the same as parse_card; links are
+# resolved against the page, which on the portal is BASE_URL.
+EXTRACT_LISTING_SCRIPT = """
+function clean(text) { return (text || '').replace(/\\u00a0/g, ' ').split(/\\s+/).filter(Boolean).join(' '); }
+function lines(element) {
+    var parts = [''];
+    (function walk(node) {
+        for (var i = 0; i < node.childNodes.length; i++) {
+            var child = node.childNodes[i];
+            if (child.nodeType === 3) { parts[parts.length - 1] += child.nodeValue; }
+            else if (child.nodeType === 1) {
+                if (child.tagName === 'BR') { parts.push(''); }
+                walk(child);
+            }
+        }
+    })(element);
+    return parts.map(clean).filter(Boolean);
+}
+function divs(element, index) {
+    if (!element) { return null; }
+    var found = [];
+    for (var i = 0; i < element.children.length; i++) {
+        if (element.children[i].tagName === 'DIV') { found.push(element.children[i]); }
+    }
+    return found[index] || null;
+}
+function rowValue(row) {
+    if (!row) { return null; }
+    var text = clean(row.textContent), colon = text.indexOf(':');
+    return colon < 0 ? text : text.slice(colon + 1).trim();
+}
+function link(anchor) {
+    return anchor && anchor.getAttribute('href') ? anchor.href : null;
+}
+function text(element) { return element ? clean(element.textContent) : null; }
+
+var cards = [];
+document.querySelectorAll('div.card').forEach(function (card) {
+    var bidLinks = card.querySelectorAll('a.bid_no_hover');
+    if (!bidLinks.length) { return; }
+    var raLink = bidLinks.length > 1 ? bidLinks[1] : null;
+
+    var items = [];
+    card.querySelectorAll('div.col-md-4 a[data-content]').forEach(function (item) {
+        items.push(item.getAttribute('data-content').trim());
+    });
+    if (!items.length) {
+        var itemsRow = divs(card.querySelector('div.col-md-4'), 0);
+        if (itemsRow) { items.push(rowValue(itemsRow)); }
+    }
+
+    var cardLines = [];
+    card.querySelectorAll('div.block_header > p, div.card-body div.row').forEach(function (block) {
+        if (block.tagName === 'DIV' && divs(block, 0)) { return; }
+        cardLines = cardLines.concat(lines(block));
+    });
+
+    var department = divs(card.querySelector('div.col-md-5'), 1);
+    var otherDetails = card.querySelector('[data-bid]');
+    cards.push({
+        bid_id: otherDetails ? otherDetails.getAttribute('data-bid') : null,
+        bid_no: clean(bidLinks[0].textContent),
+        bid_link: link(bidLinks[0]),
+        ra_no: raLink ? clean(raLink.textContent) : null,
+        ra_link: link(raLink),
+        items: items,
+        quantity: rowValue(divs(card.querySelector('div.col-md-4'), 1)),
+        department: department ? lines(department).join(', ') : null,
+        start_date: text(card.querySelector('div.col-md-3 span.start_date')),
+        end_date: text(card.querySelector('div.col-md-3 span.end_date')),
+        text: cardLines.join('\\n')
+    });
+});
+
+var currentPage = null, pageNumbers = [], hasNext = false;
+var pagination = document.getElementById('light-pagination');
+if (pagination) {
+    pagination.querySelectorAll('.current').forEach(function (item) {
+        var number = clean(item.textContent);
+        if (currentPage === null && /^\\d+$/.test(number)) { currentPage = parseInt(number, 10); }
+    });
+    for (var i = 0; i < pagination.children.length; i++) {
+        var item = pagination.children[i], number = clean(item.textContent);
+        if ((item.tagName === 'A' || item.tagName === 'SPAN') && /^\\d+$/.test(number)) { pageNumbers.push(parseInt(number, 10)); }
+        if (item.tagName === 'A' && item.classList.contains('page-link') && item.classList.contains('next')) {
+            hasNext = !item.classList.contains('disabled');
+        }
+    }
+}
+
+return {
+    cards: cards,
+    summary: text(document.querySelector('div.totalRecord span')),
+    current_page: currentPage,
+    last_page: pageNumbers.length ? Math.max.apply(null, pageNumbers) : null,
+    has_next: hasNext
+};
+"""
+
+
+def _has_class(class_name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+
+def _clean(text):
+    # Selenium's .text collapses &nbsp; and runs of whitespace, so do the same here
+    return " ".join(text.replace("\xa0", " ").split())
+
+
+def _lines(element):
+    # Render <br> as a line break the way the browser does for .text
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    lines = [_clean(line) for line in element.text_content().split("\n")]
+    return [line for line in lines if line]
+
+
+def _first(elements):
+    return elements[0] if elements else None
+
+
+def _row_value(row):
+    if row is None:
+        return None
+    return _clean(row.text_content()).split(":", 1)[-1].strip()
+
+
+def get_brief_item_details(card):
+    item_links = card.xpath(f".//div[{_has_class('col-md-4')}]//a[@data-content]")
+    if item_links:
+        return [link.get("data-content").strip() for link in item_links]
+
+    items_row = _first(card.xpath(f".//div[{_has_class('col-md-4')}]/div[1]"))
+    if items_row is None:
+        return []
+    return [_row_value(items_row)]
+
+
+def card_text(card):
+    lines = []
+    for block in card.xpath(f".//div[{_has_class('block_header')}]/p | .//div[{_has_class('card-body')}]//div[{_has_class('row')}][not(div)]"):
+        lines.extend(_lines(block))
+    return "\n".join(lines)
+
+
+def parse_card(card, base_url=BASE_URL):
+    bid_links = card.xpath(BID_LINK_XPATH)
+    if not bid_links:
+        return None
+
+    bid_no_element = bid_links[0]
+    ra_no_element = bid_links[1] if len(bid_links) > 1 else None
+
+    bid_no_href = bid_no_element.get("href")
+    ra_no_href = ra_no_element.get("href") if ra_no_element is not None else None
+
+    quantity_row = _first(card.xpath(f".//div[{_has_class('col-md-4')}]/div[2]"))
+    department_row = _first(card.xpath(f".//div[{_has_class('col-md-5')}]/div[2]"))
+    start_date = _first(card.xpath(f".//div[{_has_class('col-md-3')}]//span[{_has_class('start_date')}]"))
+    end_date = _first(card.xpath(f".//div[{_has_class('col-md-3')}]//span[{_has_class('end_date')}]"))
+    other_details = _first(card.xpath(".//*[@data-bid]"))
+
+    return {
+        "bid_id": other_details.get("data-bid") if other_details is not None else None,
+        "bid_no": _clean(bid_no_element.text_content()),
+        "bid_link": urljoin(base_url, bid_no_href) if bid_no_href else None,
+        "ra_no": _clean(ra_no_element.text_content()) if ra_no_element is not None else None,
+        "ra_link": urljoin(base_url, ra_no_href) if ra_no_href else None,
+        "items": get_brief_item_details(card),
+        "quantity": _row_value(quantity_row),
+        "department": ", ".join(_lines(department_row)) if department_row is not None else None,
+        "start_date": _clean(start_date.text_content()) if start_date is not None else None,
+        "end_date": _clean(end_date.text_content()) if end_date is not None else None,
+        "text": card_text(card),
+    }
+
+
+def parse_cards(page_source, base_url=BASE_URL):
+    return parse_listing(page_source, base_url)["cards"]
+
+
+def parse_listing(page_source, base_url=BASE_URL):
+    document = lxml_html.fromstring(page_source)
+
+    cards = []
+    for card in document.xpath(CARD_XPATH):
+        parsed = parse_card(card, base_url)
+        if parsed is not None:
+            cards.append(parsed)
+
+    total_records = None
+    summary = _first(document.xpath(f"//div[{_has_class('totalRecord')}]//span"))
+    if summary is not None:
+        match = RECORD_SUMMARY_RE.search(_clean(summary.text_content()))
+        if match:
+            total_records = int(match.group(3))
+
+    current_page = None
+    last_page = None
+    has_next = False
+    pagination = _first(document.xpath("//*[@id='light-pagination']"))
+    if pagination is not None:
+        for item in pagination.xpath(f".//*[{_has_class('current')}]"):
+            text = _clean(item.text_content())
+            if text.isdigit():
+                current_page = int(text)
+                break
+
+        page_numbers = [int(_clean(item.text_content())) for item in pagination.xpath("./a | ./span")
+                        if _clean(item.text_content()).isdigit()]
+        if page_numbers:
+            last_page = max(page_numbers)
+
+        next_link = _first(pagination.xpath(f"./a[{_has_class('page-link')} and {_has_class('next')}]"))
+        has_next = next_link is not None and "disabled" not in (next_link.get("class") or "")
+
+    return {
+        "cards": cards,
+        "total_records": total_records,
+        "current_page": current_page,
+        "last_page": last_page,
+        "has_next": has_next,
+    }
+
+
+def extract_listing(driver):
+    # parse_listing for a live Selenium page, in a single WebDriver call
+    listing = driver.execute_script(EXTRACT_LISTING_SCRIPT)
+    match = RECORD_SUMMARY_RE.search(listing.pop("summary") or "")
+    listing["total_records"] = int(match.group(3)) if match else None
+    return listing
@@ -0,0 +1,152 @@
+import os
+import json
+import glob
+import time
+
+CHECKPOINT_DIR = "checkpoints"
+
+
+class ShardCheckpoint:
+    # Progress of one worker's page range. Workers report each finished page
+    # to the sink writer, which records it here only after the page's output
+    # is synced, so a checkpoint's output offset covers every page it lists.
+    # Seen bid ids go to an append-only log beside it, so each save writes
+    # only the pages since the last one.
+
+    def __init__(self, checkpoint_dir, start_page, end_page):
+        self.path = os.path.join(checkpoint_dir, f"shard_{start_page}-{end_page}.json")
+        self.seen_path = os.path.join(checkpoint_dir, f"shard_{start_page}-{end_page}.seen.jsonl")
+        self.start_page = start_page
+        self.end_page = end_page
+        self.next_page = start_page
+        self.next_index = 1
+        self.output_offset = 0
+        self.seen = []
+        self.new_seen = []
+        # Pages given up on after their retries; a done shard with some left is only partly crawled
+        self.skipped = []
+        self.done = False
+
+    def load(self):
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.next_page = state["next_page"]
+        self.next_index = state["next_index"]
+        self.output_offset = state["output_offset"]
+        self.done = state["done"]
+        self.skipped = state.get("skipped", [])
+        # Checkpoints from before the seen log kept the ids in the state itself
+        self.seen = [tuple(bid_id) for bid_id in state.get("seen", [])] + self.load_seen()
+
+    def load_seen(self):
+        # Lines past next_page were logged just before a crash, for pages that
+        # will be crawled again; cut them off so they can't count later
+        seen = []
+        if not os.path.exists(self.seen_path):
+            return seen
+        valid_size = 0
+        with open(self.seen_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["next_page"] > self.next_page:
+                    break
+                seen.extend(tuple(bid_id) for bid_id in entry["seen"])
+                valid_size += len(line)
+        with open(self.seen_path, "r+b") as f:
+            f.truncate(valid_size)
+        return seen
+
+    def save(self):
+        # The log line carries its next_page, so one written before a crash
+        # cut off the state save is ignored on resume
+        if self.new_seen:
+            with open(self.seen_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"next_page": self.next_page, "seen": self.new_seen}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.new_seen = []
+
+        state = {
+            "start_page": self.start_page,
+            "end_page": self.end_page,
+            "next_page": self.next_page,
+            "next_index": self.next_index,
+            "output_offset": self.output_offset,
+            "skipped": self.skipped,
+            "done": self.done,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+
+    def progress(self, next_page, next_index, seen, done=False, skipped=(), retried=()):
+        return {
+            "shard": self.path,
+            "next_page": next_page,
+            "next_index": next_index,
+            "seen": list(seen),
+            "skipped": list(skipped),
+            "retried": list(retried),
+            "done": done,
+        }
+
+    @property
+    def finished(self):
+        return self.done and not self.skipped
+
+    def record_page(self, progress, output_offset):
+        self.next_page = max(self.next_page, progress["next_page"])
+        self.next_index = max(self.next_index, progress["next_index"])
+        self.new_seen.extend(progress["seen"])
+        skipped = set(self.skipped) | set(progress.get("skipped", ()))
+        self.skipped = sorted(skipped - set(progress.get("retried", ())))
+        self.done = self.done or progress["done"]
+        self.output_offset = output_offset
+
+
+def new_checkpoints(checkpoint_dir, ranges, output_offset):
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    # Drop the previous run's shards so a fresh crawl never resumes stale ranges
+    for stale_path in glob.glob(os.path.join(checkpoint_dir, "shard_*.json")) + glob.glob(
+            os.path.join(checkpoint_dir, "shard_*.seen.jsonl")):
+        os.remove(stale_path)
+
+    checkpoints = []
+    for start_page, end_page in ranges:
+        checkpoint = ShardCheckpoint(checkpoint_dir, start_page, end_page)
+        checkpoint.output_offset = output_offset
+        checkpoint.save()
+        checkpoints.append(checkpoint)
+    return checkpoints
+
+
+def load_checkpoints(checkpoint_dir):
+    checkpoints = []
+    for path in sorted(glob.glob(os.path.join(checkpoint_dir, "shard_*.json"))):
+        try:
+            with open(path, encoding="utf-8") as f:
+                state = json.load(f)
+            checkpoint = ShardCheckpoint(checkpoint_dir, state["start_page"], state["end_page"])
+            checkpoint.load()
+            checkpoints.append(checkpoint)
+        except Exception as e:
+            print(f"Error reading checkpoint {path}: {e}")
+    return sorted(checkpoints, key=lambda checkpoint: checkpoint.start_page)
+
+
+def restore_progress(checkpoints, processed_bids):
+    # Anything past the furthest checkpointed offset was being written when
+    # the run died; the sink cuts it off and the owning worker redoes the page
+    for checkpoint in checkpoints:
+        processed_bids.update(checkpoint.seen)
+
+    output_offset = max(checkpoint.output_offset for checkpoint in checkpoints)
+    next_index = max(checkpoint.next_index for checkpoint in checkpoints)
+    return output_offset, next_index
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+from datetime import datetime
+
+STATE_FILE = "crawl_state.json"
+NEWEST_FIRST_SORT = "Bid-Start-Date-Latest"
+CARD_DATE_FORMAT = "%d-%m-%Y %I:%M %p"
+
+
+def bid_key(card):
+    return f"{card['bid_no']}|{card['ra_no'] or ''}"
+
+
+def parse_card_date(value):
+    try:
+        return datetime.strptime(value, CARD_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+class CrawlState:
+    # High-water mark for incremental crawls: the newest bids and start date
+    # seen by the last run. Listings are walked newest-first, so once a run of
+    # cards is already known everything after it was captured before.
+
+    def __init__(self, path=STATE_FILE, stop_after=20, max_known=5000):
+        self.path = path
+        self.stop_after = stop_after
+        self.max_known = max_known
+        self.known_bids = []
+        self.newest_start_date = None
+        self.new_bids = []
+        self.run_start_date = None
+        self.known_run = 0
+        self.load()
+        self._known = set(self.known_bids)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        self.known_bids = state.get("known_bids", [])
+        self.newest_start_date = parse_card_date(state.get("newest_start_date"))
+
+    def is_known(self, card):
+        if bid_key(card) in self._known:
+            return True
+        start_date = parse_card_date(card.get("start_date"))
+        return self.newest_start_date is not None and start_date is not None and start_date < self.newest_start_date
+
+    def observe(self, card):
+        # Returns True once enough consecutive known cards have been seen to stop
+        if self.is_known(card):
+            self.known_run += 1
+        else:
+            self.known_run = 0
+            self.new_bids.append(bid_key(card))
+            start_date = parse_card_date(card.get("start_date"))
+            if start_date is not None and (self.run_start_date is None or start_date > self.run_start_date):
+                self.run_start_date = start_date
+        return self.known_run >= self.stop_after
+
+    def save(self):
+        new_bids = set(self.new_bids)
+        known_bids = self.new_bids + [key for key in self.known_bids if key not in new_bids]
+        newest_start_date = max(filter(None, [self.newest_start_date, self.run_start_date]), default=None)
+        state = {
+            "known_bids": known_bids[:self.max_known],
+            "newest_start_date": newest_start_date.strftime(CARD_DATE_FORMAT) if newest_start_date else None,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+def report_skipped_pages(pages_visited, last_page):
+    if last_page is None:
+        print(f"Incremental crawl stopped after {pages_visited} pages.")
+        return None
+    skipped = max(last_page - pages_visited, 0)
+    print(f"Incremental crawl stopped after {pages_visited} of {last_page} pages, skipped {skipped} pages.")
+    return skipped
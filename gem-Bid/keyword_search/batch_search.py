@@ -0,0 +1,158 @@
+import os
+import re
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+KEYWORD_DIR = os.path.dirname(os.path.abspath(__file__))
+GEM_DIR = os.path.dirname(KEYWORD_DIR)
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from searching import BidCardExtractor
+from bid_registry import LINK_MODES, REGISTRY_DIR, BidRegistry
+from result_cache import CACHE_PATH, DEFAULT_TTL, ResultCache, format_stats
+from common.driver_pool import DriverPool
+from common.browser_profile import lean_driver
+from common.metrics import record_error, serve_metrics
+
+
+def read_keywords(path):
+    # One keyword per line; blank lines and # comments are skipped, repeats run once
+    keywords = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            keyword = line.split("#", 1)[0].strip()
+            if keyword and keyword.lower() not in (seen.lower() for seen in keywords):
+                keywords.append(keyword)
+    return keywords
+
+
+def keyword_slug(keyword):
+    return re.sub(r"[^\w-]+", "_", keyword.strip().lower()).strip("_") or "keyword"
+
+
+def search_keyword(driver_pool, url, keyword, output_dir, registry=None, cache=None):
+    # Same layout as the hand-run searches: <output_dir>/<keyword>/<keyword>.txt,
+    # with documents under <output_dir>/<keyword>/BID and RA
+    slug = keyword_slug(keyword)
+    keyword_dir = os.path.join(output_dir, slug)
+    output_file = os.path.join(keyword_dir, f"{slug}.txt")
+    os.makedirs(keyword_dir, exist_ok=True)
+    result = {"keyword": keyword, "output": output_file, "total_records": None, "saved": 0, "cached": False, "error": None}
+
+    on_card = None
+    if registry is not None:
+        on_card = lambda card: registry.add(card, keyword, keyword_dir)
+
+    start_time = time.time()
+    extractor = BidCardExtractor(None, url, output_file, echo=False, on_card=on_card, cache=cache)
+    try:
+        try:
+            extractor.open_output_file()
+            if extractor.load_cached(keyword):
+                # Fresh result from an earlier run, no browser needed
+                result["cached"] = True
+            else:
+                with driver_pool.driver() as driver:
+                    extractor.borrow_driver(driver)
+                    extractor.open_webpage()
+                    if registry is not None:
+                        registry.use_browser_session(driver)
+                    extractor.search_bid(keyword)
+                    extractor.extract_and_print_cards()
+                extractor.store_cached(keyword)
+            result["saved"] = len(extractor.cards)
+            result["total_records"] = extractor.total_records
+        finally:
+            extractor.close()
+    except Exception as e:
+        print(f"Search for {keyword!r} failed: {e}")
+        record_error("gem_search", e)
+        result["error"] = str(e)
+
+    result["seconds"] = time.time() - start_time
+    if result["error"] is None:
+        source = " from the cache" if result["cached"] else ""
+        print(f"Finished {keyword!r}: {result['saved']} records{source} in {result['seconds']:.1f} seconds")
+    return result
+
+
+def run_batch(keywords, url, output_dir, browsers, registry=None, cache=None):
+    driver_pool = DriverPool(lean_driver, size=min(browsers, len(keywords)))
+    if cache is None:
+        driver_pool.warm()
+    # With a cache, browsers start on first use, so a batch served from it launches
+    # none unless it downloads documents
+    try:
+        if registry is not None:
+            # Keywords served from the cache download documents too, and those need a portal session
+            try:
+                with driver_pool.driver() as driver:
+                    driver.get(url)
+                    registry.use_browser_session(driver)
+            except Exception as e:
+                print(f"Could not pick up a portal session for document downloads: {e}")
+                record_error("gem_search", e)
+        with ThreadPoolExecutor(max_workers=driver_pool.size) as executor:
+            return list(executor.map(lambda keyword: search_keyword(driver_pool, url, keyword, output_dir, registry, cache),
+                                     keywords))
+    finally:
+        driver_pool.close()
+
+
+def print_summary(results, elapsed_time, registry=None, cache=None):
+    print(f"\n{'keyword':<30} {'records':>8} {'saved':>7} {'seconds':>8}  output")
+    for result in results:
+        total = result["total_records"] if result["total_records"] is not None else "-"
+        status = f"failed: {result['error']}" if result["error"] else result["output"]
+        if result["cached"]:
+            status += " (cached)"
+        print(f"{result['keyword']:<30} {total:>8} {result['saved']:>7} {result['seconds']:>8.1f}  {status}")
+    saved = sum(result["saved"] for result in results)
+    print(f"{len(results)} keywords, {saved} records in {elapsed_time:.1f} seconds")
+    if registry is not None:
+        stats = registry.stats
+        print(f"Documents: {stats['downloaded']} downloaded ({stats['bytes_downloaded'] / 2**20:.1f} MiB), "
+              f"{stats['linked']} linked into keyword folders, {stats['bytes_saved'] / 2**20:.1f} MiB not downloaded "
+              f"again, {stats['failed']} failed")
+    if cache is not None:
+        print(format_stats(cache.stats()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a list of GeM keyword searches in parallel browsers")
+    parser.add_argument("keywords_file", help="Text file with one search keyword per line")
+    parser.add_argument("--url", default="https://bidplus.gem.gov.in/all-bids")
+    parser.add_argument("--browsers", type=int, default=4, help="Searches running at once, one browser each")
+    parser.add_argument("--output-dir", default=KEYWORD_DIR,
+                        help="Each keyword's results go to <output-dir>/<keyword>/<keyword>.txt")
+    parser.add_argument("--download", action="store_true",
+                        help="Fetch each bid's documents once into the shared registry and link them into every keyword folder")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    parser.add_argument("--link", choices=LINK_MODES, default="hardlink",
+                        help="How keyword folders reference registry documents; hardlink falls back to the manifest per file")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Result cache database; a keyword searched within --cache-ttl is served from it")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Seconds a cached result stays fresh")
+    parser.add_argument("--no-cache", action="store_true", help="Search the portal for every keyword")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this port (default: $SCRAPER_METRICS_PORT, off if unset)")
+    args = parser.parse_args()
+
+    keywords = read_keywords(args.keywords_file)
+    if not keywords:
+        parser.error(f"No keywords found in {args.keywords_file}")
+
+    serve_metrics(args.metrics_port)
+    registry = BidRegistry(args.registry_dir, args.link) if args.download else None
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_ttl)
+    start_time = time.time()
+    try:
+        results = run_batch(keywords, args.url, args.output_dir, args.browsers, registry, cache)
+        if registry is not None:
+            registry.finish()
+        print_summary(results, time.time() - start_time, registry, cache)
+    finally:
+        if registry is not None:
+            registry.close()
+        if cache is not None:
+            cache.close()
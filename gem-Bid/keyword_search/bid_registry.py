@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from common.downloader import PDF_MAGIC, DocumentDownloader
+from common.metrics import record_error
+
+REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registry")
+LINK_MODES = ("hardlink", "manifest")
+MANIFEST_NAME = "manifest.jsonl"
+
+
+def document_path(number):
+    # "GEM/2024/B/5288384" -> GEM/2024/B/5288384.pdf, the layout keyword folders already use
+    return os.path.join(*[part for part in number.strip().split("/") if part not in ("", ".", "..")]) + ".pdf"
+
+
+def is_pdf(path):
+    # Files saved before downloads were validated can be an HTML error or captcha page
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(PDF_MAGIC)) == PDF_MAGIC
+    except OSError:
+        return False
+
+
+class BidRegistry:
+    # Bids and their documents shared by every keyword search. Each document
+    # is downloaded once into <root>/documents and keyword folders get a
+    # hardlink to it, or a manifest entry where hardlinks aren't possible.
+    # Documents download in the background, so a search keeps its browser
+    # only as long as the listing takes.
+
+    def __init__(self, root=REGISTRY_DIR, link_mode="hardlink", timeout=60, workers=8):
+        self.root = root
+        self.link_mode = link_mode
+        os.makedirs(os.path.join(root, "documents"), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.document_locks = {}
+        self.manifests = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.stats = {"downloaded": 0, "linked": 0, "failed": 0, "bytes_downloaded": 0, "bytes_saved": 0}
+        self.downloader = DocumentDownloader(workers=workers, timeout=timeout, scraper="gem_search")
+        self.connection = sqlite3.connect(os.path.join(root, "registry.db"), timeout=30, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS bids (
+                bid_no TEXT NOT NULL,
+                ra_no TEXT NOT NULL DEFAULT '',
+                data TEXT,
+                first_seen REAL,
+                PRIMARY KEY (bid_no, ra_no)
+            );
+            CREATE TABLE IF NOT EXISTS keyword_bids (
+                keyword TEXT NOT NULL,
+                bid_no TEXT NOT NULL,
+                ra_no TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (keyword, bid_no, ra_no)
+            );
+            CREATE TABLE IF NOT EXISTS documents (
+                number TEXT PRIMARY KEY,
+                url TEXT,
+                path TEXT,
+                bytes INTEGER,
+                fetched_at REAL
+            );
+        """)
+        self.connection.commit()
+
+    def use_browser_session(self, driver):
+        # Document links need the portal session, else they answer with a login or error page
+        self.downloader.use_browser_session(driver)
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.stats[name] += amount
+
+    def _document_lock(self, number):
+        with self.lock:
+            return self.document_locks.setdefault(number, threading.Lock())
+
+    def record_bid(self, card, keyword):
+        key = (card["bid_no"], card["ra_no"] or "")
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO bids (bid_no, ra_no, data, first_seen) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (bid_no, ra_no) DO UPDATE SET data = excluded.data",
+                key + (json.dumps(card, ensure_ascii=False), time.time()),
+            )
+            self.connection.execute("INSERT OR IGNORE INTO keyword_bids (keyword, bid_no, ra_no) VALUES (?, ?, ?)",
+                                    (keyword,) + key)
+            self.connection.commit()
+
+    def fetch_document(self, number, url):
+        stored = os.path.join(self.root, "documents", document_path(number))
+        # Two keyword threads can meet the same bid at once; only one downloads it
+        with self._document_lock(number):
+            if os.path.exists(stored):
+                if is_pdf(stored):
+                    return stored, False
+                print(f"Stored document for {number} is not a PDF, downloading it again")
+                os.remove(stored)
+
+            # Streams through a .part and only keeps a complete PDF within the size limit
+            if self.downloader.download(url, os.path.dirname(stored), os.path.basename(stored)) is None:
+                self._count("failed")
+                return None, False
+
+            size = os.path.getsize(stored)
+            self._count("downloaded")
+            self._count("bytes_downloaded", size)
+            with self.lock:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO documents (number, url, path, bytes, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                    (number, url, os.path.relpath(stored, self.root), size, time.time()),
+                )
+                self.connection.commit()
+            return stored, True
+
+    def link_document(self, stored, keyword_dir, relative_path):
+        target = os.path.join(keyword_dir, relative_path)
+        with self.lock:
+            if relative_path in self.manifest_entries(keyword_dir):
+                return False
+        if os.path.exists(target):
+            if is_pdf(target):
+                return False
+            # A link to a bad copy from before validation; point it at the good one
+            os.remove(target)
+
+        if self.link_mode == "hardlink":
+            try:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.link(stored, target)
+                return True
+            except OSError as e:
+                # Other filesystem, or one without hardlinks: fall back to the manifest
+                print(f"Could not hardlink {relative_path}, adding it to the manifest instead: {e}")
+
+        with self.lock:
+            entries = self.manifest_entries(keyword_dir)
+            if relative_path in entries:
+                return False
+            os.makedirs(keyword_dir, exist_ok=True)
+            with open(os.path.join(keyword_dir, MANIFEST_NAME), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"document": relative_path, "stored": os.path.abspath(stored)}) + "\n")
+            entries.add(relative_path)
+        return True
+
+    def manifest_entries(self, keyword_dir):
+        # Read once per keyword folder and kept up to date in memory; call with self.lock held
+        entries = self.manifests.get(keyword_dir)
+        if entries is None:
+            entries = set()
+            path = os.path.join(keyword_dir, MANIFEST_NAME)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    entries = {json.loads(line)["document"] for line in f if line.strip()}
+            self.manifests[keyword_dir] = entries
+        return entries
+
+    def add(self, card, keyword, keyword_dir):
+        self.record_bid(card, keyword)
+        self.executor.submit(self.store_documents, card, keyword_dir)
+
+    def store_documents(self, card, keyword_dir):
+        try:
+            self._store_documents(card, keyword_dir)
+        except Exception as e:
+            print(f"Error storing documents for {card['bid_no']}: {e}")
+            record_error("gem_search", e)
+            self._count("failed")
+
+    def _store_documents(self, card, keyword_dir):
+        for kind, number, url in (("BID", card["bid_no"], card["bid_link"]), ("RA", card["ra_no"], card["ra_link"])):
+            if not number or not url:
+                continue
+            stored, downloaded = self.fetch_document(number, url)
+            if stored is None:
+                continue
+            if self.link_document(stored, keyword_dir, os.path.join(kind, document_path(number))):
+                self._count("linked")
+                if not downloaded:
+                    # Served from the registry rather than downloaded again
+                    self._count("bytes_saved", os.path.getsize(stored))
+
+    def keywords_for(self, bid_no, ra_no=None):
+        with self.lock:
+            rows = self.connection.execute("SELECT keyword FROM keyword_bids WHERE bid_no = ? AND ra_no = ? ORDER BY keyword",
+                                           (bid_no, ra_no or "")).fetchall()
+        return [row[0] for row in rows]
+
+    def finish(self):
+        # Waits for every queued document
+        self.executor.shutdown(wait=True)
+
+    def close(self):
+        self.finish()
+        self.downloader.close()
+        with self.lock:
+            self.connection.close()
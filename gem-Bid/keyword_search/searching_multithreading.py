@@ -1,24 +1,23 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 import time
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import sys
+
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from card_parser import extract_listing
+from common.browser_profile import lean_driver
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.waits import MeteredWait, page_change
+from pagination import CARD_SELECTOR, NEXT_PAGE_SCRIPT, RESULTS_CONTAINER
 
 class BidCardExtractor:
     def __init__(self, driver_path, url, output_file):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.page_load_strategy = 'eager'
-        service = Service(driver_path)
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+        self.driver = lean_driver(driver_path=driver_path)
         self.url = url
         self.output_file = output_file
         self.record_summary_printed = False
@@ -41,35 +40,6 @@ class BidCardExtractor:
         except Exception as e:
             self._print_and_write(f"An error occurred during the search: {e}")
 
-    def get_brief_item_details(self, card):
-        try:
-            item_detail_elements = card.find_elements(By.CSS_SELECTOR, "div.col-md-4 a[data-content]")
-            if item_detail_elements:
-                return [element.get_attribute("data-content").strip() for element in item_detail_elements]
-            else:
-                item_text = card.find_element(By.CSS_SELECTOR, "div.col-md-4 div:nth-of-type(1)").text.strip()
-                return [item_text]
-        except Exception as e:
-            self._print_and_write(f"Error occurred while getting brief item details: {e}")
-            return []
-
-    def extract_record_summary(self):
-        try:
-            summary_element = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".totalRecord span"))
-            )
-            summary_text = summary_element.text
-            match = re.search(r'of (\d+) records', summary_text)
-            if match:
-                self.total_records = int(match.group(1))
-                return self.total_records
-            else:
-                self._print_and_write("Could not extract the total number of records.")
-                return None
-        except Exception as e:
-            self._print_and_write(f"An error occurred while extracting the record summary: {e}")
-            return None
-
     def open_output_file(self):
         self.file = open(self.output_file, 'w', encoding='utf-8')
 
@@ -84,81 +54,56 @@ class BidCardExtractor:
 
     def process_card(self, card, current_card_number):
         try:
-            item_details = self.get_brief_item_details(card)
-            bid_elements = card.find_elements(By.CSS_SELECTOR, "p.bid_no.pull-left a.bid_no_hover")
-
-            if not bid_elements:
-                return
-
-            bid_no_element = bid_elements[0]
-            ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
-
-            bid_no_text = bid_no_element.text.strip()
-            bid_no_href = bid_no_element.get_attribute("href")
-
-            ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-            ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
-
-            quantity_element = card.find_element(By.CSS_SELECTOR, "div.col-md-4 div:nth-of-type(2)")
-            quantity = quantity_element.text.split(":", 1)[-1].strip()
-
-            department_element = card.find_element(By.CSS_SELECTOR, "div.col-md-5 div:nth-of-type(2)")
-            department_lines = department_element.text.strip().split("\n")
-            department = ", ".join(department_lines)
-
-            start_date_element = card.find_element(By.CSS_SELECTOR, "div.col-md-3 .start_date")
-            start_date = start_date_element.text.strip()
-
-            end_date_element = card.find_element(By.CSS_SELECTOR, "div.col-md-3 .end_date")
-            end_date = end_date_element.text.strip()
-
             card_data = [
                 f"Id: {current_card_number}:",
                 "-" * 100,
-                f"  BID NO: {bid_no_text}",
-                f"  BID NO Link: {bid_no_href}",
-                f"  RA No.: {ra_no_text}" if ra_no_text else "",
-                f"  RA No. Link: {ra_no_href}" if ra_no_href else "",
-                f"  Items: {', '.join(item_details)}",
-                f"  Quantity: {quantity}",
-                f"  Department Name and Address: {department}",
-                f"  Start Date: {start_date}",
-                f"  End Date: {end_date}",
+                f"  BID NO: {card['bid_no']}",
+                f"  BID NO Link: {card['bid_link']}",
+                f"  RA No.: {card['ra_no']}" if card["ra_no"] else "",
+                f"  RA No. Link: {card['ra_link']}" if card["ra_link"] else "",
+                f"  Items: {', '.join(card['items'])}",
+                f"  Quantity: {card['quantity']}",
+                f"  Department Name and Address: {card['department']}",
+                f"  Start Date: {card['start_date']}",
+                f"  End Date: {card['end_date']}",
                 "-" * 100
             ]
             return "\n".join(filter(None, card_data))
         except Exception as card_error:
             return f"  Error extracting data for card {current_card_number}: {card_error}"
 
+    def extract_page(self, timeout=5):
+        def cards_rendered(driver):
+            listing = extract_listing(driver)
+            return listing if listing["cards"] else False
+        return MeteredWait(self.driver, timeout, "cards").until(cards_rendered)
+
     def extract_and_print_cards(self):
         total_card_count = 0
         processed_card_count = 0
 
         while True:
             try:
+                page_start_time = time.time()
+                # One script call per page; formatting runs here, off the driver
+                listing = self.extract_page()
+
                 if not self.record_summary_printed:
-                    record_summary = self.extract_record_summary()
-                    if record_summary is not None:
-                        self._print_and_write(f"Total Records: {record_summary}")
+                    if listing["total_records"] is not None:
+                        self.total_records = listing["total_records"]
+                        self._print_and_write(f"Total Records: {self.total_records}")
                         self.record_summary_printed = True
+                    else:
+                        self._print_and_write("Could not extract the total number of records.")
 
-                cards = WebDriverWait(self.driver, 5).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                )
-
-                if not cards:
-                    self._print_and_write("No cards found on this page.")
-                    break
-
-                page_card_count = len(cards)
+                PAGE_SECONDS.observe(time.time() - page_start_time, scraper="gem_search")
+                PAGES_FETCHED.inc(scraper="gem_search")
+                CARDS_PARSED.inc(len(listing["cards"]), scraper="gem_search")
+                page_card_count = len(listing["cards"])
                 start_card_number = total_card_count + 1
 
-                # Use ThreadPoolExecutor to process cards concurrently
-                with ThreadPoolExecutor(max_workers=10) as executor:
-                    future_to_card = {executor.submit(self.process_card, card, start_card_number + index): card for index, card in enumerate(cards)}
-                    for future in as_completed(future_to_card):
-                        card_output = future.result()
-                        self._print_and_write(card_output)
+                for index, card in enumerate(listing["cards"]):
+                    self._print_and_write(self.process_card(card, start_card_number + index))
 
                 processed_card_count += page_card_count
 
@@ -169,26 +114,22 @@ class BidCardExtractor:
                 total_card_count += page_card_count
 
                 try:
-                    next_button = WebDriverWait(self.driver, 5).until(
-                        EC.element_to_be_clickable((By.CSS_SELECTOR, "a.page-link.next"))
-                    )
-
-                    if "disabled" in next_button.get_attribute("class"):
+                    if not listing["has_next"]:
                         self._print_and_write("No more pages.")
                         break
 
-                    next_button.click()
-                    # Wait until new cards are loaded
-                    WebDriverWait(self.driver, 10).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                    )
+                    # Wait until the new cards have replaced the old ones
+                    with page_change(self.driver, RESULTS_CONTAINER, CARD_SELECTOR, timeout=10):
+                        self.driver.execute_script(NEXT_PAGE_SCRIPT)
 
                 except Exception as nav_error:
                     self._print_and_write(f"Error navigating to the next page: {nav_error}")
+                    record_error("gem_search", nav_error)
                     break
 
             except Exception as e:
                 self._print_and_write(f"An error occurred while extracting cards: {e}")
+                record_error("gem_search", e)
 
         if self.total_records is not None and processed_card_count < self.total_records:
             self._print_and_write("Extraction completed, but not all records were processed.")
@@ -198,13 +139,18 @@ class BidCardExtractor:
         self.close_output_file()
 
 if __name__ == "__main__":
-    url = "https://bidplus.gem.gov.in/all-bids"  # Update with the actual URL
+    parser = argparse.ArgumentParser(description="Search the GeM all-bids listing for a keyword and save every matching card")
+    parser.add_argument("--url", default="https://bidplus.gem.gov.in/all-bids")
+    parser.add_argument("--keyword", help="Search keyword, asked for when omitted")
+    parser.add_argument("--output", default="output/demo.txt")
+    args = parser.parse_args()
+
     driver_path = ChromeDriverManager().install()
-    output_file = "output/demo.txt"  # Path to the output file
-    extractor = BidCardExtractor(driver_path, url, output_file)
+    serve_metrics()
+    extractor = BidCardExtractor(driver_path, args.url, args.output)
     
     try:
-        search_keyword = input("Enter the search keyword: ").strip()  # Get user input
+        search_keyword = args.keyword if args.keyword is not None else input("Enter the search keyword: ").strip()  # Get user input
         start_time = time.time()
         extractor.open_webpage()
         extractor.search_bid(search_keyword)
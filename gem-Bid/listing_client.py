@@ -0,0 +1,186 @@
+import json
+import math
+import re
+import time
+from datetime import datetime
+
+import httpx
+
+from card_parser import BASE_URL, parse_listing
+
+LISTING_PATH = "/all-bids"
+LISTING_DATA_PATH = "/all-bids-data"
+CSRF_FIELD = "csrf_bd_gem_nk"
+CSRF_COOKIE = "csrf_gem_cookie"
+PAGE_SIZE = 10
+# The sidebar's end-date pickers fill byEndDate in the same day-first format the cards use
+FILTER_DATE_FORMAT = "%d-%m-%Y"
+
+CSRF_INPUT_RE = re.compile(r'name=["\']' + CSRF_FIELD + r'["\'][^>]*value=["\']([^"\']+)["\']')
+CSRF_META_RE = re.compile(r'<meta[^>]*name=["\']csrf-token["\'][^>]*content=["\']([^"\']+)["\']')
+
+DEFAULT_FILTER = {
+    "bidStatusType": "ongoing_bids",
+    "byType": "all",
+    "highBidValue": "",
+    "byEndDate": {"from": "", "to": ""},
+    "sort": "Bid-End-Date-Oldest",
+}
+
+
+def extract_csrf_token(page_source):
+    for pattern in (CSRF_INPUT_RE, CSRF_META_RE):
+        match = pattern.search(page_source)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _first_value(doc, key):
+    value = doc.get(key)
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _format_date(value):
+    # The listing XHR returns ISO timestamps; cards show "14-08-2024 5:37 PM"
+    if not value:
+        return None
+    try:
+        parsed = datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return value
+    return f"{parsed:%d-%m-%Y} {parsed.hour % 12 or 12}:{parsed:%M %p}"
+
+
+def card_from_doc(doc, base_url=BASE_URL):
+    bid_id = _first_value(doc, "b_id")
+    bid_no = _first_value(doc, "b_bid_number")
+    parent_bid_no = _first_value(doc, "b_bid_number_parent")
+    parent_bid_id = _first_value(doc, "b_id_parent")
+    department = [_first_value(doc, "ba_official_details_minName"), _first_value(doc, "ba_official_details_deptName")]
+
+    card = {
+        "bid_id": str(bid_id) if bid_id is not None else None,
+        "bid_no": bid_no,
+        "bid_link": f"{base_url}/showbidDocument/{bid_id}" if bid_id is not None else None,
+        "ra_no": None,
+        "ra_link": None,
+        "items": [_first_value(doc, "b_category_name")] if doc.get("b_category_name") else [],
+        "quantity": str(_first_value(doc, "b_total_quantity")) if doc.get("b_total_quantity") else None,
+        "department": ", ".join(part for part in department if part),
+        "start_date": _format_date(_first_value(doc, "final_start_date_sort")),
+        "end_date": _format_date(_first_value(doc, "final_end_date_sort")),
+    }
+
+    # Bid-to-RA documents carry the originating bid as their parent
+    if parent_bid_no:
+        card.update({
+            "bid_id": str(parent_bid_id) if parent_bid_id is not None else card["bid_id"],
+            "bid_no": parent_bid_no,
+            "bid_link": f"{base_url}/showbidDocument/{parent_bid_id}" if parent_bid_id is not None else None,
+            "ra_no": bid_no,
+            "ra_link": f"{base_url}/showradocumentPdf/{bid_id}" if bid_id is not None else None,
+        })
+
+    card["text"] = "\n".join(filter(None, [
+        f"BID NO: {card['bid_no']}",
+        f"RA NO: {card['ra_no']}" if card["ra_no"] else None,
+        f"Items: {', '.join(card['items'])}",
+        f"Quantity: {card['quantity']}",
+        f"Department Name And Address: {card['department']}",
+        f"Start Date: {card['start_date']}",
+        f"End Date: {card['end_date']}",
+    ]))
+    return card
+
+
+def parse_listing_response(response, page_num, base_url=BASE_URL):
+    if "json" not in response.headers.get("content-type", ""):
+        return parse_listing(response.text, base_url)
+
+    body = response.json().get("response", {}).get("response", {})
+    total_records = body.get("numFound")
+    last_page = math.ceil(total_records / PAGE_SIZE) if total_records is not None else None
+    return {
+        "cards": [card_from_doc(doc, base_url) for doc in body.get("docs", [])],
+        "total_records": total_records,
+        "current_page": page_num,
+        "last_page": last_page,
+        "has_next": last_page is not None and page_num < last_page,
+    }
+
+
+class ListingClient:
+    def __init__(self, base_url=BASE_URL, timeout=60, retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.csrf_token = None
+        self.client = httpx.Client(
+            base_url=self.base_url,
+            timeout=timeout,
+            follow_redirects=True,
+            headers={
+                "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0 Safari/537.36",
+                "X-Requested-With": "XMLHttpRequest",
+            },
+        )
+
+    def start_session(self):
+        # Loading the listing page sets the session cookie and embeds the CSRF token
+        response = self.client.get(LISTING_PATH)
+        response.raise_for_status()
+        self.csrf_token = extract_csrf_token(response.text) or self.client.cookies.get(CSRF_COOKIE)
+        if self.csrf_token is None:
+            print("CSRF token not found on the listing page, continuing without it.")
+        return self.csrf_token
+
+    def fetch_page(self, page_num, search_keyword="", search_type="fullText", filters=None):
+        if self.csrf_token is None:
+            self.start_session()
+
+        payload = {
+            "page": page_num,
+            "param": {"searchBid": search_keyword, "searchType": search_type},
+            "filter": {**DEFAULT_FILTER, **(filters or {})},
+        }
+
+        last_error = None
+        for attempt in range(self.retries):
+            try:
+                response = self.client.post(
+                    LISTING_DATA_PATH,
+                    data={"payload": json.dumps(payload), CSRF_FIELD: self.csrf_token or ""},
+                    headers={"Referer": self.base_url + LISTING_PATH},
+                )
+                if response.status_code in (403, 419):
+                    # Session or token expired, so pick up a fresh pair before the retry
+                    last_error = httpx.HTTPStatusError(f"session refused with HTTP {response.status_code}",
+                                                       request=response.request, response=response)
+                    self.start_session()
+                else:
+                    response.raise_for_status()
+                    return parse_listing_response(response, page_num, self.base_url)
+            except httpx.HTTPStatusError as e:
+                last_error = e
+                status = e.response.status_code
+                if 400 <= status < 500 and status not in (403, 419, 429):
+                    # A bad request or missing page won't change on a retry
+                    raise
+            except httpx.HTTPError as e:
+                last_error = e
+            print(f"Attempt {attempt + 1} to fetch page {page_num} failed: {last_error}")
+            if attempt + 1 < self.retries:
+                time.sleep(2 ** attempt)
+
+        raise RuntimeError(f"Failed to fetch page {page_num} after {self.retries} attempts: {last_error}")
+
+    def close(self):
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,195 +1,474 @@
 import traceback
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 import multiprocessing
 import math
+import argparse
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_parser import BASE_URL, parse_listing
+from listing_client import ListingClient, PAGE_SIZE
+from crawl_state import CrawlState, NEWEST_FIRST_SORT, STATE_FILE, report_skipped_pages
+from seen_set import SharedSeenSet
+from checkpoint import CHECKPOINT_DIR, new_checkpoints, load_checkpoints, restore_progress
+from sinks import SINK_FORMATS, BidRecord, SinkWriter, emit, sink_position
+from partition import SLICE_PAGES, assign_slices, plan_slices
+from common.browser_profile import lean_driver
+from pagination import click_next, go_to_page, sort_listing
+from common.concurrency import AdaptiveLimiter
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.tracing import flush_tracing, span, start_tracing
+from common.waits import MeteredWait
 
 def init_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('start-maximized')
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])    
-    chrome_options.page_load_strategy = 'eager'
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-def get_brief_item_details(card):
-    try:
-        item_detail_elements = card.find_elements(By.CSS_SELECTOR, "div.col-md-4 a[data-content]")
-        item_details = [element.get_attribute("data-content").strip() for element in item_detail_elements]
-        return item_details
-
-    except Exception as e:
-        print(f"Error occurred while getting brief item details: {e}")
-        return []
-def get_current_page_number(driver):
-    try:
-        wait = WebDriverWait(driver, 120)
-        pagination = wait.until(
-            EC.presence_of_element_located((By.ID, "light-pagination"))
-        )
-        page_numbers = pagination.find_elements(By.CSS_SELECTOR, '.current')
-        
-        for item in page_numbers:
-            page_number_text = item.text.strip()
-            if page_number_text.isdigit():  
-                return int(page_number_text)
-
-        print("Current page number not found or is not a digit.")
-        return None
-
-    except Exception as e:
-        print(f"Error occurred while getting current page number: {e}")
-        return None
+    return lean_driver()
 
 def reload_cards(driver):
     driver.execute_script("window.scrollTo(0, 0);")  # Scroll to the top
     driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")  # Scroll to the bottom
 
-def process_pages(start_page, end_page, processed_bids, index_manager, lock, output_file):
+def build_records(cards, current_page_number, processed_bids, index_manager):
+    PAGES_FETCHED.inc(scraper="gem")
+    CARDS_PARSED.inc(len(cards), scraper="gem")
+    records = []
+    for card in cards:
+        try:
+            unique_bid_id = (card["bid_no"], card["ra_no"] if card["ra_no"] else "")
+
+            if not processed_bids.add(unique_bid_id):
+                continue
+
+            with index_manager.get_lock():
+                card_index = index_manager.value
+                index_manager.value += 1
+
+            record = BidRecord.from_card(card, current_page_number, card_index)
+            print(record.to_text())
+            records.append(record)
+
+        except Exception as card_error:
+            print(f"Error processing card: {card_error}")
+            record_error("gem", card_error)
+            continue
+
+    return records
+
+def emit_page(sink_queue, records, checkpoint, next_page, index_manager, retried=()):
+    progress = None
+    if checkpoint is not None:
+        progress = checkpoint.progress(next_page, index_manager.value, [record.key for record in records], retried=retried)
+    emit(sink_queue, records, progress)
+
+def emit_skipped(sink_queue, checkpoint, page_num, index_manager):
+    # The shard moves past the page, but the checkpoint keeps it for --resume to try again
+    if checkpoint is not None:
+        emit(sink_queue, [], checkpoint.progress(page_num + 1, index_manager.value, [], skipped=[page_num]))
+
+def report_shard_throughput(start_page, end_page, pages_done, cards_done, elapsed_time):
+    pages_per_second = pages_done / elapsed_time if elapsed_time else 0
+    cards_per_second = cards_done / elapsed_time if elapsed_time else 0
+    print(f"Shard {start_page}-{end_page}: {pages_done} pages, {cards_done} cards in {elapsed_time:.2f} seconds "
+          f"({pages_per_second:.2f} pages/s, {cards_per_second:.2f} cards/s)")
+
+def process_pages_http(start_page, end_page, processed_bids, index_manager, sink_queue, limiter, base_url, checkpoint=None):
+    shard_start_time = time.time()
+    pages_done = 0
+    cards_done = 0
+    with ListingClient(base_url) as client:
+        for page_num in range(start_page, end_page + 1):
+            with limiter.request() as outcome:
+                try:
+                    with PAGE_SECONDS.time(scraper="gem"), span("fetch_page", page=page_num):
+                        listing = client.fetch_page(page_num)
+                except Exception as fetch_error:
+                    print(f"Error fetching page {page_num}: {fetch_error}")
+                    record_error("gem", fetch_error)
+                    outcome["error"] = True
+                    emit_skipped(sink_queue, checkpoint, page_num, index_manager)
+                    continue
+                outcome["empty"] = not listing["cards"]
+
+            if not listing["cards"]:
+                print(f"No cards found on page {page_num}")
+                continue
+
+            records = build_records(listing["cards"], listing["current_page"] or page_num, processed_bids, index_manager)
+            emit_page(sink_queue, records, checkpoint, page_num + 1, index_manager)
+            cards_done += len(records)
+            pages_done += 1
+
+    if checkpoint is not None:
+        emit(sink_queue, [], checkpoint.progress(end_page + 1, index_manager.value, [], done=True))
+    report_shard_throughput(start_page, end_page, pages_done, cards_done, time.time() - shard_start_time)
+
+def process_pages(start_page, end_page, processed_bids, index_manager, sink_queue, limiter, engine="selenium", base_url=BASE_URL, checkpoint=None):
+    if engine == "http":
+        process_pages_http(start_page, end_page, processed_bids, index_manager, sink_queue, limiter, base_url, checkpoint)
+        return
+
     driver = init_driver()
+    shard_start_time = time.time()
+    pages_done = 0
+    cards_done = 0
+    completed = False
     try:
-        for page_num in range(start_page, end_page + 1):
-            driver.get(f"https://bidplus.gem.gov.in/all-bids")
-            wait = WebDriverWait(driver, 120)
-            retry_count = 0
+        with span("driver.get"):
+            driver.get(base_url + "/all-bids")
+        if not go_to_page(driver, start_page):
+            print(f"Failed to jump to start page {start_page}")
+            return
 
-            current_page_number = get_current_page_number(driver)
-            if current_page_number is None:
-                print(f"Failed to get page number for page {page_num}")
-                continue
+        page_num = start_page
+        retry_count = 0
 
-            while True:
+        while page_num <= end_page:
+            with limiter.request() as outcome:
                 try:
-                    cards = WebDriverWait(driver, 120).until(
+                    page_start_time = time.time()
+                    cards = MeteredWait(driver, 120, "cards").until(
                         EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
                     )
                     if not cards:
                         print(f"No cards found on page {page_num}")
+                        outcome["empty"] = True
                         reload_cards(driver)
                         retry_count += 1
                         if retry_count >= 3:
-                            print(f"Skipped multiple pages due to loading errors on page {page_num}.")
+                            print(f"Skipped page {page_num} due to loading errors.")
                             break
                         continue
-                    
-                    retry_count = 0
-                    
-                    for card in cards:
-                        try:
-                            item_details = get_brief_item_details(card)
-                            bid_elements = card.find_elements(By.CSS_SELECTOR, ".bid_no_hover")
-
-                            if not bid_elements:
-                                continue
-
-                            bid_no_element = bid_elements[0]
-                            ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
-
-                            bid_no_text = bid_no_element.text.strip()
-                            bid_no_href = bid_no_element.get_attribute("href")
-
-                            ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-                            ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
 
-                            unique_bid_id = (bid_no_text, ra_no_text if ra_no_text else "")
-
-                            with lock:
-                                if unique_bid_id in processed_bids:
-                                    continue
-
-                                processed_bids.append(unique_bid_id)
-                                card_index = index_manager.value
-                                index_manager.value += 1
+                    retry_count = 0
 
-                            output = (
-                                f"Page: {current_page_number}\n"  
-                                f"Id: {card_index}\n"
-                                f"{card.text.strip()}\n"
-                                f"Bid No.: {bid_no_text} Link: {bid_no_href}\n"
-                                f"Item Details: {', '.join(item_details)}\n"
-                            )
+                    with span("extract_cards"):
+                        listing = parse_listing(driver.page_source)
+                    PAGE_SECONDS.observe(time.time() - page_start_time, scraper="gem")
+                    outcome["empty"] = not listing["cards"]
+                    current_page_number = listing["current_page"] or page_num
+                    records = build_records(listing["cards"], current_page_number, processed_bids, index_manager)
+                    emit_page(sink_queue, records, checkpoint, page_num + 1, index_manager)
+                    cards_done += len(records)
+                    pages_done += 1
+
+                    if page_num == end_page:
+                        completed = True
+                        break
+                    if not listing["has_next"]:
+                        print("No more pages.")
+                        completed = True
+                        break
 
-                            if ra_no_text:
-                                output += f"RA No.: {ra_no_text} Link: {ra_no_href}\n"
+                    click_next(driver)
+                    page_num += 1
 
-                            output += "-" * 100 + "\n"
+                except Exception as load_error:
+                    print(f"Error loading cards on page {page_num}: {load_error}")
+                    record_error("gem", load_error)
+                    outcome["error"] = True
+                    retry_count += 1
+                    if retry_count >= 3:
+                        print(f"Failed to load page {page_num} after 3 attempts, moving on")
+                        emit_skipped(sink_queue, checkpoint, page_num, index_manager)
+                        page_num += 1
+                        retry_count = 0
+                        if page_num > end_page:
+                            # Reached the end, with the skipped page left in the checkpoint
+                            completed = True
+
+                    # Recover by reloading the listing and jumping back to where the shard was
+                    try:
+                        with span("driver.get"):
+                            driver.get(base_url + "/all-bids")
+                        go_to_page(driver, page_num)
+                    except Exception as recover_error:
+                        print(f"Error returning to page {page_num}: {recover_error}")
 
-                            print(output)
-                            with open(output_file, "a") as f:
-                                f.write(output)
+    finally:
+        driver.quit()
+        if checkpoint is not None and completed:
+            emit(sink_queue, [], checkpoint.progress(end_page + 1, index_manager.value, [], done=True))
+        report_shard_throughput(start_page, end_page, pages_done, cards_done, time.time() - shard_start_time)
+
+
+def process_slices(slices, processed_bids, index_manager, sink_queue, limiter, base_url):
+    for piece in slices:
+        slice_start_time = time.time()
+        pages_done = 0
+        cards_done = 0
+        # A fresh session per slice, and slices are sized to finish before it expires
+        with ListingClient(base_url) as client:
+            for page_num in range(1, piece.pages + 1):
+                with limiter.request() as outcome:
+                    try:
+                        with PAGE_SECONDS.time(scraper="gem"):
+                            listing = client.fetch_page(page_num, filters=piece.filters)
+                    except Exception as fetch_error:
+                        print(f"Error fetching page {page_num} of {piece}: {fetch_error}")
+                        record_error("gem", fetch_error)
+                        outcome["error"] = True
+                        continue
+                    outcome["empty"] = not listing["cards"]
 
-                        except Exception as card_error:
-                            print(f"Error processing card: {card_error}")
-                            continue
+                records = build_records(listing["cards"], page_num, processed_bids, index_manager)
+                emit(sink_queue, records)
+                cards_done += len(records)
+                pages_done += 1
 
-                    try:
-                        next_button = driver.find_element(By.CSS_SELECTOR, "a.page-link.next")
+        elapsed_time = time.time() - slice_start_time
+        print(f"Slice {piece}: {pages_done} pages, {cards_done} cards in {elapsed_time:.2f} seconds")
 
-                        if "disabled" in next_button.get_attribute("class"):
-                            print("No more pages.")
-                            break
 
-                        next_button.click()
-                        WebDriverWait(driver, 120).until(
-                            EC.staleness_of(cards[0])
-                        )
+def selenium_listing_pages(driver, base_url, sort=None):
+    with span("driver.get"):
+        driver.get(base_url + "/all-bids")
+    WebDriverWait(driver, 120).until(
+        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+    )
+    if sort:
+        sort_listing(driver, sort)
 
-                        current_page_number = get_current_page_number(driver)
-                        if current_page_number is None:
-                            print(f"Failed to get page number after navigating to next page")
-                            break
+    while True:
+        WebDriverWait(driver, 120).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+        )
+        with span("extract_cards"):
+            listing = parse_listing(driver.page_source)
+        yield listing
+
+        if not listing["has_next"]:
+            return
+        click_next(driver)
+
+def http_listing_pages(client, sort=None):
+    page_num = 1
+    while True:
+        listing = client.fetch_page(page_num, filters={"sort": sort} if sort else None)
+        yield listing
+
+        if not listing["has_next"]:
+            return
+        page_num += 1
+
+def process_incremental(state, processed_bids, index_manager, sink_queue, engine="selenium", base_url=BASE_URL):
+    pages_visited = 0
+    last_page = None
+    driver = None
+    client = None
+    try:
+        if engine == "http":
+            client = ListingClient(base_url)
+            pages = http_listing_pages(client, NEWEST_FIRST_SORT)
+        else:
+            driver = init_driver()
+            pages = selenium_listing_pages(driver, base_url, NEWEST_FIRST_SORT)
+
+        for listing in pages:
+            pages_visited += 1
+            last_page = listing["last_page"] or last_page
+
+            new_cards = []
+            reached_known_bids = False
+            for card in listing["cards"]:
+                if not state.is_known(card):
+                    new_cards.append(card)
+                if state.observe(card):
+                    reached_known_bids = True
+                    break
+
+            emit(sink_queue, build_records(new_cards, listing["current_page"] or pages_visited, processed_bids, index_manager))
+            if reached_known_bids:
+                print(f"Met {state.stop_after} already-known bids in a row on page {pages_visited}.")
+                break
+
+        # Only move the high-water mark once the gap since the last run is fully covered
+        state.save()
+        print(f"Recorded {len(state.new_bids)} new bids.")
 
-                    except Exception as nav_error:
-                        print(f"Error navigating to the next page: {nav_error}")
-                        break
+    finally:
+        if driver is not None:
+            driver.quit()
+        if client is not None:
+            client.close()
 
-                except Exception as load_error:
-                    print(f"Error loading cards on page {page_num}: {load_error}")
-                    reload_cards(driver)
-                    if retry_count >= 3:
-                        print(f"Failed to load cards after 3 attempts")
-                        break
+    return report_skipped_pages(pages_visited, last_page)
 
+def metered_worker(metrics_offset, target, *args):
+    # Every process keeps its own counters, so each serves them on its own port
+    serve_metrics(offset=metrics_offset)
+    try:
+        target(*args)
     finally:
-        driver.quit()
+        flush_tracing()
 
+def retry_skipped_pages(checkpoint, processed_bids, index_manager, sink_queue, limiter, engine, base_url):
+    # Pages an earlier run gave up on, each fetched on its own; one read
+    # successfully is dropped from the checkpoint, a failing one stays for next time
+    client = driver = None
+    try:
+        if engine == "http":
+            client = ListingClient(base_url)
+        else:
+            driver = init_driver()
+            with span("driver.get"):
+                driver.get(base_url + "/all-bids")
+
+        for page_num in list(checkpoint.skipped):
+            with limiter.request() as outcome:
+                try:
+                    with PAGE_SECONDS.time(scraper="gem"), span("fetch_page", page=page_num):
+                        if client is not None:
+                            listing = client.fetch_page(page_num)
+                        else:
+                            if not go_to_page(driver, page_num):
+                                raise RuntimeError(f"could not reach page {page_num}")
+                            MeteredWait(driver, 120, "cards").until(
+                                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+                            )
+                            listing = parse_listing(driver.page_source)
+                except Exception as retry_error:
+                    print(f"Skipped page {page_num} failed again: {retry_error}")
+                    record_error("gem", retry_error)
+                    outcome["error"] = True
+                    continue
+                outcome["empty"] = not listing["cards"]
+
+            records = build_records(listing["cards"], listing["current_page"] or page_num, processed_bids, index_manager)
+            emit_page(sink_queue, records, checkpoint, checkpoint.next_page, index_manager, retried=[page_num])
+            print(f"Recovered skipped page {page_num}: {len(records)} cards")
+    finally:
+        if client is not None:
+            client.close()
+        if driver is not None:
+            driver.quit()
 
-def scraper_worker(start_page, end_page, processed_bids, index_manager, lock, output_file):
-    process_pages(start_page, end_page, processed_bids, index_manager, lock, output_file)
+def scraper_worker(checkpoint, processed_bids, index_manager, sink_queue, limiter, engine, base_url):
+    if checkpoint.skipped:
+        retry_skipped_pages(checkpoint, processed_bids, index_manager, sink_queue, limiter, engine, base_url)
+    if not checkpoint.done:
+        process_pages(checkpoint.next_page, checkpoint.end_page, processed_bids, index_manager, sink_queue, limiter, engine, base_url, checkpoint)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the GeM all-bids listing with several worker processes")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                        help="selenium drives headless Chrome, http calls the listing XHR directly")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--pages", type=int, default=3656)
+    parser.add_argument("--workers", type=int, default=10,
+                        help="Worker processes, and the most that may fetch pages at once")
+    parser.add_argument("--min-workers", type=int, default=1,
+                        help="Fewest concurrent fetches the adaptive limit may drop to")
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=True,
+                        help="Scale concurrent fetches with portal latency, timeouts and empty pages")
+    parser.add_argument("--output", default="scraped_data.txt")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Walk the listing newest-first and stop at bids captured by the previous run")
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--partition", action="store_true",
+                        help="Split the listing into disjoint bid type and end-date slices and balance them across workers (http engine)")
+    parser.add_argument("--slice-pages", type=int, default=SLICE_PAGES,
+                        help="Most pages in one --partition slice, so each finishes within a session")
+    parser.add_argument("--resume", action="store_true",
+                        help="Restart each worker from its last checkpoint instead of page 1")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--format", choices=SINK_FORMATS,
+                        help="Output format, inferred from the --output extension when omitted")
+    parser.add_argument("--batch-size", type=int, default=500, help="Records per sink write")
+    parser.add_argument("--fsync-interval", type=float, default=5.0,
+                        help="Seconds between syncs of the output; checkpoints are saved on each sync")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics here, the sink writer on +1 and worker N on +1+N "
+                             "(default: $SCRAPER_METRICS_PORT, off if unset)")
+    parser.add_argument("--trace", nargs="?", const="1",
+                        help="Record per-phase timing spans to this Chrome trace JSON, or under traces/ when no path is "
+                             "given (default: $SCRAPER_TRACE, off if unset)")
+    args = parser.parse_args()
+    if args.partition and args.engine != "http":
+        parser.error("--partition sets the sidebar filters on the listing XHR, so it needs --engine http")
+
+    serve_metrics(args.metrics_port)
+    start_tracing(args.trace)
+
     start_time = time.time()  
     
-    total_pages = 3656  
-    num_workers = 10 
-    output_file = "scraped_data.txt"  
-
-    pages_per_worker = math.ceil(total_pages / num_workers)
-    ranges = [(i * pages_per_worker + 1, min((i + 1) * pages_per_worker, total_pages)) for i in range(num_workers)]
-
-    with multiprocessing.Manager() as manager:
-        processed_bids = manager.list()  
-        index_manager = manager.Value('i', 1)  
-        lock = manager.Lock()  
+    total_pages = args.pages  
+    num_workers = args.workers 
+    output_file = args.output  
+
+    if args.incremental:
+        # Incremental runs stop at the first page of known bids, so there are no ranges to shard
+        processed_bids = SharedSeenSet(capacity=total_pages * PAGE_SIZE)
+        index_manager = multiprocessing.Value('i', 1)
+        with SinkWriter(output_file, args.format, args.batch_size, fsync_interval=args.fsync_interval,
+                        metrics_offset=1) as sink_queue:
+            process_incremental(CrawlState(args.state_file), processed_bids, index_manager, sink_queue, args.engine, args.base_url)
+    elif args.partition:
+        with ListingClient(args.base_url) as client:
+            slices = plan_slices(client, args.slice_pages * PAGE_SIZE)
+        assignments = [assigned for assigned in assign_slices(slices, num_workers) if assigned]
+
+        processed_bids = SharedSeenSet(capacity=sum(piece.total_records for piece in slices) + PAGE_SIZE)
+        index_manager = multiprocessing.Value('i', 1)
+        if args.adaptive:
+            limiter = AdaptiveLimiter(args.min_workers, len(assignments))
+        else:
+            limiter = AdaptiveLimiter(len(assignments), len(assignments), initial=len(assignments))
+
+        with SinkWriter(output_file, args.format, args.batch_size, fsync_interval=args.fsync_interval,
+                        metrics_offset=1) as sink_queue:
+            processes = []
+            for assigned in assignments:
+                print(f"Worker {len(processes) + 1}: {len(assigned)} slices, {sum(piece.pages for piece in assigned)} pages")
+                p = multiprocessing.Process(target=metered_worker, args=(len(processes) + 2, process_slices, assigned, processed_bids, index_manager, sink_queue, limiter, args.base_url))
+                processes.append(p)
+                p.start()
+
+            for p in processes:
+                p.join()
+    else:
+        checkpoints = []
+        if args.resume:
+            checkpoints = load_checkpoints(args.checkpoint_dir)
+            if not checkpoints:
+                print(f"No checkpoints in {args.checkpoint_dir}, starting a fresh crawl")
+
+        if not checkpoints:
+            pages_per_worker = math.ceil(total_pages / num_workers)
+            ranges = [(i * pages_per_worker + 1, min((i + 1) * pages_per_worker, total_pages)) for i in range(num_workers)]
+            ranges = [(start_page, end_page) for start_page, end_page in ranges if start_page <= end_page]
+            checkpoints = new_checkpoints(args.checkpoint_dir, ranges, sink_position(output_file, args.format))
+
+        processed_bids = SharedSeenSet(capacity=max(checkpoint.end_page for checkpoint in checkpoints) * PAGE_SIZE)
+        output_offset, next_index = restore_progress(checkpoints, processed_bids)
+        index_manager = multiprocessing.Value('i', next_index)
+
+        writer = SinkWriter(output_file, args.format, args.batch_size, fsync_interval=args.fsync_interval,
+                            checkpoints=checkpoints, truncate_to=output_offset, metrics_offset=1)
+        sink_queue = writer.start()
+
+        if args.adaptive:
+            limiter = AdaptiveLimiter(args.min_workers, len(checkpoints))
+        else:
+            limiter = AdaptiveLimiter(len(checkpoints), len(checkpoints), initial=len(checkpoints))
 
         processes = []
-        for start_page, end_page in ranges:
-            p = multiprocessing.Process(target=scraper_worker, args=(start_page, end_page, processed_bids, index_manager, lock, output_file))
+        for checkpoint in checkpoints:
+            if checkpoint.finished:
+                continue
+            if args.resume:
+                skipped = f", retrying skipped pages {checkpoint.skipped}" if checkpoint.skipped else ""
+                print(f"Resuming shard {checkpoint.start_page}-{checkpoint.end_page} at page {checkpoint.next_page}{skipped}")
+            p = multiprocessing.Process(target=metered_worker, args=(len(processes) + 2, scraper_worker, checkpoint, processed_bids, index_manager, sink_queue, limiter, args.engine, args.base_url))
             processes.append(p)
             p.start()
 
         for p in processes:
             p.join()
+        writer.close()
+        print(f"Final concurrency limit: {limiter.limit}")
 
     end_time = time.time()  
     elapsed_time = end_time - start_time
-    print(f"Total elapsed time: {elapsed_time:.2f} seconds")
\ No newline at end of file
+    print(f"Total elapsed time: {elapsed_time:.2f} seconds")
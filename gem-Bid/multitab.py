@@ -0,0 +1,192 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+
+import trio
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from card_parser import BASE_URL, parse_listing
+from listing_client import PAGE_SIZE
+from seen_set import SharedSeenSet
+from sinks import SINK_FORMATS, SinkWriter, emit
+from common.browser_profile import DEFAULT_BLOCK, blocked_patterns, lean_driver
+from common.cdp import CdpError, browser_ws_url, open_cdp
+from common.metrics import PAGE_SECONDS, record_error, serve_metrics
+from common.tracing import span, start_tracing
+from common.waits import ARM_SCRIPT, WAIT_SCRIPT
+from pagination import CARD_SELECTOR, CURRENT_PAGE_SCRIPT, RESULTS_CONTAINER, SELECT_PAGE_SCRIPT
+from multiprocess import build_records
+
+# Background tabs get their timers and rendering throttled, which would stall
+# every tab but the focused one
+TAB_ARGUMENTS = [
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    "--disable-background-timer-throttling",
+]
+
+LISTING_READY_SCRIPT = """
+return !!(document.querySelector(arguments[0]) && document.getElementById('light-pagination'));
+"""
+
+
+async def wait_for_listing(session, timeout=120):
+    with trio.fail_after(timeout):
+        while not await session.execute_script(LISTING_READY_SCRIPT, CARD_SELECTOR):
+            await trio.sleep(0.1)
+
+
+async def open_listing_tab(connection, base_url, isolate=True):
+    # Returns the tab and its browser context, None when the tab shares the default one
+    context_id = await connection.create_context() if isolate else None
+    session = None
+    try:
+        session = await connection.open_tab("about:blank", context_id)
+        await session.send("Network.enable")
+        await session.send("Network.setBlockedURLs", {"urls": blocked_patterns(DEFAULT_BLOCK)})
+        await session.send("Emulation.setFocusEmulationEnabled", {"enabled": True})
+        await session.send("Page.navigate", {"url": base_url + "/all-bids"})
+        await wait_for_listing(session)
+    except BaseException:
+        with trio.CancelScope(shield=True):
+            await close_listing_tab(connection, session, context_id)
+        raise
+    return session, context_id
+
+
+async def close_listing_tab(connection, session, context_id):
+    # Disposing the tab's own context closes the tab along with it
+    if context_id is not None:
+        await connection.dispose_context(context_id)
+    elif session is not None:
+        await connection.close_tab(session)
+
+
+async def fetch_page(session, page_num, timeout=120, no_change_timeout=15, settle=0.15):
+    current_page = await session.execute_script(CURRENT_PAGE_SCRIPT)
+    if current_page != page_num:
+        await session.execute_script(ARM_SCRIPT, RESULTS_CONTAINER)
+        if not await session.execute_script(SELECT_PAGE_SCRIPT, page_num):
+            raise CdpError("Pagination plugin not found on the listing")
+
+        change = await session.execute_async_script(
+            WAIT_SCRIPT, CARD_SELECTOR, settle * 1000, no_change_timeout * 1000, timeout * 1000, timeout=timeout + 5
+        )
+        if not change.get("armed"):
+            raise CdpError(f"Listing navigated away while loading page {page_num}")
+        if not change["changed"]:
+            raise CdpError(f"Page {page_num} did not render within {timeout} seconds")
+
+        current_page = await session.execute_script(CURRENT_PAGE_SCRIPT)
+        if current_page != page_num:
+            raise CdpError(f"Landed on page {current_page} instead of {page_num}")
+
+    page_source = await session.execute_script("return document.documentElement.outerHTML;")
+    with span("extract_cards"):
+        return await trio.to_thread.run_sync(parse_listing, page_source)
+
+
+async def crawl_tab(tab_number, connection, page_numbers, processed_bids, index_manager, sink_queue, stats,
+                    base_url, isolate=True, retries=3):
+    session = context_id = None
+    async with page_numbers:
+        async for page_num in page_numbers:
+            for attempt in range(retries):
+                try:
+                    if session is None:
+                        session, context_id = await open_listing_tab(connection, base_url, isolate)
+                    page_start_time = time.time()
+                    with span("fetch_page", page=page_num, tab=tab_number):
+                        listing = await fetch_page(session, page_num)
+                    PAGE_SECONDS.observe(time.time() - page_start_time, scraper="gem")
+                    break
+                except Exception as e:
+                    print(f"Tab {tab_number}: attempt {attempt + 1} on page {page_num} failed: {e}")
+                    record_error("gem", e)
+                    # Start over in a fresh tab rather than trust a half-loaded one
+                    if session is not None:
+                        await close_listing_tab(connection, session, context_id)
+                        session = context_id = None
+            else:
+                print(f"Tab {tab_number}: skipped page {page_num} after {retries} attempts")
+                stats["skipped"].append(page_num)
+                continue
+
+            if not listing["cards"]:
+                print(f"No cards found on page {page_num}")
+                continue
+
+            records = build_records(listing["cards"], listing["current_page"] or page_num, processed_bids, index_manager)
+            # The sink queue can block when the writer falls behind, so keep it off the event loop
+            await trio.to_thread.run_sync(emit, sink_queue, records)
+            stats["pages"] += 1
+            stats["cards"] += len(records)
+
+    if session is not None:
+        await close_listing_tab(connection, session, context_id)
+
+
+async def crawl(ws_url, start_page, end_page, tabs, processed_bids, index_manager, sink_queue, base_url, isolate=True):
+    stats = {"pages": 0, "cards": 0, "skipped": []}
+    send_channel, receive_channel = trio.open_memory_channel(0)
+
+    async with open_cdp(ws_url) as connection:
+        async with trio.open_nursery() as nursery:
+            # Tabs pull the next page number as they finish one, so a slow
+            # page only holds up its own tab
+            for tab_number in range(1, tabs + 1):
+                nursery.start_soon(crawl_tab, tab_number, connection, receive_channel.clone(), processed_bids,
+                                   index_manager, sink_queue, stats, base_url, isolate)
+            await receive_channel.aclose()
+
+            async with send_channel:
+                for page_num in range(start_page, end_page + 1):
+                    await send_channel.send(page_num)
+
+    return stats
+
+
+def scraper(start_page, end_page, tabs, sink_queue, base_url=BASE_URL, isolate=True):
+    processed_bids = SharedSeenSet(capacity=end_page * PAGE_SIZE)
+    index_manager = multiprocessing.Value('i', 1)
+
+    driver = lean_driver(arguments=TAB_ARGUMENTS)
+    try:
+        return trio.run(crawl, browser_ws_url(driver), start_page, end_page, tabs, processed_bids, index_manager,
+                        sink_queue, base_url, isolate)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the GeM all-bids listing from many tabs of one Chrome")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=3656, help="Last page to crawl")
+    parser.add_argument("--tabs", type=int, default=20, help="Tabs loading pages at once")
+    parser.add_argument("--isolate", action=argparse.BooleanOptionalAction, default=True,
+                        help="Give every tab its own browser context so sessions and CSRF tokens don't collide")
+    parser.add_argument("--output", default="scraped_data.txt")
+    parser.add_argument("--format", choices=SINK_FORMATS,
+                        help="Output format, inferred from the --output extension when omitted")
+    parser.add_argument("--batch-size", type=int, default=500, help="Records per sink write")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics here and the sink writer's on +1 (default: $SCRAPER_METRICS_PORT)")
+    parser.add_argument("--trace", nargs="?", const="1",
+                        help="Record per-phase timing spans to this Chrome trace JSON, or under traces/ when no path is "
+                             "given (default: $SCRAPER_TRACE, off if unset)")
+    args = parser.parse_args()
+
+    serve_metrics(args.metrics_port)
+    start_tracing(args.trace)
+    start_time = time.time()
+    with SinkWriter(args.output, args.format, args.batch_size, metrics_offset=1) as sink_queue:
+        stats = scraper(args.start_page, args.pages, args.tabs, sink_queue, args.base_url, args.isolate)
+
+    elapsed_time = time.time() - start_time
+    print(f"{stats['pages']} pages, {stats['cards']} cards from {args.tabs} tabs in {elapsed_time:.2f} seconds "
+          f"({stats['pages'] / elapsed_time:.2f} pages/s)")
+    if stats["skipped"]:
+        print(f"Skipped pages: {sorted(stats['skipped'])}")
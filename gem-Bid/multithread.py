@@ -1,118 +1,188 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from concurrent.futures import ThreadPoolExecutor
+from card_parser import parse_listing
 from threading import Lock
+import argparse
+import queue
+import os
+import sys
 import time
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.driver_pool import DriverPool
+from common.browser_profile import lean_driver
+from common.concurrency import AdaptiveLimiter
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.tracing import span, start_tracing
+from common.waits import MeteredWait
+from pagination import go_to_page
+
 lock = Lock()   
 processed_bids = set()
 card_counter = 0
 
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-chrome_options.page_load_strategy = 'eager'
 def create_driver():
-    service = Service(ChromeDriverManager().install())
-    return webdriver.Chrome(service=service, options=chrome_options)
+    return lean_driver()
+
+driver_pool = None
+limiter = None
 
-def process_page(url):
-    local_driver = create_driver()
-    local_driver.get(url)
-    wait = WebDriverWait(local_driver, 150)
-    local_processed_bids = set()
+MAX_ATTEMPTS = 3
+skipped_pages = []
 
+def print_cards(cards):
     global card_counter
 
+    for card in cards:
+        try:
+            unique_bid_id = (card["bid_no"], card["ra_no"] if card["ra_no"] else "")
+
+            with lock:
+                if unique_bid_id in processed_bids:
+                    continue
+                processed_bids.add(unique_bid_id)
+                card_number = card_counter
+                card_counter += 1
+
+            output = (
+                f"Card Number: {card_number}\n"
+                f"{card['text']}\n"
+                f"Bid No.: {card['bid_no']} Link: {card['bid_link']}\n"
+            )
+
+            if card["ra_no"]:
+                output += f"RA No.: {card['ra_no']} Link: {card['ra_link']}\n"
+
+            output += "-" * 100
+
+            print(output)
+
+        except Exception as e:
+            print(f"Error processing card: {e}")
+            record_error("gem", e)
+            continue
+
+def load_page(driver, page_num):
+    with PAGE_SECONDS.time(scraper="gem"):
+        if not go_to_page(driver, page_num):
+            raise RuntimeError(f"Could not reach page {page_num}")
+        MeteredWait(driver, 100, "cards").until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+        )
+        with span("extract_cards"):
+            listing = parse_listing(driver.page_source)
+    PAGES_FETCHED.inc(scraper="gem")
+    CARDS_PARSED.inc(len(listing["cards"]), scraper="gem")
+    return listing
+
+def process_pages(url, page_queue):
+    local_driver = driver_pool.checkout()
+
     try:
+        with span("driver.get"):
+            local_driver.get(url)
         while True:
+            # Every thread pulls from the same queue, so a page is fetched by
+            # exactly one of them and idle threads pick up whatever is left
             try:
-                cards = WebDriverWait(local_driver, 100).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                )
-                
-                for card in cards:
-                    try:
-                        bid_elements = card.find_elements(By.CSS_SELECTOR, ".bid_no_hover")
-                        
-                        if not bid_elements:
-                            continue
-                        
-                        bid_no_element = bid_elements[0]
-                        ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
-
-                        bid_no_text = bid_no_element.text.strip()
-                        bid_no_href = bid_no_element.get_attribute("href")
-
-                        ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-                        ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
-                        
-                        unique_bid_id = (bid_no_text, ra_no_text if ra_no_text else "")
-                        
-                        with lock:
-                            if unique_bid_id in processed_bids:
-                                continue
-                            processed_bids.add(unique_bid_id)
-                            card_number = card_counter
-                            card_counter += 1
-                        
-                        output = (
-                            f"Card Number: {card_number}\n"
-                            f"{card.text.strip()}\n"
-                            f"Bid No.: {bid_no_text} Link: {bid_no_href}\n"
-                        )
-                        
-                        if ra_no_text:
-                            output += f"RA No.: {ra_no_text} Link: {ra_no_href}\n"
-                        
-                        output += "-" * 100
-                        
-                        print(output)
-                        
-                    except Exception as e:
-                        print(f"Error processing card: {e}")
-                        continue
-                
+                page_num, attempt = page_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            listing = None
+            with limiter.request() as outcome:
                 try:
-                    next_button = local_driver.find_element(By.CSS_SELECTOR, "a.page-link.next")
-                    
-                    if "disabled" in next_button.get_attribute("class"):
-                        break
-                    
-                    next_button.click()
-                    
-                    WebDriverWait(local_driver, 50).until(
-                        EC.staleness_of(cards[0])
-                    )
-                    
+                    listing = load_page(local_driver, page_num)
+                    outcome["empty"] = not listing["cards"]
                 except Exception as e:
-                    print(f"Error navigating to the next page: {e}")
-                    break
-                
-            except Exception as e:
-                print(f"Error loading cards: {e}")
-                break
+                    print(f"Error loading page {page_num}: {e}")
+                    record_error("gem", e)
+                    outcome["error"] = True
 
-    finally:
-        local_driver.quit()
+            if listing is not None and listing["cards"]:
+                print_cards(listing["cards"])
+                continue
+
+            if attempt + 1 < MAX_ATTEMPTS:
+                # Hand the page back so any thread can retry it, and carry on
+                page_queue.put((page_num, attempt + 1))
+            else:
+                print(f"Skipped page {page_num} after {MAX_ATTEMPTS} attempts")
+                with lock:
+                    skipped_pages.append(page_num)
 
-def scraper(base_url, num_threads):
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = [executor.submit(process_page, base_url) for _ in range(num_threads)]
-        for future in futures:
             try:
-                future.result()
+                with span("driver.get"):
+                    local_driver.get(url)
             except Exception as e:
-                print(f"Thread error: {e}")
+                print(f"Error reloading the listing: {e}")
+
+    finally:
+        driver_pool.checkin(local_driver)
+
+def count_pages(url):
+    with driver_pool.driver() as driver:
+        with span("driver.get"):
+            driver.get(url)
+        WebDriverWait(driver, 150).until(
+            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+        )
+        return parse_listing(driver.page_source)["last_page"]
+
+def scraper(base_url, num_threads, min_threads=1, adaptive=True, pages=None):
+    global driver_pool, limiter
+    driver_pool = DriverPool(create_driver, size=num_threads)
+    # Every thread keeps its browser, but only `limiter.limit` of them load pages at once
+    if adaptive:
+        limiter = AdaptiveLimiter(min_threads, num_threads, name="threads")
+    else:
+        limiter = AdaptiveLimiter(num_threads, num_threads, initial=num_threads, name="threads")
+    driver_pool.warm()
+    try:
+        if pages is None:
+            pages = count_pages(base_url)
+        print(f"Crawling {pages} pages with {num_threads} threads")
+
+        page_queue = queue.Queue()
+        for page_num in range(1, pages + 1):
+            page_queue.put((page_num, 0))
+
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            futures = [executor.submit(process_pages, base_url, page_queue) for _ in range(num_threads)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Thread error: {e}")
+    finally:
+        driver_pool.close()
 
 if __name__ == "__main__":
-    base_url = "https://bidplus.gem.gov.in/all-bids"
-    num_threads = 10
+    parser = argparse.ArgumentParser(description="Crawl the GeM all-bids listing with several browser threads")
+    parser.add_argument("--base-url", default="https://bidplus.gem.gov.in/all-bids")
+    parser.add_argument("--threads", type=int, default=10,
+                        help="Browser threads, and the most that may load pages at once")
+    parser.add_argument("--min-threads", type=int, default=1,
+                        help="Fewest concurrent page loads the adaptive limit may drop to")
+    parser.add_argument("--adaptive", action=argparse.BooleanOptionalAction, default=True,
+                        help="Scale concurrent page loads with portal latency, timeouts and empty pages")
+    parser.add_argument("--pages", type=int,
+                        help="Pages to crawl, read from the listing's pagination when omitted")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this port (default: $SCRAPER_METRICS_PORT, off if unset)")
+    parser.add_argument("--trace", nargs="?", const="1",
+                        help="Record per-phase timing spans to this Chrome trace JSON, or under traces/ when no path is "
+                             "given (default: $SCRAPER_TRACE, off if unset)")
+    args = parser.parse_args()
+
+    serve_metrics(args.metrics_port)
+    start_tracing(args.trace)
+
     start_time = time.time()
-    scraper(base_url, num_threads)
+    scraper(args.base_url, args.threads, args.min_threads, args.adaptive, args.pages)
     print(f"Data collection completed in {time.time() - start_time:.2f} seconds")
     print(f"Total number of unique cards processed: {card_counter}")
+    if skipped_pages:
+        print(f"Skipped pages: {sorted(skipped_pages)}")
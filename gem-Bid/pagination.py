@@ -0,0 +1,105 @@
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from common.waits import arm_page_change, page_change, wait_for_page_change
+
+RESULTS_CONTAINER = "#bidCard"
+CARD_SELECTOR = ".card"
+
+CURRENT_PAGE_SCRIPT = """
+var items = document.querySelectorAll('#light-pagination .current');
+for (var i = 0; i < items.length; i++) {
+    var text = items[i].textContent.trim();
+    if (/^\\d+$/.test(text)) { return parseInt(text, 10); }
+}
+return null;
+"""
+
+# The listing paginates with simplePagination, whose selectPage runs the same
+# callback as clicking a page link, so any page is one call away
+SELECT_PAGE_SCRIPT = """
+var target = arguments[0];
+if (window.jQuery && jQuery.fn.pagination && jQuery('#light-pagination').length) {
+    jQuery('#light-pagination').pagination('selectPage', target);
+    return true;
+}
+return false;
+"""
+
+NEXT_PAGE_SCRIPT = """
+document.querySelector('#light-pagination a.page-link.next').click();
+"""
+
+VISIBLE_PAGES_SCRIPT = """
+var pages = [];
+document.querySelectorAll('#light-pagination a.page-link').forEach(function (link) {
+    var text = link.textContent.trim();
+    if (/^\\d+$/.test(text)) { pages.push(parseInt(text, 10)); }
+});
+return pages;
+"""
+
+
+def read_current_page(driver):
+    return driver.execute_script(CURRENT_PAGE_SCRIPT)
+
+
+def wait_for_page(driver, page_num, timeout=120):
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: read_current_page(d) == page_num)
+        return True
+    except Exception as e:
+        print(f"Timed out waiting for page {page_num}: {e}")
+        return False
+
+
+def go_to_page(driver, page_num, timeout=120):
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.ID, "light-pagination"))
+    )
+
+    current_page = read_current_page(driver)
+    if current_page == page_num:
+        return True
+
+    arm_page_change(driver, RESULTS_CONTAINER)
+    if driver.execute_script(SELECT_PAGE_SCRIPT, page_num):
+        wait_for_page_change(driver, CARD_SELECTOR, timeout)
+        return wait_for_page(driver, page_num, timeout)
+
+    # Without the plugin API, hop through whichever visible page link is closest
+    while current_page != page_num:
+        visible_pages = driver.execute_script(VISIBLE_PAGES_SCRIPT)
+        if not visible_pages:
+            print(f"No page links found while jumping to page {page_num}")
+            return False
+
+        hop = min(visible_pages, key=lambda number: abs(number - page_num))
+        if current_page is not None and abs(hop - page_num) >= abs(current_page - page_num):
+            print(f"Cannot get closer than page {current_page} to page {page_num}")
+            return False
+
+        with page_change(driver, RESULTS_CONTAINER, CARD_SELECTOR, timeout):
+            driver.find_element(By.XPATH, f"//*[@id='light-pagination']/a[normalize-space()='{hop}']").click()
+        if not wait_for_page(driver, hop, timeout):
+            return False
+        current_page = hop
+
+    return True
+
+
+def sort_listing(driver, sort_id, timeout=120):
+    # The sort links sit in a hidden dropdown, so click them from script
+    with page_change(driver, RESULTS_CONTAINER, CARD_SELECTOR, timeout) as change:
+        driver.execute_script("document.getElementById(arguments[0]).click();", sort_id)
+    return change
+
+
+def click_next(driver, next_button=None, timeout=120, no_change_timeout=15):
+    # Returns once the next page's cards are rendered, with the transition timing
+    if next_button is None:
+        next_button = driver.find_element(By.CSS_SELECTOR, "a.page-link.next")
+    with page_change(driver, RESULTS_CONTAINER, CARD_SELECTOR, timeout, no_change_timeout) as change:
+        next_button.click()
+    return change
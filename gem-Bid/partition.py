@@ -0,0 +1,131 @@
+import heapq
+import math
+import argparse
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from card_parser import BASE_URL
+from crawl_state import parse_card_date
+from listing_client import FILTER_DATE_FORMAT, PAGE_SIZE, ListingClient
+
+# The sidebar's bid types that should split the listing without overlap.
+# "custom" and "boq" are subsets of product bids, so they are left out.
+BID_TYPES = ("product", "service", "bidToRA")
+SLICE_PAGES = 200
+
+
+@dataclass
+class Slice:
+    by_type: str
+    end_from: date
+    end_to: date
+    total_records: int
+
+    @property
+    def filters(self):
+        return {
+            "byType": self.by_type,
+            "byEndDate": {"from": f"{self.end_from:{FILTER_DATE_FORMAT}}", "to": f"{self.end_to:{FILTER_DATE_FORMAT}}"},
+        }
+
+    @property
+    def pages(self):
+        return math.ceil(self.total_records / PAGE_SIZE)
+
+    def __str__(self):
+        return f"{self.by_type} ending {self.end_from} to {self.end_to}: {self.total_records} records, {self.pages} pages"
+
+
+def count_records(client, filters):
+    return client.fetch_page(1, filters=filters)["total_records"] or 0
+
+
+def end_date_bounds(client, by_type="all"):
+    days = []
+    for sort in ("Bid-End-Date-Oldest", "Bid-End-Date-Latest"):
+        listing = client.fetch_page(1, filters={"byType": by_type, "sort": sort})
+        for card in listing["cards"]:
+            end_date = parse_card_date(card["end_date"])
+            if end_date is not None:
+                days.append(end_date.date())
+    if not days:
+        raise RuntimeError("No end dates found on the first listing page")
+    return min(days), max(days)
+
+
+def split_window(client, by_type, end_from, end_to, max_records, total=None):
+    # Halve the end-date window until every piece is small enough to crawl
+    # in one session. Counts come from the listing's own "records of N".
+    if total is None:
+        total = count_records(client, Slice(by_type, end_from, end_to, 0).filters)
+    if total == 0:
+        return []
+    if total <= max_records or end_from == end_to:
+        if total > max_records:
+            print(f"{by_type} bids ending {end_from} hold {total} records and cannot be split further")
+        return [Slice(by_type, end_from, end_to, total)]
+
+    middle = end_from + timedelta(days=(end_to - end_from).days // 2)
+    left_total = count_records(client, Slice(by_type, end_from, middle, 0).filters)
+    right_total = count_records(client, Slice(by_type, middle + timedelta(days=1), end_to, 0).filters)
+    if left_total + right_total != total:
+        # The halves should add up exactly; if not, the date filter isn't doing what we expect
+        print(f"End-date halves of {by_type} {end_from} to {end_to} hold {left_total} + {right_total} "
+              f"records, not {total}; keeping the window whole")
+        return [Slice(by_type, end_from, end_to, total)]
+
+    return (split_window(client, by_type, end_from, middle, max_records, left_total)
+            + split_window(client, by_type, middle + timedelta(days=1), end_to, max_records, right_total))
+
+
+def plan_slices(client, max_records=SLICE_PAGES * PAGE_SIZE, split_types=True):
+    total = count_records(client, {"byType": "all"})
+    first_day, last_day = end_date_bounds(client)
+    print(f"{total} records ending between {first_day} and {last_day}")
+
+    by_types = ["all"]
+    if split_types:
+        type_totals = {by_type: count_records(client, {"byType": by_type}) for by_type in BID_TYPES}
+        if sum(type_totals.values()) == total:
+            by_types = list(BID_TYPES)
+        else:
+            print(f"Bid types add up to {sum(type_totals.values())} records, not {total}; splitting by end date only")
+
+    slices = []
+    for by_type in by_types:
+        slices.extend(split_window(client, by_type, first_day, last_day, max_records))
+
+    covered = sum(piece.total_records for piece in slices)
+    if covered != total:
+        print(f"Slices cover {covered} of {total} records")
+    return slices
+
+
+def assign_slices(slices, workers):
+    # Longest processing time first: hand the biggest remaining slice to the
+    # least loaded worker, which keeps the slowest worker within 4/3 of optimal
+    loads = [(0, worker) for worker in range(workers)]
+    assignments = [[] for _ in range(workers)]
+    for piece in sorted(slices, key=lambda piece: piece.total_records, reverse=True):
+        load, worker = heapq.heappop(loads)
+        assignments[worker].append(piece)
+        heapq.heappush(loads, (load + piece.pages, worker))
+    return assignments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split the GeM listing into disjoint filter slices for parallel workers")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--slice-pages", type=int, default=SLICE_PAGES,
+                        help="Most pages in one slice, so a slice finishes before its session expires")
+    parser.add_argument("--split-types", action=argparse.BooleanOptionalAction, default=True)
+    args = parser.parse_args()
+
+    with ListingClient(args.base_url) as client:
+        slices = plan_slices(client, args.slice_pages * PAGE_SIZE, args.split_types)
+
+    for worker, assigned in enumerate(assign_slices(slices, args.workers), start=1):
+        print(f"Worker {worker}: {sum(piece.pages for piece in assigned)} pages")
+        for piece in assigned:
+            print(f"    {piece}")
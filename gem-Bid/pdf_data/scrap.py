@@ -1,44 +1,43 @@
 import os
+import sys
 import time
 import requests
 import logging
 import pdfplumber
 import fitz  
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 
+GEM_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.extend([GEM_DIR, os.path.dirname(GEM_DIR)])
+from card_parser import parse_listing
+from pagination import click_next
+from sinks import BidRecord, SinkWriter, emit
+from common.driver_pool import DriverPool
+from common.browser_profile import lean_driver
+from common.browser_downloads import DOWNLOAD_PREFS, BrowserDownloader
+from common.downloader import DocumentDownloader
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, PDFS_DOWNLOADED, record_error, serve_metrics
+from common.tracing import span, start_tracing, traced
+from common.waits import MeteredWait
+
 def init_driver():
-    chrome_options = Options()
-    chrome_options.page_load_strategy = 'eager'
-    prefs = {
-        "download.default_directory": os.getcwd(),
-        "download.prompt_for_download": False,
-        "download.directory_upgrade": True,
-        "safebrowsing.enabled": True
-    }
-    chrome_options.add_argument("--headless")
-    chrome_options.add_experimental_option("prefs", prefs)
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
-
-def get_brief_item_details(card):
-    try:
-        item_detail_elements = card.find_elements(By.CSS_SELECTOR, "div.col-md-4 a[data-content]")
-        item_details = [element.get_attribute("data-content").strip() for element in item_detail_elements]
-        return item_details
-    except Exception as e:
-        print(f"Error occurred while getting brief item details: {e}")
-        return []
+    # Documents the HTTP client can't fetch are downloaded by this browser
+    return lean_driver(prefs=DOWNLOAD_PREFS)
+
+DOWNLOAD_WORKERS = 8
 
+# Only the listing needs a browser; documents are fetched over HTTP with its cookies
+driver_pool = DriverPool(init_driver, size=1)
+downloader = DocumentDownloader(workers=DOWNLOAD_WORKERS)
+browser_downloader = BrowserDownloader()
+
+@traced()
 def get_current_page_number(driver):
     try:
-        wait = WebDriverWait(driver, 120)
+        wait = MeteredWait(driver, 120, "pagination")
         pagination = wait.until(
             EC.presence_of_element_located((By.ID, "light-pagination"))
         )
@@ -53,6 +52,7 @@ def get_current_page_number(driver):
         return None
     except Exception as e:
         print(f"Error occurred while getting current page number: {e}")
+        record_error("gem_pdf", e)
         return None
 
 def download_file(url, save_dir, filename):
@@ -64,10 +64,13 @@ def download_file(url, save_dir, filename):
 
         with open(file_path, 'wb') as f:
             f.write(response.content)
+        PDFS_DOWNLOADED.inc(scraper="gem_pdf")
         print(f"Downloaded: {file_path}")
     except Exception as e:
         logging.error(f"Error downloading {url}: {e}")
+        record_error("gem_pdf", e)
 
+@traced()
 def extract_and_download_embedded_links(pdf_path, save_dir, file_extensions=('.pdf', '.xlsx', '.csv', '.ods', '.txt')):
     url_set = set()  
     try:
@@ -84,46 +87,18 @@ def extract_and_download_embedded_links(pdf_path, save_dir, file_extensions=('.p
     except Exception as e:
         logging.error(f"Error extracting and downloading embedded links from {pdf_path}: {e}")
 
+@traced()
 def download_pdf(url, folder_name):
-    driver = init_driver()
-    try:
-        driver.get(url)
-        time.sleep(5)  # Allow time for the PDF to load/download
-
-        download_path = os.getcwd()
-        filename = None
+    # Falls back to a browser download for documents only a browser session gets, e.g. behind a script check
+    pdf_path = downloader.download(url, folder_name) or browser_downloader.download(url, folder_name)
+    if pdf_path:
+        print(f"Downloaded {os.path.basename(pdf_path)} to {folder_name}")
 
-        # Wait for the PDF to be downloaded
-        while True:
-            for f in os.listdir(download_path):
-                if f.endswith('.pdf'):
-                    filename = f
-                    break
+        # Extract links from the downloaded PDF using pdfplumber
+        extract_and_download_embedded_links(pdf_path, folder_name)
 
-            if filename:
-                break
-
-            if driver.current_url != url:
-                print(f"Redirected to a different page: {driver.current_url}")
-                return
-
-            time.sleep(1)
-
-        # Move the downloaded file to the designated folder
-        if filename:
-            os.makedirs(folder_name, exist_ok=True)
-            pdf_path = os.path.join(download_path, filename)
-            os.rename(pdf_path, os.path.join(folder_name, filename))
-            print(f"Downloaded {filename} to {folder_name}")
-
-            # Extract links from the downloaded PDF using pdfplumber
-            extract_and_download_embedded_links(os.path.join(folder_name, filename), folder_name)
-
-        else:
-            print(f"No PDF downloaded from {url}")
-
-    finally:
-        driver.quit()
+    else:
+        print(f"No PDF downloaded from {url}")
 
 def extract_links_from_list_ra(driver, folder_name):
     try:
@@ -135,8 +110,11 @@ def extract_links_from_list_ra(driver, folder_name):
     except Exception as e:
         print(f"Error extracting links from RA page: {e}")
 
-def process_pages(start_page, end_page, output_file):
-    driver = init_driver()
+def process_pages(start_page, end_page, sink_queue):
+    driver = driver_pool.checkout()
+    browser_downloader.use_browser(driver)
+    # Documents download in the background while the crawl moves on
+    download_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS)
     processed_bids = set()
     index = 1
     main_pdf_directory = "Pdf"
@@ -144,7 +122,9 @@ def process_pages(start_page, end_page, output_file):
 
     try:
         for page_num in range(start_page, end_page + 1):
-            driver.get("https://bidplus.gem.gov.in/all-bids")
+            with span("driver.get"):
+                driver.get("https://bidplus.gem.gov.in/all-bids")
+            downloader.use_browser_session(driver)
             wait = WebDriverWait(driver, 120)
 
             current_page_number = get_current_page_number(driver)
@@ -154,26 +134,24 @@ def process_pages(start_page, end_page, output_file):
 
             while True:
                 try:
-                    cards = WebDriverWait(driver, 120).until(
+                    page_start_time = time.time()
+                    MeteredWait(driver, 120, "cards").until(
                         EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
                     )
 
-                    for card in cards:
-                        try:
-                            item_details = get_brief_item_details(card)
-                            bid_elements = card.find_elements(By.CSS_SELECTOR, ".bid_no_hover")
-
-                            if not bid_elements:
-                                continue
-
-                            bid_no_element = bid_elements[0]
-                            ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
+                    with span("extract_cards"):
+                        listing = parse_listing(driver.page_source)
+                    PAGE_SECONDS.observe(time.time() - page_start_time, scraper="gem_pdf")
+                    PAGES_FETCHED.inc(scraper="gem_pdf")
+                    CARDS_PARSED.inc(len(listing["cards"]), scraper="gem_pdf")
+                    page_records = []
 
-                            bid_no_text = bid_no_element.text.strip()
-                            bid_no_href = bid_no_element.get_attribute("href")
-
-                            ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-                            ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
+                    for card in listing["cards"]:
+                        try:
+                            bid_no_text = card["bid_no"]
+                            bid_no_href = card["bid_link"]
+                            ra_no_text = card["ra_no"]
+                            ra_no_href = card["ra_link"]
 
                             unique_bid_id = (bid_no_text, ra_no_text if ra_no_text else "")
 
@@ -184,43 +162,35 @@ def process_pages(start_page, end_page, output_file):
                             card_index = index
                             index += 1
 
-                            output = (
-                                f"Page: {current_page_number}\n"
-                                f"Id: {card_index}\n"
-                                f"{card.text.strip()}\n"
-                                f"Bid No.: {bid_no_text} Link: {bid_no_href}\n"
-                            )
-
-                            if ra_no_text:
-                                output += f"RA No.: {ra_no_text} Link: {ra_no_href}\n"
-
-                            output += f"Item Details: {', '.join(item_details)}\n"
-                            output += "-" * 100 + "\n"
-
-                            print(output)
-                            with open(output_file, "a") as f:
-                                f.write(output)
+                            record = BidRecord.from_card(card, current_page_number, card_index)
+                            print(record.to_text())
+                            page_records.append(record)
 
                             if bid_no_href:
                                 folder_name = os.path.join(main_pdf_directory, bid_no_text)
-                                download_pdf(bid_no_href, folder_name)
+                                download_executor.submit(download_pdf, bid_no_href, folder_name)
 
                             if ra_no_href:
                                 folder_name = os.path.join(main_pdf_directory, ra_no_text)
                                 original_url = driver.current_url
                                 if "list-ra-schedules" in ra_no_href:
-                                    driver.get(ra_no_href)
+                                    with span("driver.get"):
+                                        driver.get(ra_no_href)
                                     print(f"Connected to RA schedules page: {ra_no_href}")
                                     extract_links_from_list_ra(driver, folder_name)
-                                    driver.get(original_url)
+                                    with span("driver.get"):
+                                        driver.get(original_url)
                                     print(f"Returned to the original page: {original_url}")
                                 else:
-                                    download_pdf(ra_no_href, folder_name)
+                                    download_executor.submit(download_pdf, ra_no_href, folder_name)
 
                         except Exception as card_error:
                             print(f"Error processing card: {card_error}")
+                            record_error("gem_pdf", card_error)
                             continue
 
+                    emit(sink_queue, page_records)
+
                     try:
                         next_button = driver.find_element(By.CSS_SELECTOR, "a.page-link.next")
 
@@ -228,10 +198,7 @@ def process_pages(start_page, end_page, output_file):
                             print("No more pages.")
                             break
 
-                        next_button.click()
-                        WebDriverWait(driver, 120).until(
-                            EC.staleness_of(cards[0])
-                        )
+                        click_next(driver, next_button)
 
                         current_page_number = get_current_page_number(driver)
                         if current_page_number is None:
@@ -240,32 +207,48 @@ def process_pages(start_page, end_page, output_file):
 
                     except Exception as nav_error:
                         print(f"Error navigating to the next page: {nav_error}")
+                        record_error("gem_pdf", nav_error)
                         break
 
                 except Exception as load_error:
                     print(f"Error loading cards on page {page_num}: {load_error}")
+                    record_error("gem_pdf", load_error)
                     continue
 
     finally:
-        driver.quit()
+        download_executor.shutdown(wait=True)
+        driver_pool.checkin(driver)
         
 def max_pages():
-    driver = init_driver()
-    driver.get('https://bidplus.gem.gov.in/all-bids')
-    wait = WebDriverWait(driver, 120)
-    pagination = wait.until(EC.presence_of_element_located((By.ID, "light-pagination")))
-    last_page = pagination.find_element(By.CSS_SELECTOR, 'a:nth-last-of-type(2)').text
+    with driver_pool.driver() as driver:
+        with span("driver.get"):
+            driver.get('https://bidplus.gem.gov.in/all-bids')
+        wait = WebDriverWait(driver, 120)
+        pagination = wait.until(EC.presence_of_element_located((By.ID, "light-pagination")))
+        last_page = pagination.find_element(By.CSS_SELECTOR, 'a:nth-last-of-type(2)').text
     print(last_page)
     return int(last_page)
 
 
 if __name__ == "__main__":
     start_time = time.time()  
-    
-    total_pages = max_pages()
-    output_file = "scraped_data.txt"  
+    serve_metrics()
+    start_tracing()
+    driver_pool.warm()
 
-    process_pages(1, total_pages, output_file)
+    try:
+        total_pages = max_pages()
+        output_file = "scraped_data.txt"  
+
+        with SinkWriter(output_file, metrics_offset=1) as sink_queue:
+            process_pages(1, total_pages, sink_queue)
+    finally:
+        browser_downloader.close()
+        driver_pool.close()
+        downloader.close()
+        print(f"Documents: {downloader.stats['downloaded']} downloaded ({downloader.stats['bytes'] / 2**20:.1f} MiB), "
+              f"{downloader.stats['existing']} already saved, {downloader.stats['failed']} failed over HTTP, "
+              f"{browser_downloader.stats['downloaded']} of which the browser fetched")
 
     end_time = time.time()  
     elapsed_time = end_time - start_time
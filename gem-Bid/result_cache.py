@@ -0,0 +1,153 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from listing_client import DEFAULT_FILTER
+from common.metrics import SEARCH_CACHE
+
+CACHE_PATH = "search_cache.db"
+# The portal itself takes up to 15 minutes to show new or changed bids
+DEFAULT_TTL = 15 * 60
+DEFAULT_MAX_BYTES = 64 * 2**20
+STAT_NAMES = ("hits", "misses", "expired", "evicted")
+
+
+def cache_key(keyword, search_type="fullText", filters=None, url=""):
+    # Case and surrounding spaces don't change what the portal returns, and filters
+    # are merged over the defaults so leaving one out and passing its default agree
+    return json.dumps({
+        "url": url.rstrip("/"),
+        "keyword": keyword.strip().lower(),
+        "search_type": search_type,
+        "filter": {**DEFAULT_FILTER, **(filters or {})},
+    }, sort_keys=True)
+
+
+class ResultCache:
+    # Finished keyword searches kept in SQLite and served again while younger
+    # than ttl seconds. Past max_bytes the least recently used results go first.
+
+    def __init__(self, path=CACHE_PATH, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                total_records INTEGER,
+                cards TEXT,
+                bytes INTEGER,
+                stored_at REAL,
+                used_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS results_used_at ON results (used_at);
+            CREATE TABLE IF NOT EXISTS stats (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def _bump(self, name, amount=1):
+        # Kept in the database so hit rates add up across runs
+        self.connection.execute("INSERT INTO stats (name, value) VALUES (?, ?) "
+                                "ON CONFLICT (name) DO UPDATE SET value = value + excluded.value", (name, amount))
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT total_records, cards, stored_at FROM results WHERE key = ?",
+                                          (key,)).fetchone()
+            if row is None:
+                outcome, result = "miss", None
+            elif now - row[2] > self.ttl:
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                outcome, result = "expired", None
+            else:
+                self.connection.execute("UPDATE results SET used_at = ? WHERE key = ?", (now, key))
+                outcome, result = "hit", {"total_records": row[0], "cards": json.loads(row[1]), "age": now - row[2]}
+            self._bump("hits" if outcome == "hit" else "misses")
+            if outcome == "expired":
+                self._bump("expired")
+            self.connection.commit()
+        SEARCH_CACHE.inc(result=outcome)
+        return result
+
+    def put(self, key, total_records, cards):
+        data = json.dumps(cards, ensure_ascii=False)
+        size = len(data.encode("utf-8"))
+        if size > self.max_bytes:
+            print(f"Search result of {size / 2**20:.1f} MiB is larger than the whole cache, not caching it")
+            return False
+
+        now = time.time()
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results (key, total_records, cards, bytes, stored_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, total_records, data, size, now, now),
+            )
+            self._evict()
+            self.connection.commit()
+        return True
+
+    def _evict(self):
+        cached_bytes = self.connection.execute("SELECT COALESCE(SUM(bytes), 0) FROM results").fetchone()[0]
+        evicted = 0
+        while cached_bytes > self.max_bytes:
+            key, size = self.connection.execute("SELECT key, bytes FROM results ORDER BY used_at LIMIT 1").fetchone()
+            self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+            cached_bytes -= size
+            evicted += 1
+        if evicted:
+            self._bump("evicted", evicted)
+
+    def stats(self):
+        with self.lock:
+            stats = dict.fromkeys(STAT_NAMES, 0)
+            stats.update(self.connection.execute("SELECT name, value FROM stats").fetchall())
+            stats["entries"], stats["bytes"] = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM results").fetchone()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM results")
+            self.connection.execute("DELETE FROM stats")
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+def format_stats(stats):
+    return (f"Result cache: {stats['hits']} hits, {stats['misses']} misses ({stats['expired']} expired), "
+            f"{stats['hit_rate']:.0%} hit rate; {stats['entries']} searches, {stats['bytes'] / 2**20:.1f} MiB, "
+            f"{stats['evicted']} evicted")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show or clear the keyword search result cache")
+    parser.add_argument("--cache", default=CACHE_PATH)
+    parser.add_argument("--clear", action="store_true", help="Drop every cached result and reset the counts")
+    args = parser.parse_args()
+
+    cache = ResultCache(args.cache)
+    try:
+        if args.clear:
+            cache.clear()
+            print(f"Cleared {args.cache}")
+        else:
+            print(format_stats(cache.stats()))
+    finally:
+        cache.close()
@@ -1,50 +1,68 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
+from card_parser import BASE_URL, parse_listing
+from crawl_state import CrawlState, NEWEST_FIRST_SORT, STATE_FILE, report_skipped_pages
+import argparse
+import os
+import sys
 
-chrome_options = Options()
-chrome_options.add_argument("--headless")
-chrome_options.page_load_strategy = 'eager'
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pagination import click_next, sort_listing
+from common.browser_profile import lean_driver
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.tracing import span, start_tracing
+from common.waits import MeteredWait
 
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
+driver = lean_driver()
+
+def scraper(incremental=False, state_file=STATE_FILE, base_url=BASE_URL):
+    state = CrawlState(state_file) if incremental else None
+    pages_visited = 0
+    last_page = None
+    completed = False
 
-def scraper():
     try:
-        driver.get("https://bidplus.gem.gov.in/all-bids")
+        with span("driver.get"):
+            driver.get(base_url + "/all-bids")
 
         wait = WebDriverWait(driver, 150)
         processed_bids = set()
         card_index = 1  
 
+        if state is not None:
+            # Newest bids first, so the crawl can stop where the last run left off
+            WebDriverWait(driver, 100).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+            )
+            sort_listing(driver, NEWEST_FIRST_SORT)
+
         while True:
             try:
-                # Wait for cards to be present
-                cards = WebDriverWait(driver, 100).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                )
-                
-                for card in cards:
-                    try:
-                        bid_elements = card.find_elements(By.CSS_SELECTOR, ".bid_no_hover")
-                        
-                        if not bid_elements:
-                            continue
-                        
-                        bid_no_element = bid_elements[0]
-                        ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
+                with PAGE_SECONDS.time(scraper="gem"):
+                    # Wait for cards to be present
+                    MeteredWait(driver, 100, "cards").until(
+                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
+                    )
+                    with span("extract_cards"):
+                        listing = parse_listing(driver.page_source)
+                PAGES_FETCHED.inc(scraper="gem")
+                CARDS_PARSED.inc(len(listing["cards"]), scraper="gem")
+                pages_visited += 1
+                last_page = listing["last_page"] or last_page
+                reached_known_bids = False
 
-                        bid_no_text = bid_no_element.text.strip()
-                        bid_no_href = bid_no_element.get_attribute("href")
+                for card in listing["cards"]:
+                    if state is not None:
+                        known = state.is_known(card)
+                        reached_known_bids = state.observe(card)
+                        if reached_known_bids:
+                            break
+                        if known:
+                            continue
 
-                        ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-                        ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
-                        
-                        unique_bid_id = (bid_no_text, ra_no_text if ra_no_text else "")
+                    try:
+                        unique_bid_id = (card["bid_no"], card["ra_no"] if card["ra_no"] else "")
                         
                         if unique_bid_id in processed_bids:
                             continue
@@ -53,12 +71,12 @@ def scraper():
                         
                         output = (
                             f"Id: {card_index}\n"
-                            f"{card.text.strip()}\n"
-                            f"Bid No.: {bid_no_text} Link: {bid_no_href}\n"
+                            f"{card['text']}\n"
+                            f"Bid No.: {card['bid_no']} Link: {card['bid_link']}\n"
                         )
                         
-                        if ra_no_text:
-                            output += f"RA No.: {ra_no_text} Link: {ra_no_href}\n"
+                        if card["ra_no"]:
+                            output += f"RA No.: {card['ra_no']} Link: {card['ra_link']}\n"
                         
                         output += "-" * 100
                         
@@ -68,32 +86,63 @@ def scraper():
 
                     except Exception as e:
                         print(f"Error processing card: {e}")
+                        record_error("gem", e)
                         continue
                 
+                if reached_known_bids:
+                    print(f"Met {state.stop_after} already-known bids in a row on page {pages_visited}.")
+                    completed = True
+                    break
+
+                if not listing["has_next"]:
+                    print("No more pages.")
+                    completed = True
+                    break
+
                 # Navigate to next page
                 try:
                     next_button = driver.find_element(By.CSS_SELECTOR, "a.page-link.next")
                     
                     if "disabled" in next_button.get_attribute("class"):
                         print("No more pages.")
+                        completed = True
                         break
                     
-                    next_button.click()
-                    
-                    WebDriverWait(driver, 50).until(
-                        EC.staleness_of(cards[0])
-                    )
+                    click_next(driver, next_button)
                     
                 except Exception as e:
                     print(f"Error navigating to the next page: {e}")
+                    record_error("gem", e)
                     break
                 
             except Exception as e:
                 print(f"Error loading cards: {e}")
+                record_error("gem", e)
                 break
 
+        if state is not None:
+            # A failed run leaves the high-water mark alone so the next run covers the gap
+            if completed:
+                state.save()
+                print(f"Recorded {len(state.new_bids)} new bids.")
+            report_skipped_pages(pages_visited, last_page)
+
     finally:
         driver.quit()
 
 if __name__ == "__main__":
-    scraper()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crawl the GeM all-bids listing in a single browser")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Walk the listing newest-first and stop at bids captured by the previous run")
+    parser.add_argument("--state-file", default=STATE_FILE)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on this port (default: $SCRAPER_METRICS_PORT, off if unset)")
+    parser.add_argument("--trace", nargs="?", const="1",
+                        help="Record per-phase timing spans to this Chrome trace JSON, or under traces/ when no path is "
+                             "given (default: $SCRAPER_TRACE, off if unset)")
+    args = parser.parse_args()
+
+    serve_metrics(args.metrics_port)
+    start_tracing(args.trace)
+    scraper(args.incremental, args.state_file, args.base_url)
\ No newline at end of file
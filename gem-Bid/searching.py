@@ -1,29 +1,57 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+import argparse
 import time
-import re
+import os
+import sys
+import queue
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from card_parser import extract_listing
+from listing_client import LISTING_PATH, PAGE_SIZE, ListingClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.browser_profile import lean_driver
+from common.metrics import CARDS_PARSED, PAGES_FETCHED, PAGE_SECONDS, record_error, serve_metrics
+from common.tracing import span
+from common.waits import MeteredWait, page_change
+from pagination import CARD_SELECTOR, NEXT_PAGE_SCRIPT, RESULTS_CONTAINER
+from result_cache import CACHE_PATH, DEFAULT_TTL, ResultCache, cache_key, format_stats
+
+SEARCH_ENGINES = ("selenium", "http")
+
+
+def listing_base_url(url):
+    # "https://bidplus.gem.gov.in/all-bids" -> "https://bidplus.gem.gov.in"
+    url = url.rstrip("/")
+    return url[:-len(LISTING_PATH)] if url.endswith(LISTING_PATH) else url
+
 
 class BidCardExtractor:
-    def __init__(self, driver_path, url, output_file):
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--disable-gpu")  # For headless mode performance
-        chrome_options.add_argument("--no-sandbox")  # Additional performance option
-        chrome_options.add_argument("--disable-dev-shm-usage")  # Additional performance option
-        chrome_options.page_load_strategy = 'eager'
-        service = Service(driver_path)
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
+    def __init__(self, driver_path, url, output_file, driver=None, echo=True, on_card=None, cache=None):
+        # A driver passed in is borrowed, e.g. from a pool, and left open on close.
+        # Otherwise Chrome starts with the first page load, so the http engine and
+        # searches served from the cache never launch it.
+        self.driver = driver
+        self.driver_path = driver_path
+        self.owns_driver = driver is None
         self.url = url
         self.output_file = output_file
+        self.echo = echo
+        self.on_card = on_card
+        self.cache = cache
+        self.cards = []
         self.record_summary_printed = False
         self.total_records = None
 
+    def borrow_driver(self, driver):
+        self.driver = driver
+        self.owns_driver = False
+
     def open_webpage(self):
+        if self.driver is None:
+            self.driver = lean_driver(driver_path=self.driver_path)
         self.driver.get(self.url)
 
     def search_bid(self, search_keyword):
@@ -41,40 +69,12 @@ class BidCardExtractor:
         except Exception as e:
             self._print_and_write(f"An error occurred during the search: {e}")
 
-    def get_brief_item_details(self, card):
-        try:
-            item_detail_elements = card.find_elements(By.CSS_SELECTOR, "div.col-md-4 a[data-content]")
-            if item_detail_elements:
-                return [element.get_attribute("data-content").strip() for element in item_detail_elements]
-            else:
-                item_text = card.find_element(By.CSS_SELECTOR, "div.col-md-4 div:nth-of-type(1)").text.strip()
-                return [item_text]
-        except Exception as e:
-            self._print_and_write(f"Error occurred while getting brief item details: {e}")
-            return []
-
-    def extract_record_summary(self):
-        try:
-            summary_element = WebDriverWait(self.driver, 20).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, ".totalRecord span"))
-            )
-            summary_text = summary_element.text
-            match = re.search(r'of (\d+) records', summary_text)
-            if match:
-                self.total_records = int(match.group(1))
-                return self.total_records
-            else:
-                self._print_and_write("Could not extract the total number of records.")
-                return None
-        except Exception as e:
-            self._print_and_write(f"An error occurred while extracting the record summary: {e}")
-            return None
-
     def open_output_file(self):
         self.file = open(self.output_file, 'w', encoding='utf-8')
 
     def _print_and_write(self, text):
-        print(text)
+        if self.echo:
+            print(text)
         if hasattr(self, 'file'):
             self.file.write(text + '\n')
 
@@ -82,145 +82,231 @@ class BidCardExtractor:
         if hasattr(self, 'file'):
             self.file.close()
 
+    def extract_page(self, timeout=30):
+        # Every card, the record summary and the pager state in one script call,
+        # repeated until the cards have rendered
+        def cards_rendered(driver):
+            listing = extract_listing(driver)
+            return listing if listing["cards"] else False
+        return MeteredWait(self.driver, timeout, "cards").until(cards_rendered)
+
+    def write_card(self, card, card_number):
+        self._print_and_write(f"Id: {card_number}:")
+        self._print_and_write("-" * 100)
+
+        try:
+            self._print_and_write(f"  BID NO: {card['bid_no']}")
+            self._print_and_write(f"  BID NO Link: {card['bid_link']}")
+            if card["ra_no"]:
+                self._print_and_write(f"  RA No.: {card['ra_no']}")
+                self._print_and_write(f"  RA No. Link: {card['ra_link']}")
+            self._print_and_write(f"  Items: {', '.join(card['items'])}")
+            self._print_and_write(f"  Quantity: {card['quantity']}")
+            self._print_and_write(f"  Department Name and Address: {card['department']}")
+            self._print_and_write(f"  Start Date: {card['start_date']}")
+            self._print_and_write(f"  End Date: {card['end_date']}")
+            self._print_and_write("-" * 100)
+            if self.on_card is not None:
+                self.on_card(card)
+            self.cards.append(card)
+            return True
+        except Exception as card_error:
+            self._print_and_write(f"  Error extracting data for card {card_number}: {card_error}")
+            record_error("gem_search", card_error)
+            return False
+
+    def load_cached(self, search_keyword):
+        # Writes out a fresh cached result for the keyword; False means search as usual
+        if self.cache is None:
+            return False
+        cached = self.cache.get(cache_key(search_keyword, url=self.url))
+        if cached is None:
+            return False
+        self.total_records = cached["total_records"]
+        self._print_and_write(f"Total Records: {self.total_records}")
+        self.record_summary_printed = True
+        for number, card in enumerate(cached["cards"], start=1):
+            self.write_card(card, number)
+        self._print_and_write(f"Served from the result cache, searched {cached['age'] / 60:.1f} minutes ago.")
+        return True
+
+    def store_cached(self, search_keyword):
+        # Only complete results are cached; a search that lost pages is run again next time
+        if self.cache is None or self.total_records is None or len(self.cards) != self.total_records:
+            return False
+        return self.cache.put(cache_key(search_keyword, url=self.url), self.total_records, self.cards)
+
+    def run_search(self, search_keyword, engine="selenium", workers=8):
+        search_keyword = search_keyword.strip()
+        self.open_output_file()
+        if self.load_cached(search_keyword):
+            return len(self.cards)
+        if engine == "http":
+            self.extract_all_pages(search_keyword, workers)
+        else:
+            self.open_webpage()
+            self.search_bid(search_keyword)
+            self.extract_and_print_cards()
+        self.store_cached(search_keyword)
+        return len(self.cards)
+
+    def extract_all_pages(self, search_keyword, workers=8):
+        # Page 1 gives the record total and so the page count; the rest are
+        # fetched at once over the listing XHR, each worker on its own session,
+        # and written in page order until exactly total_records cards are out
+        base_url = listing_base_url(self.url)
+        clients = queue.Queue()
+        for _ in range(workers):
+            clients.put(ListingClient(base_url))
+
+        def fetch(page_num):
+            client = clients.get()
+            try:
+                with PAGE_SECONDS.time(scraper="gem_search"), span("fetch_page", page=page_num):
+                    listing = client.fetch_page(page_num, search_keyword=search_keyword)
+            except Exception as e:
+                print(f"Error fetching page {page_num}: {e}")
+                record_error("gem_search", e)
+                return None
+            finally:
+                clients.put(client)
+            PAGES_FETCHED.inc(scraper="gem_search")
+            CARDS_PARSED.inc(len(listing["cards"]), scraper="gem_search")
+            return listing
+
+        processed_card_count = 0
+        try:
+            first_page = fetch(1)
+            if first_page is None:
+                self._print_and_write("Could not load the first page of results.")
+                return processed_card_count
+            self.total_records = first_page["total_records"]
+            if self.total_records is None:
+                self._print_and_write("Could not extract the total number of records.")
+                return processed_card_count
+            self._print_and_write(f"Total Records: {self.total_records}")
+            self.record_summary_printed = True
+
+            last_page = -(-self.total_records // PAGE_SIZE)
+            seen = set()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map yields in page order, so each page is written as soon as the ones before it are
+                for listing in itertools.chain([first_page], executor.map(fetch, range(2, last_page + 1))):
+                    if listing is None:
+                        continue
+                    for card in listing["cards"]:
+                        # Bids published mid-search shift the pages, so a card can turn up twice
+                        key = (card["bid_no"], card["ra_no"])
+                        if key in seen:
+                            continue
+                        seen.add(key)
+                        if self.write_card(card, len(seen)):
+                            processed_card_count += 1
+                        if len(seen) >= self.total_records:
+                            self._print_and_write("All records have been successfully extracted.")
+                            return processed_card_count
+
+            self._print_and_write("Extraction completed, but not all records were processed.")
+            return processed_card_count
+        finally:
+            while not clients.empty():
+                clients.get().close()
+
     def extract_and_print_cards(self):
-        total_card_count = 0
         processed_card_count = 0
         failed_pages_count = 0
         max_failed_pages = 2
+        seen = set()
 
         while True:
             try:
+                page_start_time = time.time()
+                listing = self.extract_page()
+
                 if not self.record_summary_printed:
-                    record_summary = self.extract_record_summary()
-                    if record_summary is not None:
-                        self._print_and_write(f"Total Records: {record_summary}")
+                    if listing["total_records"] is not None:
+                        self.total_records = listing["total_records"]
+                        self._print_and_write(f"Total Records: {self.total_records}")
                         self.record_summary_printed = True
-
-                try:
-                    cards = WebDriverWait(self.driver, 30).until(
-                        EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                    )
-                    if not cards:
-                        self._print_and_write("No cards found on this page.")
-                        failed_pages_count += 1
-                        if failed_pages_count >= max_failed_pages:
-                            self._print_and_write("Skipped multiple pages due to loading errors.")
-                            break
+                    else:
+                        self._print_and_write("Could not extract the total number of records.")
+
+                PAGE_SECONDS.observe(time.time() - page_start_time, scraper="gem_search")
+                PAGES_FETCHED.inc(scraper="gem_search")
+                CARDS_PARSED.inc(len(listing["cards"]), scraper="gem_search")
+
+                new_cards = 0
+                for card in listing["cards"]:
+                    # After a failed page change the same page is read again, so skip what's already written
+                    key = (card["bid_no"], card["ra_no"])
+                    if key in seen:
                         continue
+                    seen.add(key)
+                    new_cards += 1
+                    if self.write_card(card, len(seen)):
+                        processed_card_count += 1
+
+                        if self.total_records is not None and processed_card_count >= self.total_records:
+                            self._print_and_write("All records have been successfully extracted.")
+                            return processed_card_count
+                if new_cards:
                     failed_pages_count = 0
 
-                    page_card_count = len(cards)
-                    start_card_number = total_card_count + 1
-
-                    for index, card in enumerate(cards):
-                        current_card_number = start_card_number + index
-                        self._print_and_write(f"Id: {current_card_number}:")
-                        self._print_and_write("-" * 100)
-
-                        try:
-                            item_details = self.get_brief_item_details(card)
-                            bid_elements = card.find_elements(By.CSS_SELECTOR, "p.bid_no.pull-left a.bid_no_hover")
-
-                            if not bid_elements:
-                                continue
-
-                            bid_no_element = bid_elements[0]
-                            ra_no_element = bid_elements[1] if len(bid_elements) > 1 else None
-
-                            bid_no_text = bid_no_element.text.strip()
-                            bid_no_href = bid_no_element.get_attribute("href")
-
-                            ra_no_text = ra_no_element.text.strip() if ra_no_element else None
-                            ra_no_href = ra_no_element.get_attribute("href") if ra_no_element else None
-
-                            quantity_element = card.find_element(By.CSS_SELECTOR, "div.col-md-4 div:nth-of-type(2)")
-                            quantity = quantity_element.text.split(":", 1)[-1].strip()
-
-                            department_element = card.find_element(By.CSS_SELECTOR, "div.col-md-5 div:nth-of-type(2)")
-                            department_lines = department_element.text.strip().split("\n")
-                            department = ", ".join(department_lines)
-
-                            start_date_element = card.find_element(By.CSS_SELECTOR, "div.col-md-3 .start_date")
-                            start_date = start_date_element.text.strip()
+                if not listing["has_next"]:
+                    self._print_and_write("No more pages.")
+                    break
 
-                            end_date_element = card.find_element(By.CSS_SELECTOR, "div.col-md-3 .end_date")
-                            end_date = end_date_element.text.strip()
-
-                            self._print_and_write(f"  BID NO: {bid_no_text}")
-                            self._print_and_write(f"  BID NO Link: {bid_no_href}")
-                            if ra_no_text:
-                                self._print_and_write(f"  RA No.: {ra_no_text}")
-                                self._print_and_write(f"  RA No. Link: {ra_no_href}")
-                            self._print_and_write(f"  Items: {', '.join(item_details)}")
-                            self._print_and_write(f"  Quantity: {quantity}")
-                            self._print_and_write(f"  Department Name and Address: {department}")
-                            self._print_and_write(f"  Start Date: {start_date}")
-                            self._print_and_write(f"  End Date: {end_date}")
-                            self._print_and_write("-" * 100)
-
-                            processed_card_count += 1
-
-                            if self.total_records is not None and processed_card_count >= self.total_records:
-                                self._print_and_write("All records have been successfully extracted.")
-                                return
-
-                        except Exception as card_error:
-                            self._print_and_write(f"  Error extracting data for card {current_card_number}: {card_error}")
-
-                    total_card_count += page_card_count
-
-                    try:
-                        next_button = WebDriverWait(self.driver, 30).until(
-                            EC.element_to_be_clickable((By.CSS_SELECTOR, "a.page-link.next"))
-                        )
-
-                        if "disabled" in next_button.get_attribute("class"):
-                            self._print_and_write("No more pages.")
-                            break
-
-                        self.driver.execute_script("arguments[0].click();", next_button)
-                        WebDriverWait(self.driver, 30).until(
-                            EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".card"))
-                        )
-
-                    except Exception as nav_error:
-                        self._print_and_write(f"Error navigating to the next page: {nav_error}")
-                        failed_pages_count += 1
-                        if failed_pages_count >= max_failed_pages:
-                            self._print_and_write("Skipped multiple pages due to loading errors.")
-                            break
-
-                except Exception as page_error:
-                    self._print_and_write(f"An error occurred while extracting cards: {page_error}")
+                try:
+                    with page_change(self.driver, RESULTS_CONTAINER, CARD_SELECTOR, timeout=30):
+                        self.driver.execute_script(NEXT_PAGE_SCRIPT)
+                except Exception as nav_error:
+                    # The next page may still have arrived late; reading the listing again tells
+                    self._print_and_write(f"Error navigating to the next page: {nav_error}")
+                    record_error("gem_search", nav_error)
                     failed_pages_count += 1
-                    if failed_pages_count >= max_failed_pages:
-                        self._print_and_write("Skipped multiple pages due to loading errors.")
-                        break
 
-            except Exception as e:
-                self._print_and_write(f"An unexpected error occurred: {e}")
+            except Exception as page_error:
+                self._print_and_write(f"An error occurred while extracting cards: {page_error}")
+                record_error("gem_search", page_error)
+                failed_pages_count += 1
 
+            if failed_pages_count >= max_failed_pages:
+                self._print_and_write("Skipped multiple pages due to loading errors.")
+                break
 
+        return processed_card_count
 
     def close(self):
-        self.driver.quit()
+        if self.owns_driver and self.driver is not None:
+            self.driver.quit()
         self.close_output_file()
 
 if __name__ == "__main__":
-    url = "https://bidplus.gem.gov.in/all-bids"  # Update with the actual URL
-    driver_path = ChromeDriverManager().install()
-    output_file = "output/without_multiprocessing.txt"  # Path to the output file
-    extractor = BidCardExtractor(driver_path, url, output_file)
+    parser = argparse.ArgumentParser(description="Search the GeM all-bids listing for a keyword and save every matching card")
+    parser.add_argument("--url", default="https://bidplus.gem.gov.in/all-bids")
+    parser.add_argument("--keyword", help="Search keyword, asked for when omitted")
+    parser.add_argument("--output", default="output/without_multiprocessing.txt")
+    parser.add_argument("--engine", choices=SEARCH_ENGINES, default="selenium",
+                        help="selenium pages through the results in Chrome, http fetches every result page at once over the listing XHR")
+    parser.add_argument("--workers", type=int, default=8, help="Result pages fetched at once (http engine)")
+    parser.add_argument("--cache", default=CACHE_PATH, help="Result cache database; a repeat search within --cache-ttl is served from it")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Seconds a cached result stays fresh")
+    parser.add_argument("--no-cache", action="store_true", help="Always search the portal")
+    args = parser.parse_args()
+
+    serve_metrics()
+    cache = None if args.no_cache else ResultCache(args.cache, args.cache_ttl)
+    extractor = BidCardExtractor(None, args.url, args.output, cache=cache)
     
     try:
-        search_keyword = input("Enter the search keyword: ").strip()  # Get user input
+        search_keyword = args.keyword if args.keyword is not None else input("Enter the search keyword: ").strip()  # Get user input
         start_time = time.time()
-        extractor.open_webpage()
-        extractor.search_bid(search_keyword)
-        extractor.open_output_file()  # Open the output file
-        extractor.extract_and_print_cards()
+        extractor.run_search(search_keyword, args.engine, args.workers)
         end_time = time.time()  
         elapsed_time = end_time - start_time
         extractor._print_and_write(f"Total elapsed time: {elapsed_time:.2f} seconds")
     finally:
         extractor.close()
+        if cache is not None:
+            print(format_stats(cache.stats()))
+            cache.close()
@@ -0,0 +1,74 @@
+import hashlib
+import multiprocessing
+
+EMPTY = 0
+
+
+def fingerprint(bid_id):
+    # 64-bit fingerprints keep every slot a fixed-size integer; at 1M ids the
+    # chance of any collision is around 1 in 30 million
+    if isinstance(bid_id, tuple):
+        bid_id = "\x1f".join(part or "" for part in bid_id)
+    value = int.from_bytes(hashlib.blake2b(bid_id.encode("utf-8"), digest_size=8).digest(), "little")
+    return value or 1
+
+
+class SharedSeenSet:
+    # Open-addressing hash set in shared memory, split into stripes that each
+    # have their own lock. Lookups take no lock at all and inserts only lock
+    # the stripe the id hashes to, so workers rarely wait on each other.
+
+    def __init__(self, capacity=1_000_000, stripes=64):
+        slots_per_stripe = 1
+        # Keep the load factor at or below one half so probe runs stay short
+        while slots_per_stripe * stripes < capacity * 2:
+            slots_per_stripe *= 2
+
+        self.stripes = stripes
+        self.slots_per_stripe = slots_per_stripe
+        self.mask = slots_per_stripe - 1
+        self.table = multiprocessing.RawArray('Q', stripes * slots_per_stripe)
+        self.counts = multiprocessing.RawArray('Q', stripes)
+        self.locks = [multiprocessing.Lock() for _ in range(stripes)]
+
+    def _probe(self, value):
+        stripe = value % self.stripes
+        base = stripe * self.slots_per_stripe
+        slot = (value >> 32) & self.mask
+        return stripe, base, slot
+
+    def __contains__(self, bid_id):
+        value = fingerprint(bid_id)
+        stripe, base, slot = self._probe(value)
+        for _ in range(self.slots_per_stripe):
+            current = self.table[base + slot]
+            if current == value:
+                return True
+            if current == EMPTY:
+                return False
+            slot = (slot + 1) & self.mask
+        return False
+
+    def add(self, bid_id):
+        # Returns True when the id was not seen before, so callers can
+        # check-and-insert in one step
+        value = fingerprint(bid_id)
+        stripe, base, slot = self._probe(value)
+        with self.locks[stripe]:
+            for _ in range(self.slots_per_stripe):
+                current = self.table[base + slot]
+                if current == value:
+                    return False
+                if current == EMPTY:
+                    self.table[base + slot] = value
+                    self.counts[stripe] += 1
+                    return True
+                slot = (slot + 1) & self.mask
+        raise RuntimeError(f"SharedSeenSet stripe {stripe} is full, increase capacity")
+
+    def update(self, bid_ids):
+        for bid_id in bid_ids:
+            self.add(bid_id)
+
+    def __len__(self):
+        return sum(self.counts)
@@ -0,0 +1,361 @@
+import os
+import json
+import time
+import glob
+import queue
+import sqlite3
+import multiprocessing
+from dataclasses import dataclass, field, asdict
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+except ImportError:
+    pyarrow = None
+
+from bid_index import BidIndex
+from common.metrics import BYTES_WRITTEN, serve_metrics
+from common.tracing import flush_tracing, span
+
+SINK_FORMATS = ("text", "jsonl", "sqlite", "parquet", "index")
+EXTENSION_FORMATS = {
+    ".txt": "text",
+    ".jsonl": "jsonl",
+    ".db": "sqlite",
+    ".sqlite": "sqlite",
+    ".parquet": "parquet",
+}
+
+
+@dataclass
+class BidRecord:
+    page: int
+    index: int
+    bid_no: str
+    bid_link: str = None
+    ra_no: str = None
+    ra_link: str = None
+    items: list = field(default_factory=list)
+    quantity: str = None
+    department: str = None
+    start_date: str = None
+    end_date: str = None
+    text: str = ""
+
+    @classmethod
+    def from_card(cls, card, page, index):
+        return cls(
+            page=page,
+            index=index,
+            bid_no=card["bid_no"],
+            bid_link=card["bid_link"],
+            ra_no=card["ra_no"],
+            ra_link=card["ra_link"],
+            items=list(card["items"]),
+            quantity=card["quantity"],
+            department=card["department"],
+            start_date=card["start_date"],
+            end_date=card["end_date"],
+            text=card["text"],
+        )
+
+    @property
+    def key(self):
+        return (self.bid_no, self.ra_no or "")
+
+    def to_text(self):
+        output = (
+            f"Page: {self.page}\n"
+            f"Id: {self.index}\n"
+            f"{self.text}\n"
+            f"Bid No.: {self.bid_no} Link: {self.bid_link}\n"
+            f"Item Details: {', '.join(self.items)}\n"
+        )
+        if self.ra_no:
+            output += f"RA No.: {self.ra_no} Link: {self.ra_link}\n"
+        output += "-" * 100 + "\n"
+        return output
+
+
+class FileSink:
+    # Append-only file; positions are byte offsets
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "a", encoding="utf-8")
+
+    def format_record(self, record):
+        raise NotImplementedError
+
+    def write(self, records):
+        self.file.write("".join(self.format_record(record) for record in records))
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def tell(self):
+        self.file.flush()
+        return self.file.tell()
+
+    def truncate(self, position):
+        self.file.flush()
+        if self.file.tell() > position:
+            self.file.truncate(position)
+            self.file.seek(position)
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+
+class TextSink(FileSink):
+    def format_record(self, record):
+        return record.to_text()
+
+
+class JsonlSink(FileSink):
+    def format_record(self, record):
+        return json.dumps(asdict(record), ensure_ascii=False) + "\n"
+
+
+class SqliteSink:
+    # One row per (bid_no, ra_no); positions are rowids and sync is the commit
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS bids (
+                row INTEGER PRIMARY KEY,
+                page INTEGER,
+                idx INTEGER,
+                bid_no TEXT NOT NULL,
+                bid_link TEXT,
+                ra_no TEXT NOT NULL DEFAULT '',
+                ra_link TEXT,
+                items TEXT,
+                quantity TEXT,
+                department TEXT,
+                start_date TEXT,
+                end_date TEXT,
+                text TEXT,
+                UNIQUE (bid_no, ra_no)
+            )
+        """)
+        self.connection.commit()
+
+    def write(self, records):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO bids (page, idx, bid_no, bid_link, ra_no, ra_link, items, quantity, department, start_date, end_date, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (record.page, record.index, record.bid_no, record.bid_link, record.ra_no or "", record.ra_link,
+                 json.dumps(record.items, ensure_ascii=False), record.quantity, record.department,
+                 record.start_date, record.end_date, record.text)
+                for record in records
+            ],
+        )
+
+    def sync(self):
+        self.connection.commit()
+
+    def tell(self):
+        return self.connection.execute("SELECT COALESCE(MAX(row), 0) FROM bids").fetchone()[0]
+
+    def truncate(self, position):
+        self.connection.execute("DELETE FROM bids WHERE row > ?", (position,))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+
+class ParquetSink:
+    # A Parquet file can't be appended to, so the path is a directory and every
+    # sync writes one part file; positions are part counts
+
+    def __init__(self, path):
+        if pyarrow is None:
+            raise ImportError("The parquet sink needs pyarrow, install it with: pip install pyarrow")
+        self.path = path
+        self.rows = []
+        os.makedirs(path, exist_ok=True)
+        self.parts = len(self._part_paths())
+
+    def _part_paths(self):
+        return sorted(glob.glob(os.path.join(self.path, "part-*.parquet")))
+
+    def write(self, records):
+        self.rows.extend(asdict(record) for record in records)
+
+    def sync(self):
+        if not self.rows:
+            return
+        self.parts += 1
+        part_path = os.path.join(self.path, f"part-{self.parts:06d}.parquet")
+        pq.write_table(pyarrow.Table.from_pylist(self.rows), part_path + ".tmp")
+        os.replace(part_path + ".tmp", part_path)
+        self.rows = []
+
+    def tell(self):
+        return self.parts
+
+    def truncate(self, position):
+        self.rows = []
+        for part_path in self._part_paths()[position:]:
+            os.remove(part_path)
+        self.parts = len(self._part_paths())
+
+    def close(self):
+        self.sync()
+
+
+class IndexSink:
+    # Full-text index that bid_index.py searches; positions are rowids and sync is the commit
+
+    def __init__(self, path):
+        self.path = path
+        self.index = BidIndex(path)
+
+    def write(self, records):
+        self.index.add([asdict(record) for record in records])
+
+    def sync(self):
+        self.index.commit()
+
+    def tell(self):
+        return self.index.last_row()
+
+    def truncate(self, position):
+        self.index.delete_after(position)
+
+    def close(self):
+        self.index.close()
+
+
+SINK_CLASSES = {
+    "text": TextSink,
+    "jsonl": JsonlSink,
+    "sqlite": SqliteSink,
+    "parquet": ParquetSink,
+    "index": IndexSink,
+}
+
+
+def sink_format(path, format=None):
+    if format:
+        return format
+    return EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def open_sink(path, format=None):
+    return SINK_CLASSES[sink_format(path, format)](path)
+
+
+def sink_position(path, format=None):
+    sink = open_sink(path, format)
+    try:
+        return sink.tell()
+    finally:
+        sink.close()
+
+
+def output_size(path):
+    # Parquet output is a directory of parts, the other sinks a single file
+    if os.path.isdir(path):
+        return sum(os.path.getsize(part) for part in glob.glob(os.path.join(path, "*")) if os.path.isfile(part))
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def run_writer(record_queue, path, format, batch_size, flush_interval, fsync_interval, checkpoints, truncate_to,
+               metrics_offset=None):
+    if metrics_offset is not None:
+        serve_metrics(offset=metrics_offset)
+    sink = open_sink(path, format)
+    if truncate_to is not None:
+        sink.truncate(truncate_to)
+    last_size = output_size(path)
+
+    checkpoints = {checkpoint.path: checkpoint for checkpoint in checkpoints or []}
+    pending = []
+    progress = []
+    last_write = last_sync = time.time()
+    stopping = False
+
+    try:
+        while not stopping:
+            try:
+                message = record_queue.get(timeout=flush_interval)
+            except queue.Empty:
+                message = ([], None)
+
+            if message is None:
+                stopping = True
+            else:
+                records, page_progress = message
+                pending.extend(records)
+                if page_progress is not None:
+                    progress.append(page_progress)
+
+            now = time.time()
+            syncing = stopping or now - last_sync >= fsync_interval
+            if pending and (syncing or len(pending) >= batch_size or now - last_write >= flush_interval):
+                with span("write", sink=format, records=len(pending)):
+                    sink.write(pending)
+                pending = []
+                last_write = now
+
+            if syncing:
+                with span("sync", sink=format):
+                    sink.sync()
+                last_sync = now
+                size = output_size(path)
+                BYTES_WRITTEN.inc(max(size - last_size, 0), sink=format)
+                last_size = size
+                # Checkpoints only move once the pages they cover are on disk
+                if progress:
+                    output_offset = sink.tell()
+                    for page_progress in progress:
+                        checkpoints[page_progress["shard"]].record_page(page_progress, output_offset)
+                    for shard in {page_progress["shard"] for page_progress in progress}:
+                        checkpoints[shard].save()
+                    progress = []
+    finally:
+        sink.close()
+        flush_tracing()
+
+
+class SinkWriter:
+    # Single writer that owns the output: crawlers put typed records on the
+    # queue and this process batches them into the sink
+
+    def __init__(self, path, format=None, batch_size=500, flush_interval=1.0, fsync_interval=5.0,
+                 checkpoints=None, truncate_to=None, queue_size=1000, metrics_offset=None):
+        self.path = path
+        self.format = sink_format(path, format)
+        self.queue = multiprocessing.Queue(queue_size)
+        self.process = multiprocessing.Process(
+            target=run_writer,
+            args=(self.queue, path, self.format, batch_size, flush_interval, fsync_interval, checkpoints, truncate_to,
+                  metrics_offset),
+        )
+
+    def start(self):
+        self.process.start()
+        return self.queue
+
+    def close(self):
+        self.queue.put(None)
+        self.process.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def emit(record_queue, records, progress=None):
+    record_queue.put((list(records), progress))
@@ -0,0 +1,418 @@
+import os
+import copy
+import json
+import time
+import random
+import secrets
+import argparse
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlparse
+
+from lxml import html as lxml_html
+
+from card_parser import CARD_XPATH, BID_LINK_XPATH
+from listing_client import CSRF_FIELD, CSRF_COOKIE, DEFAULT_FILTER, FILTER_DATE_FORMAT, LISTING_PATH, LISTING_DATA_PATH, PAGE_SIZE
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "html")
+FIXTURES = ["bid_container.html", "after_search_container.html"]
+
+# Every stand-in record gets a fixed bid type and end date, so the sidebar
+# filters and end-date sorts select real, disjoint subsets
+BID_TYPES = ["product", "product", "service", "product", "bidToRA", "service", "product"]
+END_DATE_START = datetime(2024, 9, 1, 9, 0)
+END_DATE_SPAN = 400
+
+
+def record_type(record_number):
+    return BID_TYPES[record_number % len(BID_TYPES)]
+
+
+def record_end_date(record_number):
+    # Bunched towards the near future like the live listing: most bids close within weeks
+    offset = (record_number * 7919) % END_DATE_SPAN
+    days = offset * offset // END_DATE_SPAN
+    return END_DATE_START + timedelta(days=days, hours=record_number % 9)
+
+
+def load_card_templates():
+    templates = []
+    for fixture in FIXTURES:
+        with open(os.path.join(FIXTURE_DIR, fixture), encoding="utf-8") as f:
+            document = lxml_html.fromstring(f.read())
+        templates.extend(document.xpath(CARD_XPATH))
+    return templates
+
+
+def render_card(template, record_number):
+    card = copy.deepcopy(template)
+    bid_id = 7000000 + record_number
+    bid_link = card.xpath(BID_LINK_XPATH)[0]
+    bid_link.text = f"GEM/2024/B/{5000000 + record_number}"
+    bid_link.set("href", f"/showbidDocument/{bid_id}")
+    for element in card.xpath(".//*[@data-bid]"):
+        element.set("data-bid", str(bid_id))
+        element.set("id", f"other-details-{bid_id}")
+        element.set("onclick", f"getOtherDetails({bid_id})")
+    end_date = record_end_date(record_number)
+    for element in card.xpath(".//span[@class='end_date']"):
+        element.text = f"{end_date:%d-%m-%Y} {end_date.hour % 12 or 12}:{end_date:%M %p}"
+    return lxml_html.tostring(card, encoding="unicode")
+
+
+def render_pagination(page_num, last_page):
+    links = []
+    if page_num > 1:
+        links.append(f'<a href="#page-{page_num - 1}" class="page-link prev">Prev</a>')
+    else:
+        links.append('<span class="current prev">Prev</span>')
+
+    shown = sorted({1, 2, last_page - 1, last_page} | set(range(page_num - 2, page_num + 3)))
+    previous = 0
+    for number in shown:
+        if number < 1 or number > last_page:
+            continue
+        if number - previous > 1:
+            links.append('<span class="ellipse">…</span>')
+        if number == page_num:
+            links.append(f'<span class="current">{number}</span>')
+        else:
+            links.append(f'<a href="#page-{number}" class="page-link">{number}</a>')
+        previous = number
+
+    if page_num < last_page:
+        links.append(f'<a href="#page-{page_num + 1}" class="page-link next">Next</a>')
+    else:
+        links.append('<span class="current next">Next</span>')
+
+    return f'<div id="light-pagination" class="pagination2 light-theme">{"".join(links)}</div>'
+
+
+# Enough of the portal's front end for Selenium crawls: the search box, the
+# hidden sort links, page links, and the simplePagination selectPage call,
+# all posting the same payload to the listing XHR and swapping #bidCard
+LISTING_SCRIPT = """
+(function () {
+    var state = {page: 1, keyword: "", filter: %(filter)s};
+
+    function loadPage(page) {
+        var payload = {page: page, param: {searchBid: state.keyword, searchType: "fullText"}, filter: state.filter};
+        var body = new URLSearchParams({payload: JSON.stringify(payload)});
+        body.append("%(csrf_field)s", document.querySelector('input[name="%(csrf_field)s"]').value);
+        fetch("%(data_path)s", {method: "POST", body: body, credentials: "same-origin"})
+            .then(function (response) {
+                if (!response.ok) { throw new Error("HTTP " + response.status); }
+                return response.text();
+            })
+            .then(function (html) {
+                state.page = page;
+                document.getElementById("bidCard").innerHTML = html;
+            })
+            .catch(function (error) { console.log("Listing request failed: " + error); });
+    }
+
+    window.jQuery = function (selector) {
+        var found = document.querySelectorAll(selector);
+        return {
+            length: found.length,
+            pagination: function (method, page) {
+                if (method === "selectPage") { loadPage(page); }
+                return this;
+            }
+        };
+    };
+    window.jQuery.fn = {pagination: true};
+
+    document.addEventListener("click", function (event) {
+        var link = event.target.closest("#light-pagination a.page-link");
+        if (link) {
+            event.preventDefault();
+            if (link.classList.contains("next")) { loadPage(state.page + 1); }
+            else if (link.classList.contains("prev")) { loadPage(state.page - 1); }
+            else { loadPage(parseInt(link.textContent.trim(), 10)); }
+            return;
+        }
+        var sort = event.target.closest(".sort-link");
+        if (sort) {
+            event.preventDefault();
+            state.filter.sort = sort.id;
+            loadPage(1);
+        }
+    });
+
+    document.getElementById("searchBid").addEventListener("keydown", function (event) {
+        if (event.key !== "Enter") { return; }
+        state.keyword = this.value.trim();
+        // The portal clears the results while a search loads
+        document.getElementById("bidCard").innerHTML = "";
+        loadPage(1);
+    });
+})();
+"""
+
+SORTS = ["Bid-End-Date-Oldest", "Bid-End-Date-Latest", "Bid-Start-Date-Latest", "Bid-Start-Date-Oldest"]
+DOCUMENT_PATHS = ("/showbidDocument/", "/showradocumentPdf/")
+DOCUMENT_SIZE = 64 * 1024
+
+
+def render_document(path):
+    # A small but valid PDF per document id, padded with a comment to a realistic size
+    header = f"%PDF-1.4\n% GeM stand-in document {path}\n".encode("utf-8")
+    body = (b"1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+            b"2 0 obj << /Type /Pages /Kids [] /Count 0 >> endobj\n"
+            b"trailer << /Root 1 0 R >>\n")
+    padding = b"%" + b"0" * max(DOCUMENT_SIZE - len(header) - len(body) - 8, 0) + b"\n"
+    return header + padding + body + b"%%EOF\n"
+
+
+class StandinListing:
+    def __init__(self, pages=50):
+        self.pages = pages
+        self.total_records = pages * PAGE_SIZE
+        self.templates = load_card_templates()
+        self.template_text = [" ".join(template.text_content().split()).lower() for template in self.templates]
+
+    def select_records(self, filters=None, keyword=""):
+        filters = filters or {}
+        records = range(1, self.total_records + 1)
+
+        if keyword:
+            # A record matches when the card it is rendered from mentions the keyword
+            keyword = keyword.lower()
+            records = [record_number for record_number in records
+                       if keyword in self.template_text[record_number % len(self.templates)]]
+
+        by_type = filters.get("byType") or "all"
+        if by_type != "all":
+            records = [record_number for record_number in records if record_type(record_number) == by_type]
+
+        by_end_date = filters.get("byEndDate") or {}
+        if by_end_date.get("from"):
+            first_day = datetime.strptime(by_end_date["from"], FILTER_DATE_FORMAT)
+            records = [record_number for record_number in records if record_end_date(record_number) >= first_day]
+        if by_end_date.get("to"):
+            # The to-date is inclusive, so anything before the next midnight matches
+            after_last_day = datetime.strptime(by_end_date["to"], FILTER_DATE_FORMAT) + timedelta(days=1)
+            records = [record_number for record_number in records if record_end_date(record_number) < after_last_day]
+
+        sort = filters.get("sort")
+        if sort in ("Bid-End-Date-Oldest", "Bid-End-Date-Latest"):
+            records = sorted(records, key=lambda record_number: (record_end_date(record_number), record_number),
+                             reverse=sort == "Bid-End-Date-Latest")
+        return list(records)
+
+    def render_page(self, page_num, filters=None, keyword=""):
+        records = self.select_records(filters, keyword)
+        last_page = max(1, -(-len(records) // PAGE_SIZE))
+        page_num = max(1, min(page_num, last_page))
+        page_records = records[(page_num - 1) * PAGE_SIZE:page_num * PAGE_SIZE]
+        first_record = (page_num - 1) * PAGE_SIZE + 1 if page_records else 0
+        last_record = first_record + len(page_records) - 1 if page_records else 0
+        cards = [
+            render_card(self.templates[record_number % len(self.templates)], record_number)
+            for record_number in page_records
+        ]
+        return (
+            '<div class="row row-flex"><div class="col-md-6 totalRecord">'
+            f'<span class="pos-bottom">Showing {first_record} - {last_record} records of {len(records)} records</span>'
+            '</div></div>'
+            + "".join(cards)
+            + '<div class="clearfix"></div>'
+            + render_pagination(page_num, last_page)
+        )
+
+    def render_listing(self, csrf_token):
+        script = LISTING_SCRIPT % {
+            "filter": json.dumps(DEFAULT_FILTER),
+            "csrf_field": CSRF_FIELD,
+            "data_path": LISTING_DATA_PATH,
+        }
+        sort_links = "".join(f'<li><a href="#" id="{sort}" class="sort-link">{sort}</a></li>' for sort in SORTS)
+        return (
+            "<!DOCTYPE html><html><head><title>GeM Bidplus stand-in</title></head><body>"
+            f'<input type="hidden" name="{CSRF_FIELD}" value="{csrf_token}">'
+            '<input type="text" id="searchBid" name="searchBid" placeholder="Enter Keyword">'
+            f'<ul class="dropdown-menu" style="display:none">{sort_links}</ul>'
+            f'<div class="col-md-10 bids" id="bidCard">{self.render_page(1, DEFAULT_FILTER)}</div>'
+            f"<script>{script}</script>"
+            "</body></html>"
+        )
+
+
+class StandinLatency:
+    # Injected response delay: a fixed base plus a penalty for every request
+    # in flight beyond `capacity`, so piling on more workers makes it slower
+    def __init__(self, base=0.0, capacity=None, overload=0.1):
+        self.base = base
+        self.capacity = capacity
+        self.overload = overload
+        self.inflight = 0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        with self.lock:
+            self.inflight += 1
+            excess = self.inflight - self.capacity if self.capacity else 0
+        time.sleep(self.base + max(excess, 0) * self.overload)
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.lock:
+            self.inflight -= 1
+
+
+class StandinFailures:
+    # Injected errors: a seeded share of listing requests answer 503 instead of a page
+    def __init__(self, rate=0.0, seed=None):
+        self.rate = rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def __call__(self):
+        if not self.rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.rate
+
+
+class StandinStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"listing_loads": 0, "pages_served": 0, "documents_served": 0, "failures": 0}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.counts)
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    listing = None
+    sessions = None
+    latency = None
+    failures = None
+    stats = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body if isinstance(body, bytes) else body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _cookie(self, name):
+        for part in self.headers.get("Cookie", "").split(";"):
+            key, _, value = part.strip().partition("=")
+            if key == name:
+                return value
+        return None
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path.startswith(DOCUMENT_PATHS):
+            self.send_document(path)
+            return
+        if path != LISTING_PATH:
+            self._send(404, "Not Found")
+            return
+
+        if self.failures():
+            self.stats.count("failures")
+            self._send(503, "Service Unavailable")
+            return
+
+        csrf_token = secrets.token_hex(16)
+        self.sessions.add(csrf_token)
+        self.stats.count("listing_loads")
+        self._send(200, self.listing.render_listing(csrf_token), headers={
+            "Set-Cookie": f"{CSRF_COOKIE}={csrf_token}; Path=/",
+        })
+
+    def send_document(self, path):
+        if self.failures():
+            self.stats.count("failures")
+            self._send(503, "Service Unavailable")
+            return
+        with self.latency:
+            body = render_document(path)
+        self.stats.count("documents_served")
+        # Named the way the portal names its downloads
+        document_id = path.rstrip("/").split("/")[-1]
+        self._send(200, body, content_type="application/pdf", headers={
+            "Content-Disposition": f'attachment; filename="GeM-Bidding-{document_id}.pdf"',
+        })
+
+    def do_POST(self):
+        if urlparse(self.path).path != LISTING_DATA_PATH:
+            self._send(404, "Not Found")
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        csrf_token = form.get(CSRF_FIELD, [""])[0]
+        if csrf_token not in self.sessions or self._cookie(CSRF_COOKIE) != csrf_token:
+            self._send(403, "Invalid CSRF token")
+            return
+
+        payload = json.loads(form.get("payload", ["{}"])[0])
+        keyword = (payload.get("param") or {}).get("searchBid") or ""
+        with self.latency:
+            if self.failures():
+                self.stats.count("failures")
+                self._send(503, "Service Unavailable")
+                return
+            body = self.listing.render_page(int(payload.get("page", 1)), payload.get("filter"), keyword)
+        self.stats.count("pages_served")
+        self._send(200, body)
+
+
+def make_server(port=0, pages=50, host="127.0.0.1", latency=None, failures=None):
+    handler = type("Handler", (StandinHandler,), {
+        "listing": StandinListing(pages),
+        "sessions": set(),
+        "latency": latency or StandinLatency(),
+        "failures": failures or StandinFailures(),
+        "stats": StandinStats(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.stats = handler.stats
+    return server
+
+
+def start_server(port=0, pages=50, latency=None, failures=None):
+    server = make_server(port, pages, latency=latency, failures=failures)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local bidplus stand-in serving the recorded html fixtures")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every listing response")
+    parser.add_argument("--capacity", type=int, help="Concurrent requests served before responses slow down")
+    parser.add_argument("--overload", type=float, default=0.1,
+                        help="Extra seconds per concurrent request beyond --capacity")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of listing requests that answer 503")
+    parser.add_argument("--seed", type=int, help="Seed for --fail-rate, so failures repeat between runs")
+    args = parser.parse_args()
+
+    latency = StandinLatency(args.latency, args.capacity, args.overload)
+    failures = StandinFailures(args.fail_rate, args.seed)
+    server = make_server(args.port, args.pages, latency=latency, failures=failures)
+    print(f"Serving {args.pages} listing pages on http://127.0.0.1:{args.port}{LISTING_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()